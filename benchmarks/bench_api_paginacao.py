@@ -0,0 +1,90 @@
+"""
+Microbenchmark da paginação da lista de contas da API: OFFSET/LIMIT contra
+cursor (keyset) em (data_vencimento, id), na primeira página e em páginas
+profundas. Usa o banco configurado em DJANGO_SETTINGS_MODULE; os dados são
+criados dentro de uma transação desfeita ao final.
+
+Uso: python benchmarks/bench_api_paginacao.py [--contas 200000] [--limite 20] [--paginas 1 100 10000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from financeiro.api import CAMPOS_CONTA, filtrar_apos_cursor  # noqa: E402
+from financeiro.models import Grupo, ContaPagar  # noqa: E402
+
+
+class Desfazer(Exception):
+    pass
+
+
+def medir(funcao, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--contas', type=int, default=200000)
+    parser.add_argument('--limite', type=int, default=20)
+    parser.add_argument('--paginas', type=int, nargs='+', default=[1, 100, 10000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            usuario = User.objects.create_user('bench-paginacao')
+            grupo = Grupo.objects.create(usuario=usuario, nome='Benchmark')
+            inicio = date(2000, 1, 1)
+            ContaPagar.objects.bulk_create(
+                (ContaPagar(grupo=grupo, descricao=f'Conta {i}', valor=Decimal('10.00'),
+                            data_vencimento=inicio + timedelta(days=i // 7))
+                 for i in range(args.contas)),
+                batch_size=5000,
+            )
+            consulta = ContaPagar.objects.filter(grupo=grupo).order_by('data_vencimento', 'id')
+            ordem = list(consulta.values_list('data_vencimento', 'id'))
+
+            print(f"{'página':>8} {'OFFSET (ms)':>12} {'cursor (ms)':>12}")
+            for pagina in args.paginas:
+                deslocamento = (pagina - 1) * args.limite
+                if deslocamento >= len(ordem):
+                    continue
+                vencimento, ultimo_id = ordem[deslocamento - 1] if deslocamento else (None, None)
+
+                def por_offset():
+                    list(consulta.values(*CAMPOS_CONTA)[deslocamento:deslocamento + args.limite + 1])
+
+                def por_cursor():
+                    pagina_consulta = consulta
+                    if vencimento is not None:
+                        pagina_consulta = filtrar_apos_cursor(consulta, vencimento, ultimo_id)
+                    list(pagina_consulta.values(*CAMPOS_CONTA)[:args.limite + 1])
+
+                print(f"{pagina:>8} {medir(por_offset, args.repeticoes):>12.2f} "
+                      f"{medir(por_cursor, args.repeticoes):>12.2f}")
+            raise Desfazer
+    except Desfazer:
+        pass
+
+
+if __name__ == '__main__':
+    main()
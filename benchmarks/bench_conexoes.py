@@ -0,0 +1,108 @@
+"""
+Latência (p50/p99) da página do espaço (`grupo-detail`) com uma conexão nova
+por requisição (CONN_MAX_AGE=0), com conexão persistente (CONN_MAX_AGE>0) e
+com o pool do psycopg 3 (só PostgreSQL).
+
+As requisições passam pelo WSGIHandler do Django dentro do próprio processo,
+com os sinais request_started/request_finished, então a conexão é fechada ou
+mantida exatamente como no gunicorn. Usa o banco de DJANGO_SETTINGS_MODULE
+(PostgreSQL local ou um SQLite como substituto) e um usuário/grupo existentes.
+
+Uso: python benchmarks/bench_conexoes.py --usuario ana --grupo 1 [--requisicoes 500]
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from carga_wsgi_asgi import criar_sessao  # noqa: E402  (configura o Django)
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+
+MODOS = {
+    'sem persistência': {'CONN_MAX_AGE': 0, 'pool': False},
+    'persistente': {'CONN_MAX_AGE': 60, 'pool': False},
+    'pool psycopg': {'CONN_MAX_AGE': 0, 'pool': True},
+}
+
+
+def configurar(modo):
+    """Aplica o modo à conexão padrão; devolve False se o banco não suporta."""
+    if modo['pool'] and connection.vendor != 'postgresql':
+        return False
+    connection.close()
+    if connection.vendor == 'postgresql':
+        connection.close_pool()
+    connection.settings_dict['CONN_MAX_AGE'] = modo['CONN_MAX_AGE']
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+    opcoes = connection.settings_dict.setdefault('OPTIONS', {})
+    opcoes.pop('pool', None)
+    if modo['pool']:
+        opcoes['pool'] = {'min_size': 1, 'max_size': 4}
+    return True
+
+
+def requisitar(aplicacao, caminho, consulta, cookie):
+    environ = {
+        'PATH_INFO': caminho,
+        'QUERY_STRING': consulta,
+        'HTTP_COOKIE': cookie,
+        'wsgi.input': io.BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    status = []
+    resposta = aplicacao(environ, lambda s, cabecalhos, exc_info=None: status.append(s))
+    try:
+        for _ in resposta:
+            pass
+    finally:
+        # Dispara request_finished, que fecha (ou mantém) a conexão
+        resposta.close()
+    if not status[0].startswith('200'):
+        raise RuntimeError(f"{caminho}?{consulta} respondeu {status[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--usuario', required=True)
+    parser.add_argument('--grupo', type=int, required=True)
+    parser.add_argument('--mes', type=int, default=None)
+    parser.add_argument('--ano', type=int, default=None)
+    parser.add_argument('--requisicoes', type=int, default=500)
+    args = parser.parse_args()
+
+    cookie = f"{settings.SESSION_COOKIE_NAME}={criar_sessao(args.usuario)}"
+    consulta = f"mes={args.mes}&ano={args.ano}" if args.mes and args.ano else ''
+    caminho = f"/grupo/{args.grupo}/"
+    aplicacao = WSGIHandler()
+    conexoes = []
+    connection_created.connect(lambda **kwargs: conexoes.append(1), weak=False)
+
+    print(f"banco: {connection.vendor}")
+    print(f"{'modo':<18} {'p50 (ms)':>9} {'p99 (ms)':>9} {'conexões':>9}")
+    for nome, modo in MODOS.items():
+        if not configurar(modo):
+            print(f"{nome:<18} {'(só PostgreSQL)':>29}")
+            continue
+        requisitar(aplicacao, caminho, consulta, cookie)  # aquecimento
+        conexoes.clear()
+        latencias = []
+        for _ in range(args.requisicoes):
+            inicio = time.perf_counter()
+            requisitar(aplicacao, caminho, consulta, cookie)
+            latencias.append(time.perf_counter() - inicio)
+        latencias.sort()
+        p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+        print(f"{nome:<18} {statistics.median(latencias) * 1000:>9.2f} {p99 * 1000:>9.2f} {len(conexoes):>9}")
+
+
+if __name__ == '__main__':
+    main()
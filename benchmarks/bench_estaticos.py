@@ -0,0 +1,110 @@
+"""
+Bytes transferidos e tempo estimado do primeiro acesso (cache do navegador
+vazio) com os arquivos estáticos de cada página: antes, pelas CDNs, e agora,
+servidos pelo WhiteNoise a partir de static/vendor/.
+
+Roda o collectstatic numa pasta temporária (CompressedManifestStaticFilesStorage),
+busca cada arquivo pelo próprio WhiteNoise com `Accept-Encoding: br` e soma os
+bytes recebidos. O "antes" usa os arquivos completos do Font Awesome (all.min.css
+e as fontes solid e regular inteiras, de --fontawesome) e o Chart.js em todas as
+páginas, comprimidos com brotli como as CDNs entregam.
+
+O tempo estimado segue o perfil "3G rápido" do Lighthouse (--rtt 150 ms,
+--banda 1,6 Mbps): cada origem externa custa DNS + TCP + TLS (3 RTTs), cada
+rodada de requisições mais um RTT (as fontes só são pedidas depois do CSS) e os
+bytes são divididos pela banda.
+
+    python benchmarks/bench_estaticos.py --fontawesome ~/fontawesome-free-6.4.0-web
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import brotli  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.storage import staticfiles_storage  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+BASE = [
+    'vendor/bootstrap/css/bootstrap.min.css',
+    'vendor/fontawesome/css/fontawesome.min.css',
+    'css/base.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js',
+]
+FONTES = ['vendor/fontawesome/webfonts/fa-solid-900.woff2', 'vendor/fontawesome/webfonts/fa-regular-400.woff2']
+PAGINAS = {
+    'login': BASE + FONTES,
+    'grupo_detail': BASE + ['vendor/chartjs/chart.umd.min.js'] + FONTES,
+}
+# Antes: jsdelivr (Bootstrap e Chart.js) e cdnjs (Font Awesome)
+ORIGENS_CDN = 2
+
+
+def baixar(cliente, caminho):
+    """Bytes recebidos e Cache-Control de um arquivo servido pelo WhiteNoise."""
+    response = cliente.get(staticfiles_storage.url(caminho), HTTP_ACCEPT_ENCODING='br, gzip')
+    if response.status_code != 200:
+        raise RuntimeError(f'{caminho}: status {response.status_code}')
+    corpo = b''.join(response.streaming_content)
+    response.close()
+    return len(corpo), response.get('Cache-Control', '')
+
+
+def comprimido(caminho):
+    conteudo = Path(caminho).read_bytes()
+    return len(conteudo) if caminho.suffix == '.woff2' else len(brotli.compress(conteudo))
+
+
+def tempo_estimado(total_bytes, origens_externas, rtt_ms, banda_mbps):
+    return rtt_ms * (3 * origens_externas + 2) + total_bytes * 8 / (banda_mbps * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--fontawesome', type=Path, required=True,
+                        help='Pasta do Font Awesome Free 6 para web (com css/ e webfonts/)')
+    parser.add_argument('--rtt', type=float, default=150)
+    parser.add_argument('--banda', type=float, default=1.6, help='Mbps')
+    args = parser.parse_args()
+
+    antes_fontawesome = sum(comprimido(args.fontawesome / caminho) for caminho in (
+        'css/all.min.css', 'webfonts/fa-solid-900.woff2', 'webfonts/fa-regular-400.woff2',
+    ))
+    estaticos = Path(settings.STATICFILES_DIRS[0])
+    comuns = sum(comprimido(estaticos / caminho) for caminho in BASE if 'fontawesome' not in caminho)
+    chartjs = comprimido(estaticos / 'vendor/chartjs/chart.umd.min.js')
+
+    armazenamento = {**settings.STORAGES, 'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    }}
+    with tempfile.TemporaryDirectory() as pasta, \
+            override_settings(STATIC_ROOT=pasta, STORAGES=armazenamento, DEBUG=False, ALLOWED_HOSTS=['*']):
+        call_command('collectstatic', '--noinput', verbosity=0)
+        cliente = Client()
+        print(f"{'página':<14} {'antes (KB)':>11} {'agora (KB)':>11} {'antes (ms)':>11} {'agora (ms)':>11}")
+        cabecalhos = set()
+        for pagina, arquivos in PAGINAS.items():
+            agora = 0
+            for caminho in arquivos:
+                tamanho, cache_control = baixar(cliente, caminho)
+                agora += tamanho
+                cabecalhos.add(cache_control)
+            antes = comuns + antes_fontawesome + chartjs
+            print(f'{pagina:<14} {antes / 1024:>11.1f} {agora / 1024:>11.1f} '
+                  f'{tempo_estimado(antes, ORIGENS_CDN, args.rtt, args.banda):>11.0f} '
+                  f'{tempo_estimado(agora, 0, args.rtt, args.banda):>11.0f}')
+        print(f"Cache-Control: {' | '.join(sorted(cabecalhos))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Microbenchmark da geração do PDF de resumo: implementação anterior (estilos
+recriados a cada requisição, Table simples e três str.replace por valor) contra
+financeiro.exportacao.montar_pdf. Não acessa o banco.
+
+Uso: python benchmarks/bench_pdf.py [--linhas 10 1000 20000] [--repeticoes 3]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from reportlab.lib import colors  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle  # noqa: E402
+from reportlab.lib.units import cm  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer  # noqa: E402
+
+from financeiro.exportacao import montar_pdf  # noqa: E402
+
+
+def pdf_anterior(titulo, subtitulo, totais, linhas, arquivo):
+    """Reprodução da view exportar_pdf antes da extração para exportacao.py."""
+    doc = SimpleDocTemplate(arquivo, pagesize=A4, leftMargin=2*cm, rightMargin=2*cm,
+                            topMargin=2*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18,
+                                 textColor=colors.HexColor('#0d6efd'), spaceAfter=6)
+    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=12,
+                                    textColor=colors.grey, spaceAfter=20)
+    elements = [Paragraph(titulo, title_style), Paragraph(subtitulo, subtitle_style)]
+    resumo_table = Table([
+        ['Total Previsto', 'Total Pago', 'Pendente'],
+        [f'R$ {totais[c]:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+         for c in ('previsto', 'pago', 'pendente')],
+    ], colWidths=[5.5*cm, 5.5*cm, 5.5*cm])
+    resumo_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#0d6efd')),
+        ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#198754')),
+        ('BACKGROUND', (2, 0), (2, 0), colors.HexColor('#ffc107')),
+        ('TEXTCOLOR', (0, 0), (1, 0), colors.white),
+        ('TEXTCOLOR', (2, 0), (2, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTSIZE', (0, 1), (-1, 1), 12),
+        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    elements += [resumo_table, Spacer(1, 20), Paragraph("Detalhamento das Contas", styles['Heading2'])]
+    table_data = [['Status', 'Vencimento', 'Descrição', 'Valor']]
+    for pago, vencimento, descricao, valor in linhas:
+        table_data.append([
+            '✓ Pago' if pago else '○ Pendente',
+            vencimento.strftime('%d/%m/%Y'),
+            descricao,
+            f'R$ {valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
+        ])
+    contas_table = Table(table_data, colWidths=[2.5*cm, 3*cm, 8*cm, 3*cm])
+    contas_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('ALIGN', (0, 1), (1, -1), 'CENTER'),
+        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('TOPPADDING', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+        ('TOPPADDING', (0, 1), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+    ]))
+    elements.append(contas_table)
+    doc.build(elements)
+
+
+def gerar_linhas(quantidade):
+    inicio = date(2025, 1, 1)
+    return [
+        (i % 3 == 0, inicio + timedelta(days=i % 28), f'Conta sintética {i}', Decimal(1000 + i) / 7)
+        for i in range(quantidade)
+    ]
+
+
+def medir(funcao, linhas, repeticoes):
+    totais = {'previsto': Decimal('12345.67'), 'pago': Decimal('2345.67'), 'pendente': Decimal('10000')}
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao('Grupo', 'Resumo de Janeiro de 2025', totais, linhas, BytesIO())
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10, 1000, 20000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} {'anterior (linhas/s)':>20} {'atual (linhas/s)':>18} {'ganho':>7}")
+    for quantidade in args.linhas:
+        linhas = gerar_linhas(quantidade)
+        anterior = medir(pdf_anterior, linhas, args.repeticoes)
+        atual = medir(montar_pdf, linhas, args.repeticoes)
+        print(f"{quantidade:>8} {quantidade / anterior:>20,.0f} {quantidade / atual:>18,.0f} "
+              f"{anterior / atual:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
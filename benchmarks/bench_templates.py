@@ -0,0 +1,114 @@
+"""
+Tempo de renderização dos templates `grupo_detail.html` e `grupo_list.html`.
+
+O contexto de cada página é montado uma vez (pela própria view) e o template
+é renderizado várias vezes em três situações:
+
+- `compilando`: o cached loader é esvaziado antes de cada renderização, então
+  os arquivos são lidos e compilados toda vez (como com TEMPLATE_CACHE=False);
+- `compilado`: template já compilado em memória, cache de fragmentos vazio;
+- `fragmentos`: template compilado e fragmentos (`{% cache %}`) já em cache.
+
+Mostra p50/p95 de cada situação e o tamanho do HTML gerado. Usa o banco de
+DJANGO_SETTINGS_MODULE e um usuário existente:
+
+    python benchmarks/bench_templates.py --usuario sintetico0 [--grupo ID] [--mes 1 --ano 2025]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.template import engines  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from financeiro.views import GrupoDetailView, GrupoListView  # noqa: E402
+
+SITUACOES = ('compilando', 'compilado', 'fragmentos')
+
+
+def percentil(ordenados, fracao):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+
+def contexto(view_class, request, **kwargs):
+    """Contexto que a view passaria ao template (sem renderizar)."""
+    view = view_class()
+    view.setup(request, **kwargs)
+    if 'pk' in kwargs:
+        view.object = view.get_object()
+        return view.get_context_data(object=view.object)
+    view.object_list = view.get_queryset()
+    return view.get_context_data()
+
+
+def carregadores():
+    return engines.all()[0].engine.template_loaders
+
+
+def esvaziar_loader():
+    for carregador in carregadores():
+        if hasattr(carregador, 'reset'):
+            carregador.reset()
+
+
+def medir(nome_template, dados, request, situacao, repeticoes):
+    """(latências em ms, bytes do HTML) das renderizações na situação pedida."""
+    get_template(nome_template).render(dados, request)  # aquecimento (e fragmentos em cache)
+    latencias = []
+    for _ in range(repeticoes):
+        if situacao == 'compilando':
+            esvaziar_loader()
+        if situacao != 'fragmentos':
+            cache.clear()
+        inicio = time.perf_counter()
+        html = get_template(nome_template).render(dados, request)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return sorted(latencias), len(html.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--usuario', required=True)
+    parser.add_argument('--grupo', type=int, default=None, help='Padrão: o espaço do usuário com mais contas')
+    parser.add_argument('--mes', type=int, default=date.today().month)
+    parser.add_argument('--ano', type=int, default=date.today().year)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    usuario = User.objects.get(username=args.usuario)
+    grupos = usuario.grupos.annotate(quantidade=Count('contas'))
+    grupo = grupos.get(pk=args.grupo) if args.grupo else grupos.order_by('-quantidade').first()
+    request = RequestFactory().get('/', {'mes': args.mes, 'ano': args.ano})
+    request.user = usuario
+    paginas = {
+        'financeiro/grupo_detail.html': contexto(GrupoDetailView, request, pk=grupo.pk),
+        'financeiro/grupo_list.html': contexto(GrupoListView, request),
+    }
+    if not any(hasattr(carregador, 'reset') for carregador in carregadores()):
+        print('Aviso: TEMPLATE_CACHE=False, as situações "compilado" e "fragmentos" também recompilam.')
+
+    print(f'espaço {grupo.pk} ({grupo.quantidade} contas), {args.mes:02d}/{args.ano}, {args.repeticoes} repetições')
+    print(f"{'template':<32} {'situação':<11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'HTML (KB)':>10}")
+    for nome_template, dados in paginas.items():
+        for situacao in SITUACOES:
+            latencias, tamanho = medir(nome_template, dados, request, situacao, args.repeticoes)
+            print(f'{nome_template:<32} {situacao:<11} {statistics.median(latencias):>9.2f} '
+                  f'{percentil(latencias, 0.95):>9.2f} {tamanho / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
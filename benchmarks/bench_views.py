@@ -0,0 +1,184 @@
+"""
+Benchmark das páginas principais: dashboard do espaço (GrupoDetailView),
+lista de espaços (GrupoListView), exportar PDF/Excel e login.
+
+Para cada cenário mede p50/p95/p99 do tempo de resposta, a quantidade de
+consultas e o pico de memória alocada (tracemalloc, numa execução à parte
+para não distorcer os tempos). Os caches do dashboard e das exportações são
+esvaziados antes de cada requisição, então os números são do pior caso.
+
+Os resultados podem ser gravados como linha de base em JSON (--salvar) e
+comparados com uma linha de base anterior (--comparar): o script termina com
+código 1 se algum cenário ficar mais de --tolerancia (padrão 20%) mais lento
+no p50/p95 ou usar mais memória, ou se fizer mais consultas.
+
+Usa o banco de DJANGO_SETTINGS_MODULE (com DEBUG=True, para o host local ser
+aceito), com os dados de `manage.py gerar_dados_sinteticos`:
+
+    python manage.py gerar_dados_sinteticos --usuarios 10 --grupos 3 --contas 5000
+    python benchmarks/bench_views.py --usuario sintetico0 --salvar benchmarks/linha_de_base.json
+    python benchmarks/bench_views.py --usuario sintetico0 --comparar benchmarks/linha_de_base.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+METRICAS_TEMPO = ('p50_ms', 'p95_ms')
+
+
+def percentil(ordenados, fracao):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+
+def cenarios(usuario, senha, grupo, mes, ano):
+    """{nome: função(cliente) -> response}; o cliente já vem autenticado, exceto no login."""
+    periodo = {'mes': mes, 'ano': ano}
+    detalhe = reverse('grupo-detail', kwargs={'pk': grupo.pk})
+    pdf = reverse('exportar-pdf', kwargs={'pk': grupo.pk})
+    excel = reverse('exportar-excel', kwargs={'pk': grupo.pk})
+    return {
+        'grupo_detail': lambda cliente: cliente.get(detalhe, periodo),
+        'grupo_list': lambda cliente: cliente.get(reverse('grupo-list'), periodo),
+        'exportar_pdf': lambda cliente: cliente.get(pdf, {**periodo, 'meses': 3}),
+        'exportar_excel': lambda cliente: cliente.get(excel, {**periodo, 'meses': 3}),
+        'login': lambda cliente: cliente.post(reverse('login'), {'username': usuario.username, 'password': senha}),
+    }
+
+
+def executar(funcao, cliente, diretorio_exportacoes):
+    cache.clear()
+    for arquivo in Path(diretorio_exportacoes).iterdir():
+        arquivo.unlink()
+    response = funcao(cliente)
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f'status {response.status_code}')
+    if response.streaming:
+        # Consome o FileResponse das exportações, como o servidor faria
+        for _ in response:
+            pass
+    response.close()
+
+
+def medir(nome, funcao, usuario, repeticoes, diretorio_exportacoes):
+    cliente = Client(HTTP_HOST='localhost')
+    if nome != 'login':
+        cliente.force_login(usuario)
+    executar(funcao, cliente, diretorio_exportacoes)  # aquecimento
+
+    latencias = []
+    for _ in range(repeticoes):
+        if nome == 'login':
+            cliente.logout()
+        inicio = time.perf_counter()
+        executar(funcao, cliente, diretorio_exportacoes)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    if nome == 'login':
+        cliente.logout()
+    consultas = []
+    with connection.execute_wrapper(lambda execute, *args: consultas.append(1) or execute(*args)):
+        executar(funcao, cliente, diretorio_exportacoes)
+
+    if nome == 'login':
+        cliente.logout()
+    tracemalloc.start()
+    executar(funcao, cliente, diretorio_exportacoes)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencias.sort()
+    return {
+        'p50_ms': round(statistics.median(latencias), 2),
+        'p95_ms': round(percentil(latencias, 0.95), 2),
+        'p99_ms': round(percentil(latencias, 0.99), 2),
+        'consultas': len(consultas),
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def regressoes(atual, base, tolerancia):
+    """Lista de mensagens com o que piorou em relação à linha de base."""
+    problemas = []
+    for nome, resultado in atual.items():
+        anterior = base.get(nome)
+        if anterior is None:
+            continue
+        for metrica in METRICAS_TEMPO + ('pico_memoria_kb',):
+            limite = anterior[metrica] * (1 + tolerancia)
+            if resultado[metrica] > limite:
+                problemas.append(
+                    f'{nome}: {metrica} {resultado[metrica]} > {anterior[metrica]} (+{tolerancia:.0%})'
+                )
+        if resultado['consultas'] > anterior['consultas']:
+            problemas.append(f"{nome}: consultas {resultado['consultas']} > {anterior['consultas']}")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--usuario', required=True)
+    parser.add_argument('--senha', default='senha-sintetica')
+    parser.add_argument('--grupo', type=int, default=None, help='Padrão: o espaço do usuário com mais contas')
+    parser.add_argument('--mes', type=int, default=date.today().month)
+    parser.add_argument('--ano', type=int, default=date.today().year)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--cenarios', nargs='+', default=None)
+    parser.add_argument('--salvar', type=Path, help='Grava os resultados como linha de base em JSON')
+    parser.add_argument('--comparar', type=Path, help='Linha de base JSON para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.20)
+    args = parser.parse_args()
+
+    usuario = User.objects.get(username=args.usuario)
+    grupos = usuario.grupos.annotate(quantidade=Count('contas'))
+    grupo = grupos.get(pk=args.grupo) if args.grupo else grupos.order_by('-quantidade').first()
+    todos = cenarios(usuario, args.senha, grupo, args.mes, args.ano)
+    selecionados = args.cenarios or list(todos)
+
+    print(f'espaço {grupo.pk} ({grupo.quantidade} contas), {args.mes:02d}/{args.ano}, '
+          f'{args.repeticoes} repetições, banco {connection.vendor}')
+    print(f"{'cenário':<16} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'consultas':>9} {'pico (KB)':>10}")
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio, override_settings(EXPORT_CACHE_DIR=diretorio):
+        for nome in selecionados:
+            r = resultados[nome] = medir(nome, todos[nome], usuario, args.repeticoes, diretorio)
+            print(f"{nome:<16} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['consultas']:>9} {r['pico_memoria_kb']:>10.1f}")
+
+    if args.salvar:
+        args.salvar.write_text(json.dumps({
+            'gerado_em': date.today().isoformat(), 'banco': connection.vendor,
+            'contas_no_espaco': grupo.quantidade, 'cenarios': resultados,
+        }, indent=2, ensure_ascii=False) + '\n')
+        print(f'Linha de base gravada em {args.salvar}.')
+    if args.comparar:
+        problemas = regressoes(resultados, json.loads(args.comparar.read_text())['cenarios'], args.tolerancia)
+        for problema in problemas:
+            print(f'REGRESSÃO {problema}')
+        if problemas:
+            sys.exit(1)
+        print(f'Sem regressões em relação a {args.comparar}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Teste de carga simples (só biblioteca padrão) para comparar requisições/segundo
+do perfil WSGI (gunicorn síncrono) com o perfil ASGI (workers uvicorn e
+ASYNC_VIEWS=True).
+
+O script cria uma sessão autenticada para `--usuario` direto no banco
+configurado em DJANGO_SETTINGS_MODULE (o mesmo do servidor) e dispara
+`--concorrencia` clientes com keep-alive durante `--duracao` segundos.
+
+Uso:
+    gunicorn -w 4 config.wsgi:application                                  # WSGI
+    ASYNC_VIEWS=True gunicorn -w 4 -k uvicorn_worker.UvicornWorker config.asgi:application  # ASGI
+    python benchmarks/carga_wsgi_asgi.py --usuario ana --grupo 1 [--url http://localhost:8000]
+"""
+import argparse
+import http.client
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+
+
+def criar_sessao(usuario):
+    user = User.objects.get(username=usuario)
+    sessao = SessionStore()
+    sessao[SESSION_KEY] = str(user.pk)
+    sessao[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    sessao[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    sessao.create()
+    return sessao.session_key
+
+
+def cliente(endereco, caminhos, cookie, fim, latencias, erros):
+    conexao = None
+    i = 0
+    while time.perf_counter() < fim:
+        if conexao is None:
+            conexao = http.client.HTTPConnection(endereco.hostname, endereco.port or 80, timeout=30)
+        caminho = caminhos[i % len(caminhos)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            conexao.request('GET', caminho, headers={'Cookie': cookie})
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status != 200:
+                erros.append(resposta.status)
+        except (OSError, http.client.HTTPException) as exc:
+            erros.append(type(exc).__name__)
+            conexao.close()
+            conexao = None
+            continue
+        latencias.append(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--usuario', required=True)
+    parser.add_argument('--grupo', type=int, required=True)
+    parser.add_argument('--mes', type=int, default=None)
+    parser.add_argument('--ano', type=int, default=None)
+    parser.add_argument('--concorrencia', type=int, default=32)
+    parser.add_argument('--duracao', type=float, default=10.0)
+    args = parser.parse_args()
+
+    periodo = f"?mes={args.mes}&ano={args.ano}" if args.mes and args.ano else ''
+    caminhos = [
+        f"/grupo/{args.grupo}/{periodo}",
+        f"/api/grupos/{args.grupo}/resumo/{periodo}",
+        f"/api/grupos/{args.grupo}/contas/?limite=50",
+    ]
+    cookie = f"{settings.SESSION_COOKIE_NAME}={criar_sessao(args.usuario)}"
+    endereco = urlsplit(args.url)
+
+    latencias, erros = [], []
+    fim = time.perf_counter() + args.duracao
+    threads = [
+        threading.Thread(target=cliente, args=(endereco, caminhos, cookie, fim, latencias, erros))
+        for _ in range(args.concorrencia)
+    ]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+
+    if not latencias:
+        print(f"Nenhuma requisição concluída ({len(erros)} erros).")
+        return
+    latencias.sort()
+    p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+    print(f"{len(latencias)} requisições em {decorrido:.1f}s: {len(latencias) / decorrido:.1f} req/s, "
+          f"p50 {statistics.median(latencias) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, {len(erros)} erros")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,41 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+
+class EstaticosAsgi:
+    """
+    Serve os arquivos de STATIC_ROOT pelo WhiteNoise antes de chegar ao Django.
+
+    O WhiteNoiseMiddleware só funciona em modo síncrono e, na lista de
+    MIDDLEWARE, faria o Django rodar toda a cadeia (e as views assíncronas)
+    numa thread. Aqui só os estáticos passam pela thread do WsgiToAsgi.
+    """
+
+    def __init__(self, application):
+        from whitenoise.base import WhiteNoise
+        from whitenoise.middleware import WhiteNoiseMiddleware
+
+        self.application = application
+        # Mesma configuração (WHITENOISE_*, STATIC_ROOT, STATIC_URL) do middleware
+        self.whitenoise = WhiteNoiseMiddleware()
+        self.estaticos = WsgiToAsgi(lambda environ, start_response: WhiteNoise.serve(
+            self.arquivo(environ['PATH_INFO']), environ, start_response,
+        ))
+
+    def arquivo(self, caminho):
+        if self.whitenoise.autorefresh:
+            return self.whitenoise.find_file(caminho)
+        return self.whitenoise.files.get(caminho)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and self.arquivo(scope['path']) is not None:
+            return await self.estaticos(scope, receive, send)
+        return await self.application(scope, receive, send)
+
+
+application = EstaticosAsgi(get_asgi_application())
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -40,11 +41,22 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Busca de contas (SearchVectorField, trigramas): financeiro/busca.py
+    'django.contrib.postgres',
     'financeiro',
 ]
 
 MIDDLEWARE = [
+    'financeiro.desempenho.MedicaoDesempenhoMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serve os arquivos de STATIC_ROOT (gunicorn sem servidor web na frente);
+    # sai da lista no perfil ASGI, ver ASYNC_VIEWS abaixo
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Comprime as respostas (HTML, JSON) para quem aceita gzip; os estáticos já
+    # saem comprimidos do WhiteNoise. Depois dele, ETag (hash do conteúdo) e 304
+    # para as páginas que não geram o próprio ETag
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,17 +67,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# TEMPLATE_CACHE: templates compilados uma vez por processo e guardados em memória
+# (cached loader). Com DEBUG o runserver descarta o cache quando um template muda;
+# TEMPLATE_CACHE=False relê e recompila os arquivos a cada renderização.
+TEMPLATE_CACHE = os.environ.get('TEMPLATE_CACHE', 'True') == 'True'
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com o tempo de renderização medido (Server-Timing)
+        'BACKEND': 'financeiro.desempenho.DjangoTemplatesMedidos',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+            if TEMPLATE_CACHE else TEMPLATE_LOADERS,
         },
     },
 ]
@@ -84,9 +107,102 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Conexão reaproveitada entre requisições por até DB_CONN_MAX_AGE segundos
+        # (0 = uma conexão nova por requisição), testada antes de cada reuso.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # .iterator() usa cursores no servidor (exportações, rebuild_resumos).
+        # Desligue atrás de um PgBouncer em modo transaction.
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+        'OPTIONS': {},
     }
 }
 
+# Perfil ASGI (uvicorn): o dashboard do grupo e as leituras da API passam a ser
+# servidos pelas views assíncronas (financeiro/views_async.py e financeiro/api.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+# Pool de conexões do psycopg 3 por processo (DB_POOL=True). Substitui as
+# conexões persistentes: o Django exige CONN_MAX_AGE = 0 com o pool.
+# Sempre ligado no perfil ASGI: lá o ORM roda nas threads do sync_to_async,
+# cada requisição na sua, e conexões persistentes se acumulam em vez de serem
+# reaproveitadas (ticket #33497 do Django).
+if ASYNC_VIEWS or os.environ.get('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# CACHE_BACKEND: 'locmem' (padrão, por processo), 'file' ou 'db' (compartilhados entre workers).
+# Para 'db', rode antes: python manage.py createcachetable
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'financeiro',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'financeiro_cache'),
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+# Tempo (s) que o dashboard de um grupo fica em cache; a invalidação por versão
+# já descarta entradas antigas quando as contas mudam.
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60 * 60))
+
+# Exportações PDF/Excel já geradas ficam em disco, endereçadas pelo conteúdo,
+# e as menos usadas recentemente são removidas quando o total passa do limite.
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', str(BASE_DIR / '.cache' / 'exportacoes'))
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+# Arquivos gerados pelo run_export_worker (exportações assíncronas)
+EXPORT_JOBS_DIR = os.environ.get('EXPORT_JOBS_DIR', str(BASE_DIR / '.cache' / 'tarefas'))
+
+# Medição de desempenho por requisição (financeiro/desempenho.py): Server-Timing,
+# janela das últimas PERF_AMOSTRAS requisições por rota (gravada em PERF_DIR a
+# cada PERF_INTERVALO_GRAVACAO segundos, lida pelo `manage.py perf_report`) e
+# log das requisições acima de PERF_LENTO_MS com as PERF_TOP_CONSULTAS mais lentas.
+PERF_ATIVO = os.environ.get('PERF_ATIVO', 'True') == 'True'
+PERF_AMOSTRAS = int(os.environ.get('PERF_AMOSTRAS', 1000))
+# Fora do projeto: são dados de execução, um arquivo por processo
+PERF_DIR = os.environ.get('PERF_DIR', os.path.join(tempfile.gettempdir(), 'financeiro-desempenho'))
+PERF_INTERVALO_GRAVACAO = float(os.environ.get('PERF_INTERVALO_GRAVACAO', 10))
+# Arquivos não regravados há PERF_VALIDADE segundos (worker encerrado ou
+# reiniciado) ficam fora do relatório e são removidos
+PERF_VALIDADE = float(os.environ.get('PERF_VALIDADE', 6 * PERF_INTERVALO_GRAVACAO))
+PERF_LENTO_MS = float(os.environ.get('PERF_LENTO_MS', 500))
+PERF_TOP_CONSULTAS = int(os.environ.get('PERF_TOP_CONSULTAS', 5))
+# Detector de N+1 (mesmo middleware): um SELECT com o mesmo formato repetido
+# CONSULTAS_REPETIDAS_LIMITE vezes numa requisição vai para o log ('log') ou
+# levanta ConsultasRepetidas ('erro'). Vazio desliga; por padrão só em DEBUG.
+CONSULTAS_REPETIDAS_LIMITE = int(os.environ.get('CONSULTAS_REPETIDAS_LIMITE', 5))
+CONSULTAS_REPETIDAS_ACAO = os.environ.get('CONSULTAS_REPETIDAS_ACAO', 'log' if DEBUG else '')
+
+# `manage.py test` grava as medições num diretório temporário próprio
+TEST_RUNNER = 'config.test_runner.TestRunner'
+
+# Perfil ASGI (ASYNC_VIEWS, definido junto do banco)
+if ASYNC_VIEWS:
+    # O WhiteNoiseMiddleware é o único middleware só síncrono da lista e faria o
+    # Django rodar a cadeia inteira numa thread; sob ASGI os estáticos são
+    # servidos antes do Django, em config/asgi.py (EstaticosAsgi). Por isso
+    # ASYNC_VIEWS=True pressupõe o config.asgi (ou um servidor web servindo STATIC_ROOT)
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -124,6 +240,22 @@ USE_TZ = False
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# STATIC_MANIFEST: nomes com hash do conteúdo (base.5f3c2a.css), gerados pelo
+# collectstatic, para o navegador nunca usar uma versão antiga em cache. Exige o
+# collectstatic antes de subir; em desenvolvimento os arquivos vêm direto de static/.
+# O collectstatic também grava versões .gz e .br de cada arquivo, que o WhiteNoise
+# entrega conforme o Accept-Encoding, e os arquivos com hash saem com
+# Cache-Control de 10 anos e immutable.
+STATIC_MANIFEST = os.environ.get('STATIC_MANIFEST', str(not DEBUG)) == 'True'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 # Authentication settings
 LOGIN_URL = 'login'
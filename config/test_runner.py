@@ -0,0 +1,25 @@
+"""
+Runner do `manage.py test` (settings.TEST_RUNNER).
+
+A medição de desempenho continua ligada (os testes do middleware dependem
+dela), mas os arquivos de PERF_DIR vão para um diretório temporário,
+removido no fim, em vez de ficarem no diretório de trabalho a cada execução.
+"""
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._perf_dir = tempfile.TemporaryDirectory(prefix='financeiro-desempenho-')
+        self._configuracao = override_settings(PERF_DIR=self._perf_dir.name)
+        self._configuracao.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._configuracao.disable()
+        self._perf_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
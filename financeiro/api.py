@@ -0,0 +1,405 @@
+"""
+API JSON de grupos e contas a pagar (autenticação pela sessão do Django).
+
+Listas usam paginação por cursor (keyset) em (data_vencimento, id): cada
+página é um `WHERE (data_vencimento, id) > cursor ORDER BY ... LIMIT n`, que
+custa o mesmo na primeira página e na milésima, ao contrário do OFFSET.
+"""
+import asyncio
+import base64
+import json
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from datetime import date
+from functools import wraps
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.formats import date_format
+from django.utils.http import quote_etag
+from .exportacao import MAX_MESES
+from .busca import buscar_contas
+from .caching import dashboard_em_cache, versao_grupo
+from .forms import BuscaContasForm, GrupoForm, ContaPagarForm
+from .models import Grupo, ContaPagar
+from .recorrencias import contas_virtuais, previsto_virtual_por_mes
+from .services import aresumo_mensal, deslocar_mes, periodo_mes, resumo_mensal, series_historico
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+LIMITE_AUTOCOMPLETAR = 20
+# Janela padrão do histórico em api-grupo-grafico (a mesma da página do grupo)
+MESES_GRAFICO = 6
+
+CAMPOS_GRUPO = ('id', 'nome', 'descricao', 'criado_em')
+CAMPOS_CONTA = (
+    'id', 'grupo_id', 'descricao', 'valor', 'data_vencimento', 'pago', 'data_pagamento',
+    'recorrencia_id', 'ocorrencia', 'criado_em', 'atualizado_em',
+)
+
+
+class ErroApi(Exception):
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def api_view(metodos):
+    """
+    Exige login (401 em JSON), restringe os métodos HTTP e converte ErroApi em resposta.
+
+    Aceita views síncronas e assíncronas (`async def`).
+    """
+    def verificar(request, usuario):
+        if not usuario.is_authenticated:
+            return JsonResponse({'erro': 'Autenticação necessária.'}, status=401)
+        if request.method not in metodos:
+            response = JsonResponse({'erro': 'Método não permitido.'}, status=405)
+            response['Allow'] = ', '.join(metodos)
+            return response
+        return None
+
+    def decorador(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper_assincrono(request, *args, **kwargs):
+                recusa = verificar(request, await request.auser())
+                if recusa is not None:
+                    return recusa
+                try:
+                    return await view(request, *args, **kwargs)
+                except ErroApi as exc:
+                    return JsonResponse({'erro': str(exc)}, status=exc.status)
+            return wrapper_assincrono
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            recusa = verificar(request, request.user)
+            if recusa is not None:
+                return recusa
+            try:
+                return view(request, *args, **kwargs)
+            except ErroApi as exc:
+                return JsonResponse({'erro': str(exc)}, status=exc.status)
+        return wrapper
+    return decorador
+
+
+def _corpo(request):
+    try:
+        dados = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ErroApi('JSON inválido.')
+    if not isinstance(dados, dict):
+        raise ErroApi('O corpo deve ser um objeto JSON.')
+    return dados
+
+
+def _campos(request, permitidos, obrigatorios):
+    """Campos pedidos em ?campos=a,b (sparse fieldset), sempre com os `obrigatorios`."""
+    pedidos = request.GET.get('campos')
+    if not pedidos:
+        return list(permitidos)
+    pedidos = [campo.strip() for campo in pedidos.split(',') if campo.strip()]
+    invalidos = set(pedidos) - set(permitidos)
+    if invalidos:
+        raise ErroApi(f"Campos inválidos: {', '.join(sorted(invalidos))}.")
+    return list(obrigatorios) + [campo for campo in pedidos if campo not in obrigatorios]
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limite', LIMITE_PADRAO))
+    except ValueError:
+        raise ErroApi('limite deve ser um número.')
+    return min(max(limite, 1), LIMITE_MAXIMO)
+
+
+def codificar_cursor(*valores):
+    texto = '|'.join(v.isoformat() if isinstance(v, date) else str(v) for v in valores)
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        return texto.split('|')
+    except ValueError:
+        raise ErroApi('Cursor inválido.')
+
+
+def filtrar_apos_cursor(consulta, vencimento, ultimo_id):
+    """
+    (data_vencimento, id) > (vencimento, ultimo_id).
+
+    O `data_vencimento >= vencimento` redundante dá ao banco o início do
+    intervalo no índice (grupo, data_vencimento); sem ele o OR vira varredura.
+    """
+    return consulta.filter(
+        Q(data_vencimento__gt=vencimento) | Q(id__gt=ultimo_id),
+        data_vencimento__gte=vencimento,
+    )
+
+
+def _pagina(request, linhas, limite, chave):
+    """Monta a resposta de uma página; `linhas` traz um item a mais para saber se há próxima."""
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        parametros = request.GET.copy()
+        parametros['cursor'] = codificar_cursor(*chave(linhas[-1]))
+        proximo = f"{request.path}?{parametros.urlencode()}"
+    return JsonResponse({'resultados': linhas, 'proximo': proximo})
+
+
+def _erros_formulario(form):
+    return JsonResponse({'erros': form.errors.get_json_data()}, status=400)
+
+
+# --- GRUPOS ---
+
+def _dados_grupo(grupo):
+    return {campo: getattr(grupo, campo) for campo in CAMPOS_GRUPO}
+
+
+@api_view(['GET', 'POST'])
+def grupos(request):
+    """GET: grupos do usuário (cursor por id). POST: cria um grupo."""
+    if request.method == 'POST':
+        form = GrupoForm(_corpo(request))
+        if not form.is_valid():
+            return _erros_formulario(form)
+        form.instance.usuario = request.user
+        return JsonResponse(_dados_grupo(form.save()), status=201)
+
+    limite = _limite(request)
+    consulta = Grupo.objects.filter(usuario=request.user).order_by('id')
+    if request.GET.get('cursor'):
+        try:
+            consulta = consulta.filter(id__gt=int(decodificar_cursor(request.GET['cursor'])[0]))
+        except ValueError:
+            raise ErroApi('Cursor inválido.')
+    linhas = list(consulta.values(*_campos(request, CAMPOS_GRUPO, ['id']))[:limite + 1])
+    return _pagina(request, linhas, limite, lambda linha: (linha['id'],))
+
+
+@api_view(['GET'])
+def grupos_autocompletar(request):
+    """Até LIMITE_AUTOCOMPLETAR grupos do usuário (id e nome) cujo nome contém ?q=, em ordem alfabética."""
+    consulta = Grupo.objects.filter(usuario=request.user).order_by('nome')
+    termo = request.GET.get('q', '').strip()
+    if termo:
+        consulta = consulta.filter(nome__icontains=termo)
+    return JsonResponse({'resultados': list(consulta.values('id', 'nome')[:LIMITE_AUTOCOMPLETAR])})
+
+
+@api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
+def grupo_detalhe(request, pk):
+    grupo = get_object_or_404(Grupo, pk=pk, usuario=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_dados_grupo(grupo))
+    if request.method == 'DELETE':
+        grupo.delete()
+        return HttpResponse(status=204)
+
+    dados = _corpo(request)
+    if request.method == 'PATCH':
+        dados = {**model_to_dict(grupo, fields=GrupoForm.Meta.fields), **dados}
+    form = GrupoForm(dados, instance=grupo)
+    if not form.is_valid():
+        return _erros_formulario(form)
+    return JsonResponse(_dados_grupo(form.save()))
+
+
+def _periodo_resumo(request, meses_padrao=1):
+    hoje = date.today()
+    try:
+        mes = int(request.GET.get('mes', hoje.month))
+        ano = int(request.GET.get('ano', hoje.year))
+        meses = min(max(int(request.GET.get('meses', meses_padrao)), 1), MAX_MESES)
+        periodo_mes(mes, ano, meses)
+    except ValueError:
+        raise ErroApi('mes, ano e meses devem ser números válidos.')
+    return mes, ano, meses
+
+
+def _dados_resumo(grupo, historico, virtuais):
+    previsto_virtual = previsto_virtual_por_mes(virtuais)
+    for h in historico:
+        h['previsto'] += previsto_virtual.get((h['ano'], h['mes']), 0)
+        h['pendente'] = h['previsto'] - h['pago']
+    return {'grupo': grupo.pk, 'meses': historico}
+
+
+@api_view(['GET'])
+def grupo_resumo(request, pk):
+    """Previsto/pago/pendente por mês (?mes=&ano=&meses=, padrão: mês atual)."""
+    grupo = get_object_or_404(Grupo, pk=pk, usuario=request.user)
+    mes, ano, meses = _periodo_resumo(request)
+    ano_fim, mes_fim = deslocar_mes(ano, mes, meses - 1)
+    historico = resumo_mensal(grupo, ano_fim, mes_fim, quantidade=meses)
+    virtuais = contas_virtuais(grupo, *periodo_mes(mes, ano, meses))
+    return JsonResponse(_dados_resumo(grupo, historico, virtuais))
+
+
+def _dados_grafico(grupo, mes, ano, meses):
+    ano_inicio, mes_inicio = deslocar_mes(ano, mes, -(meses - 1))
+    historico = _dados_resumo(
+        grupo, resumo_mensal(grupo, ano, mes, quantidade=meses),
+        contas_virtuais(grupo, *periodo_mes(mes_inicio, ano_inicio, meses)),
+    )['meses']
+    atual = historico[-1]
+    return {
+        'grupo': grupo.pk,
+        'mes': mes,
+        'ano': ano,
+        'titulo': date_format(date(ano, mes, 1), 'F Y'),
+        'totais': {campo: float(atual[campo]) for campo in ('previsto', 'pago', 'pendente')},
+        'historico': series_historico(historico),
+    }
+
+
+@api_view(['GET'])
+def grupo_grafico(request, pk):
+    """
+    Totais do mês e séries do histórico para os gráficos da página do grupo.
+
+    ?mes=&ano= é o último mês da janela e ?meses= (padrão MESES_GRAFICO, até
+    MAX_MESES) o tamanho dela. O resultado fica no cache por grupo, janela e
+    versão do grupo (o carimbo `atualizado_em` gravado no banco, o mesmo em
+    todos os workers); o ETag acompanha a versão (304 enquanto nada mudar).
+    """
+    grupo = get_object_or_404(Grupo.objects.only('id', 'atualizado_em'), pk=pk, usuario=request.user)
+    mes, ano, meses = _periodo_resumo(request, meses_padrao=MESES_GRAFICO)
+    etag = quote_etag(f'{grupo.pk}-{versao_grupo(grupo)}-{ano}-{mes:02d}-{meses}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        dados, _ = dashboard_em_cache(
+            grupo, f'grafico:{ano}-{mes:02d}+{meses}', lambda: _dados_grafico(grupo, mes, ano, meses),
+        )
+        response = JsonResponse(dados)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# --- CONTAS A PAGAR ---
+
+def _contas_do_usuario(request):
+    return ContaPagar.objects.filter(grupo__usuario=request.user)
+
+
+def _salvar_conta(request, dados, instancia=None):
+    # O formulário só aceita grupos do usuário
+    form = ContaPagarForm(dados, instance=instancia, usuario=request.user)
+    if not form.is_valid():
+        return _erros_formulario(form)
+    conta = form.save()
+    return JsonResponse({campo: getattr(conta, campo) for campo in CAMPOS_CONTA},
+                        status=200 if instancia else 201)
+
+
+@api_view(['GET', 'POST'])
+def grupo_contas(request, pk):
+    """
+    GET: contas do grupo em ordem de vencimento, paginadas por cursor.
+
+    Filtros: ?de=AAAA-MM-DD&ate=AAAA-MM-DD (intervalo semiaberto), ?pago=1/0,
+    ?campos=valor,pago (id e data_vencimento sempre vêm), ?limite=, ?cursor=.
+    POST: cria uma conta no grupo.
+    """
+    grupo = get_object_or_404(Grupo.objects.only('id'), pk=pk, usuario=request.user)
+    if request.method == 'POST':
+        return _salvar_conta(request, {**_corpo(request), 'grupo': grupo.pk})
+
+    consulta, limite = _consulta_contas(request, grupo)
+    linhas = list(consulta[:limite + 1])
+    return _pagina(request, linhas, limite, _chave_conta)
+
+
+def _chave_conta(linha):
+    return linha['data_vencimento'], linha['id']
+
+
+def _consulta_contas(request, grupo):
+    """Queryset (values) da página pedida e o limite, a partir dos parâmetros da lista."""
+    limite = _limite(request)
+    consulta = ContaPagar.objects.filter(grupo=grupo).order_by('data_vencimento', 'id')
+    try:
+        if request.GET.get('de'):
+            consulta = consulta.filter(data_vencimento__gte=date.fromisoformat(request.GET['de']))
+        if request.GET.get('ate'):
+            consulta = consulta.filter(data_vencimento__lt=date.fromisoformat(request.GET['ate']))
+        if request.GET.get('cursor'):
+            vencimento, ultimo_id = decodificar_cursor(request.GET['cursor'])
+            vencimento, ultimo_id = date.fromisoformat(vencimento), int(ultimo_id)
+            consulta = filtrar_apos_cursor(consulta, vencimento, ultimo_id)
+    except ValueError:
+        raise ErroApi('Datas devem estar no formato AAAA-MM-DD e o cursor deve ser válido.')
+    if request.GET.get('pago') in ('1', '0'):
+        consulta = consulta.filter(pago=request.GET['pago'] == '1')
+
+    campos = _campos(request, CAMPOS_CONTA, ['id', 'data_vencimento'])
+    return consulta.values(*campos), limite
+
+
+@api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
+def conta_detalhe(request, pk):
+    if request.method == 'GET':
+        conta = get_object_or_404(_contas_do_usuario(request).values(*CAMPOS_CONTA, 'grupo__nome'), pk=pk)
+        return JsonResponse(conta)
+
+    conta = get_object_or_404(_contas_do_usuario(request).select_related('grupo'), pk=pk)
+    if request.method == 'DELETE':
+        conta.delete()
+        return HttpResponse(status=204)
+    dados = _corpo(request)
+    if request.method == 'PATCH':
+        dados = {**model_to_dict(conta, fields=ContaPagarForm.Meta.fields), **dados}
+    return _salvar_conta(request, dados, instancia=conta)
+
+
+@api_view(['GET'])
+def contas_busca(request):
+    """
+    Busca nas contas de todos os grupos do usuário, por relevância.
+
+    ?q= (descrição), ?valor_min=, ?valor_max=, ?pago=1/0, ?de=, ?ate=
+    (intervalo semiaberto de vencimento) e ?limite=. `mais` indica que há
+    outros resultados além do limite.
+    """
+    form = BuscaContasForm(request.GET)
+    if not form.is_valid():
+        return _erros_formulario(form)
+    limite = _limite(request)
+    filtros = dict(form.cleaned_data)
+    contas = buscar_contas(_contas_do_usuario(request), filtros.pop('q'), **filtros)
+    linhas = list(contas.values(*CAMPOS_CONTA, 'grupo__nome')[:limite + 1])
+    return JsonResponse({'resultados': linhas[:limite], 'mais': len(linhas) > limite})
+
+
+# --- VERSÕES ASSÍNCRONAS (perfil ASGI, settings.ASYNC_VIEWS) ---
+
+@api_view(['GET'])
+async def agrupo_resumo(request, pk):
+    """Como grupo_resumo; o histórico e as ocorrências recorrentes são lidos em paralelo."""
+    grupo = await aget_object_or_404(Grupo, pk=pk, usuario=await request.auser())
+    mes, ano, meses = _periodo_resumo(request)
+    ano_fim, mes_fim = deslocar_mes(ano, mes, meses - 1)
+    historico, virtuais = await asyncio.gather(
+        aresumo_mensal(grupo, ano_fim, mes_fim, quantidade=meses),
+        sync_to_async(contas_virtuais)(grupo, *periodo_mes(mes, ano, meses)),
+    )
+    return JsonResponse(_dados_resumo(grupo, historico, virtuais))
+
+
+@api_view(['GET', 'POST'])
+async def agrupo_contas(request, pk):
+    """Como grupo_contas; a leitura usa o ORM assíncrono e a criação reaproveita a view síncrona."""
+    if request.method == 'POST':
+        return await sync_to_async(grupo_contas)(request, pk)
+    grupo = await aget_object_or_404(Grupo.objects.only('id'), pk=pk, usuario=await request.auser())
+    consulta, limite = _consulta_contas(request, grupo)
+    linhas = [linha async for linha in consulta[:limite + 1]]
+    return _pagina(request, linhas, limite, _chave_conta)
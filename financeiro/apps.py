@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FinanceiroConfig(AppConfig):
     name = 'financeiro'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,75 @@
+"""
+Busca de contas pela descrição, com filtros de valor, situação e vencimento.
+
+No PostgreSQL a descrição é indexada de duas formas (migração 0009):
+
+- `ContaPagar.busca` (tsvector em português, mantido por trigger, índice GIN)
+  para a busca por palavras, com radicais ("alugueis" acha "Aluguel");
+- trigramas da descrição (pg_trgm, índice GIN) para achar palavras com erro
+  de digitação ("alugel").
+
+Os resultados vêm ordenados pela relevância das duas. No SQLite (ambiente de
+desenvolvimento) a busca cai para `icontains` em cada palavra do termo.
+"""
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from .models import ContaPagar
+
+CONFIGURACAO = 'portuguese'
+
+
+def buscar_contas(contas, termo='', valor_min=None, valor_max=None, pago=None, de=None, ate=None):
+    """
+    Filtra o queryset `contas` (já limitado aos grupos do usuário).
+
+    `de`/`ate` formam um intervalo semiaberto de vencimento. Com `termo`, a
+    ordem é por relevância; sem ele, pelo vencimento mais recente.
+    """
+    if valor_min is not None:
+        contas = contas.filter(valor__gte=valor_min)
+    if valor_max is not None:
+        contas = contas.filter(valor__lte=valor_max)
+    if pago is not None:
+        contas = contas.filter(pago=pago)
+    if de:
+        contas = contas.filter(data_vencimento__gte=de)
+    if ate:
+        contas = contas.filter(data_vencimento__lt=ate)
+
+    termo = termo.strip()
+    if not termo:
+        return contas.order_by('-data_vencimento', '-pk')
+    if connection.vendor != 'postgresql':
+        for palavra in termo.split():
+            contas = contas.filter(descricao__icontains=palavra)
+        return contas.order_by('-data_vencimento', '-pk')
+
+    consulta = SearchQuery(termo, config=CONFIGURACAO, search_type='websearch')
+    return contas.filter(
+        Q(busca=consulta) | Q(TrigramWordSimilar(F('descricao'), termo))
+    ).annotate(
+        relevancia=SearchRank(F('busca'), consulta) + TrigramWordSimilarity(termo, 'descricao'),
+    ).order_by('-relevancia', '-data_vencimento', '-pk')
+
+
+def indexar_busca(tamanho_lote=5000, todas=False):
+    """
+    Preenche `ContaPagar.busca` em lotes por faixa de id (só PostgreSQL).
+
+    Por padrão só as contas ainda sem vetor; `todas=True` recalcula todas
+    (por exemplo, depois de trocar a configuração de texto). Retorna a
+    quantidade de contas atualizadas.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    contas = ContaPagar.objects.all() if todas else ContaPagar.objects.filter(busca__isnull=True)
+    ids = contas.order_by('pk').values_list('pk', flat=True)
+    atualizadas = 0
+    inicio = ids.first()
+    while inicio is not None:
+        lote = contas.filter(pk__gte=inicio, pk__lt=inicio + tamanho_lote)
+        atualizadas += lote.update(busca=SearchVector('descricao', config=CONFIGURACAO))
+        inicio = ids.filter(pk__gte=inicio + tamanho_lote).first()
+    return atualizadas
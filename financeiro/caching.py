@@ -0,0 +1,204 @@
+import hashlib
+import os
+import tempfile
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count, Max
+
+CHAVE_DASHBOARD = 'financeiro:grupo:{}:v{}:dashboard:{}'
+CHAVE_CONTADOR = 'financeiro:dashboard:{}'
+
+
+def versao_grupo(grupo):
+    """
+    Versão atual dos dados do grupo, usada como parte das chaves de cache.
+
+    Vem do carimbo `Grupo.atualizado_em`, gravado no banco a cada alteração
+    (signals.grupo_alterado): uma alteração feita por outro worker, comando
+    ou processo muda a versão também aqui, mesmo com o cache em memória.
+    """
+    return f'{grupo.atualizado_em:%Y%m%d%H%M%S%f}'
+
+
+def _contar(evento):
+    chave = CHAVE_CONTADOR.format(evento)
+    if not cache.add(chave, 1, None):
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, 1, None)
+
+
+def estatisticas_cache():
+    """
+    Contadores de acertos/falhas do cache do dashboard (lidos pelo `perf_report`).
+
+    Ficam no próprio cache: com um backend compartilhado (file/db) somam todos
+    os workers; com o locmem, só o processo atual (`compartilhado` é False).
+    """
+    hits = cache.get(CHAVE_CONTADOR.format('hits'), 0)
+    misses = cache.get(CHAVE_CONTADOR.format('misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits, 'misses': misses, 'taxa_acerto': hits / total if total else 0.0,
+        'compartilhado': not isinstance(caches['default'], LocMemCache),
+    }
+
+
+def zerar_estatisticas_cache():
+    """Zera os contadores de acertos/falhas do cache do dashboard."""
+    cache.delete_many([CHAVE_CONTADOR.format('hits'), CHAVE_CONTADOR.format('misses')])
+
+
+def dashboard_em_cache(grupo, sufixo, calcular):
+    """
+    Retorna `(dados, acertou)` do cache do dashboard do grupo.
+
+    `sufixo` identifica a variação (ex.: mês/ano) e `calcular()` é chamado
+    apenas em caso de falha, com o resultado gravado na versão atual do grupo.
+    """
+    chave = CHAVE_DASHBOARD.format(grupo.pk, versao_grupo(grupo), sufixo)
+    dados = cache.get(chave)
+    if dados is not None:
+        _contar('hits')
+        return dados, True
+    _contar('misses')
+    dados = calcular()
+    cache.set(chave, dados, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dados, False
+
+
+async def adashboard_em_cache(grupo, sufixo, calcular):
+    """Versão assíncrona de `dashboard_em_cache`; `calcular()` retorna uma corrotina."""
+    chave = CHAVE_DASHBOARD.format(grupo.pk, versao_grupo(grupo), sufixo)
+    dados = await cache.aget(chave)
+    if dados is not None:
+        await sync_to_async(_contar)('hits')
+        return dados, True
+    await sync_to_async(_contar)('misses')
+    dados = await calcular()
+    await cache.aset(chave, dados, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dados, False
+
+
+# --- ETAG DAS PÁGINAS ---
+
+@lru_cache(maxsize=None)
+def versao_templates():
+    """Data de modificação mais recente dos templates do projeto (muda a cada deploy)."""
+    return max(
+        (caminho.stat().st_mtime_ns for opcoes in settings.TEMPLATES for pasta in opcoes['DIRS']
+         for caminho in Path(pasta).rglob('*.html')),
+        default=0,
+    )
+
+
+def etag_pagina(request, *partes):
+    """
+    ETag de uma página HTML do usuário a partir de `partes` (carimbo de alteração, período...).
+
+    Entram também o usuário e o cookie da sessão (o token CSRF dos formulários
+    muda no login), o dia (atraso das contas) e a versão dos templates.
+    """
+    chave = ':'.join(map(str, (
+        request.user.pk, request.COOKIES.get(settings.SESSION_COOKIE_NAME), date.today(), versao_templates(),
+        *partes,
+    )))
+    return hashlib.sha256(chave.encode()).hexdigest()[:32]
+
+
+# --- CACHE DE EXPORTAÇÕES (PDF / EXCEL) ---
+
+def assinatura_exportacao(grupo, formato, mes, ano, meses, contas):
+    """
+    Retorna `(etag, ultima_alteracao)` da exportação.
+
+    O ETag é um hash do conteúdo de entrada: grupo, período, formato e o
+    carimbo de alteração mais recente (mais a quantidade, para detectar
+    exclusões) das `contas` do período e das contas recorrentes do grupo.
+    """
+    carimbo = contas.order_by().aggregate(ultima=Max('atualizado_em'), quantidade=Count('id'))
+    regras = grupo.recorrentes.order_by().aggregate(ultima=Max('atualizado_em'), quantidade=Count('id'))
+    ultima_alteracao = max(filter(None, [carimbo['ultima'], regras['ultima']]), default=grupo.criado_em)
+    chave = (
+        f"{grupo.pk}:{grupo.nome}:{formato}:{ano}-{mes}+{meses}:{ultima_alteracao.isoformat()}:"
+        f"{carimbo['quantidade']}:{regras['quantidade']}"
+    )
+    return hashlib.sha256(chave.encode()).hexdigest()[:32], ultima_alteracao
+
+
+def _diretorio_exportacoes():
+    diretorio = Path(settings.EXPORT_CACHE_DIR)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    return diretorio
+
+
+def exportacao_em_cache(grupo_id, etag, extensao, gerar):
+    """
+    Abre (modo 'rb') o arquivo da exportação identificada por `etag`.
+
+    Se não existir em disco, `gerar(arquivo)` grava o conteúdo num arquivo
+    temporário que é renomeado atomicamente para o lugar definitivo.
+    """
+    diretorio = _diretorio_exportacoes()
+    caminho = diretorio / f"{grupo_id}-{etag}.{extensao}"
+    try:
+        arquivo = open(caminho, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        # Marca como usado recentemente (LRU); o arquivo já aberto continua
+        # legível mesmo se outro processo o remover agora.
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            pass
+        return arquivo
+
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as destino:
+            gerar(destino)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+    arquivo = open(caminho, 'rb')
+    _despejar_exportacoes(diretorio, caminho, os.fstat(arquivo.fileno()).st_size)
+    return arquivo
+
+
+def _despejar_exportacoes(diretorio, manter, tamanho_mantido):
+    """
+    Remove as exportações usadas há mais tempo até caber em EXPORT_CACHE_MAX_BYTES.
+
+    O arquivo `manter` (recém-gerado) nunca é removido.
+    """
+    entradas = []
+    for caminho in diretorio.iterdir():
+        if caminho.suffix == '.tmp' or caminho == manter:
+            continue
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, caminho))
+    total = sum(tamanho for _, tamanho, _ in entradas) + tamanho_mantido
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= settings.EXPORT_CACHE_MAX_BYTES:
+            break
+        caminho.unlink(missing_ok=True)
+        total -= tamanho
+
+
+def invalidar_exportacoes(grupo_id):
+    """Remove do disco as exportações do grupo."""
+    diretorio = Path(settings.EXPORT_CACHE_DIR)
+    if diretorio.is_dir():
+        for caminho in diretorio.glob(f"{grupo_id}-*"):
+            caminho.unlink(missing_ok=True)
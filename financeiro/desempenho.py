@@ -0,0 +1,336 @@
+"""
+Medição de desempenho por requisição.
+
+O MedicaoDesempenhoMiddleware mede, para cada view (pelo nome da rota), o
+tempo total, a quantidade e o tempo das consultas ao banco, o tempo de
+renderização dos templates e o tamanho da resposta. Os números vão para o
+cabeçalho `Server-Timing` (visível no DevTools do navegador) e para uma
+janela das últimas PERF_AMOSTRAS requisições por rota, mantida em memória.
+
+Cada processo grava de tempos em tempos essa janela em PERF_DIR; o comando
+`perf_report` junta os arquivos de todos os workers. Requisições acima de
+PERF_LENTO_MS são registradas no log com as consultas mais lentas.
+
+O mesmo middleware detecta N+1: se uma requisição repetir um SELECT com o
+mesmo formato (mesmo SQL, só os parâmetros mudam) CONSULTAS_REPETIDAS_LIMITE
+vezes, registra no log o trecho do código que disparou a consulta ou, com
+CONSULTAS_REPETIDAS_ACAO = 'erro', levanta ConsultasRepetidas.
+"""
+import heapq
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Limites (ms) das faixas do histograma de tempo total
+FAIXAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CAMPOS_AMOSTRA = ('total_ms', 'consultas', 'db_ms', 'template_ms', 'bytes')
+
+_medicao_atual = ContextVar('medicao_desempenho', default=None)
+
+# Listas de parâmetros de tamanho variável (IN (%s, %s, ...)) têm o mesmo formato
+_LISTA_PARAMETROS = re.compile(r'%s(?:\s*,\s*%s)+')
+
+_PASTA_PROJETO = str(settings.BASE_DIR)
+
+
+class ConsultasRepetidas(Exception):
+    """Uma requisição repetiu a mesma consulta (provável N+1)."""
+
+
+def formato_sql(sql):
+    return _LISTA_PARAMETROS.sub('%s, ...', sql)
+
+
+def pilha_do_projeto():
+    """Trecho da pilha atual só com arquivos do projeto (sem Django e sem este módulo)."""
+    quadros = [
+        quadro for quadro in traceback.extract_stack()[:-1]
+        if quadro.filename.startswith(_PASTA_PROJETO) and 'site-packages' not in quadro.filename
+        and quadro.filename != __file__
+    ]
+    return ''.join(traceback.format_list(quadros))
+
+
+class Medicao:
+    """Acumula os números de uma requisição."""
+
+    def __init__(self, top_consultas, limite_repeticoes=0, acao_repeticoes=''):
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.tempo_template = 0.0
+        self.top_consultas = top_consultas
+        self.mais_lentas = []  # heap (duração, ordem, sql) das consultas mais lentas
+        self.limite_repeticoes = limite_repeticoes if acao_repeticoes else 0
+        self.acao_repeticoes = acao_repeticoes
+        self.formatos = Counter()
+
+    def verificar_repeticao(self, sql):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return
+        formato = formato_sql(sql)
+        self.formatos[formato] += 1
+        if self.formatos[formato] != self.limite_repeticoes:
+            return
+        mensagem = (
+            f'Consulta repetida {self.limite_repeticoes} vezes na mesma requisição (provável N+1): '
+            f'{formato[:300]}\n{pilha_do_projeto()}'
+        )
+        if self.acao_repeticoes == 'erro':
+            raise ConsultasRepetidas(mensagem)
+        logger.warning(mensagem)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Chamado por `_despachar` para cada consulta da requisição."""
+        if self.limite_repeticoes:
+            self.verificar_repeticao(sql)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tempo_db += duracao
+            if self.top_consultas:
+                item = (duracao, self.consultas, sql)
+                if len(self.mais_lentas) < self.top_consultas:
+                    heapq.heappush(self.mais_lentas, item)
+                else:
+                    heapq.heappushpop(self.mais_lentas, item)
+
+
+def _despachar(execute, sql, params, many, context):
+    """Wrapper fixo de cada conexão: repassa a consulta à medição da requisição atual, se houver."""
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    return medicao(execute, sql, params, many, context)
+
+
+def instalar_medicao(connection, **kwargs):
+    """
+    Instala `_despachar` na conexão (uma vez por conexão).
+
+    As conexões são por thread: sob ASGI as consultas rodam nas threads do
+    sync_to_async, que herdam o contexto (e a medição) da requisição. Entra
+    na frente da lista para não ser removido pelo `execute_wrapper()` de outro
+    código, que tira sempre o último.
+    """
+    if _despachar not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _despachar)
+
+
+connection_created.connect(instalar_medicao)
+
+
+# --- TEMPLATES ---
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        medicao = _medicao_atual.get()
+        if medicao is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicao.tempo_template += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """Backend DjangoTemplates que soma o tempo de renderização na medição da requisição."""
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TemplateMedido(super().get_template(template_name).template, self)
+
+
+# --- JANELA DE AMOSTRAS POR ROTA ---
+
+_trava = threading.Lock()
+_amostras = defaultdict(lambda: deque(maxlen=settings.PERF_AMOSTRAS))
+_ultima_gravacao = time.monotonic()
+
+
+def registrar(rota, amostra):
+    """Adiciona a amostra (tupla na ordem de CAMPOS_AMOSTRA) à janela da rota."""
+    global _ultima_gravacao
+    with _trava:
+        _amostras[rota].append(amostra)
+        gravar = time.monotonic() - _ultima_gravacao >= settings.PERF_INTERVALO_GRAVACAO
+        if gravar:
+            _ultima_gravacao = time.monotonic()
+            instantaneo = {rota: list(janela) for rota, janela in _amostras.items()}
+    if gravar:
+        gravar_instantaneo(instantaneo)
+
+
+def gravar_instantaneo(instantaneo):
+    """Grava atomicamente a janela deste processo em PERF_DIR/<pid>.json."""
+    diretorio = Path(settings.PERF_DIR)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w') as destino:
+            json.dump({'pid': os.getpid(), 'gravado_em': time.time(), 'amostras': instantaneo}, destino)
+        os.replace(temporario, diretorio / f"{os.getpid()}.json")
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def ler_instantaneos(diretorio=None):
+    """
+    Junta as janelas gravadas por todos os processos: {rota: [amostras]}.
+
+    Arquivos não regravados há PERF_VALIDADE segundos são de processos que já
+    terminaram (o pid muda a cada reinício): ficam de fora e são removidos.
+    """
+    amostras = defaultdict(list)
+    diretorio = Path(diretorio or settings.PERF_DIR)
+    if not diretorio.is_dir():
+        return amostras
+    limite = time.time() - settings.PERF_VALIDADE
+    for caminho in sorted(diretorio.glob('*.json')):
+        try:
+            dados = json.loads(caminho.read_text())
+        except (OSError, ValueError):
+            continue
+        if dados['gravado_em'] < limite:
+            caminho.unlink(missing_ok=True)
+            continue
+        for rota, lista in dados['amostras'].items():
+            amostras[rota].extend(tuple(amostra) for amostra in lista)
+    return amostras
+
+
+def _percentil(ordenados, fracao):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+
+def resumir(amostras):
+    """Percentis do tempo total, médias dos demais campos e o histograma por faixa."""
+    totais = sorted(amostra[0] for amostra in amostras)
+    quantidade = len(amostras)
+    histograma = [0] * (len(FAIXAS_MS) + 1)
+    for total in totais:
+        histograma[next((i for i, limite in enumerate(FAIXAS_MS) if total <= limite), len(FAIXAS_MS))] += 1
+    medias = {
+        campo: sum(amostra[i] for amostra in amostras) / quantidade
+        for i, campo in enumerate(CAMPOS_AMOSTRA) if i
+    }
+    return {
+        'requisicoes': quantidade,
+        'p50_ms': _percentil(totais, 0.50),
+        'p95_ms': _percentil(totais, 0.95),
+        'p99_ms': _percentil(totais, 0.99),
+        'max_ms': totais[-1],
+        **{f'media_{campo}': valor for campo, valor in medias.items()},
+        'histograma': histograma,
+    }
+
+
+# --- MIDDLEWARE ---
+
+def _tamanho(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class MedicaoDesempenhoMiddleware:
+    """
+    Mede cada requisição; deve ser o primeiro item de MIDDLEWARE para cobrir os demais.
+
+    Funciona nos dois modos: sob ASGI continua assíncrono, sem obrigar o
+    Django a rodar a cadeia (e as views assíncronas) numa thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.PERF_ATIVO:
+            return self.get_response(request)
+        # Conexão aberta antes deste módulo ser importado
+        instalar_medicao(connection)
+        medicao = self._nova_medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        return self._concluir(request, response, medicao, inicio)
+
+    async def __acall__(self, request):
+        if not settings.PERF_ATIVO:
+            return await self.get_response(request)
+        medicao = self._nova_medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        return self._concluir(request, response, medicao, inicio)
+
+    @staticmethod
+    def _nova_medicao():
+        return Medicao(
+            settings.PERF_TOP_CONSULTAS, settings.CONSULTAS_REPETIDAS_LIMITE, settings.CONSULTAS_REPETIDAS_ACAO
+        )
+
+    def _concluir(self, request, response, medicao, inicio):
+        """Registra a amostra, adiciona o Server-Timing e loga a requisição se for lenta."""
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = medicao.tempo_db * 1000
+        template_ms = medicao.tempo_template * 1000
+
+        rota = request.resolver_match.view_name if request.resolver_match else 'sem-rota'
+        registrar(rota, (total_ms, medicao.consultas, db_ms, template_ms, _tamanho(response)))
+
+        tempos = (
+            f'total;dur={total_ms:.1f}, db;dur={db_ms:.1f};desc="{medicao.consultas} consultas", '
+            f'tpl;dur={template_ms:.1f}'
+        )
+        if response.has_header('Server-Timing'):
+            tempos = f"{response['Server-Timing']}, {tempos}"
+        response['Server-Timing'] = tempos
+
+        if total_ms >= settings.PERF_LENTO_MS:
+            consultas = ''.join(
+                f"\n  {duracao * 1000:8.1f} ms  {sql[:300]}"
+                for duracao, _, sql in sorted(medicao.mais_lentas, reverse=True)
+            )
+            logger.warning(
+                'Requisição lenta: %s %s (%s) %.1f ms, %d consultas em %.1f ms, template %.1f ms%s',
+                request.method, request.get_full_path(), rota, total_ms,
+                medicao.consultas, db_ms, template_ms, consultas,
+            )
+        return response
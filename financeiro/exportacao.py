@@ -0,0 +1,358 @@
+from functools import lru_cache
+from heapq import merge
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer
+from .recorrencias import contas_virtuais
+from .services import deslocar_mes, periodo_mes, resumo_mensal
+
+MESES_PT = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+# Quantidade máxima de meses em uma exportação
+MAX_MESES = 24
+
+# Linhas buscadas por vez ao percorrer as contas; no PostgreSQL o .iterator()
+# abre um cursor no servidor, então a memória não cresce com o período.
+LOTE_CURSOR = 2000
+
+
+def titulo_periodo(mes, ano, meses=1):
+    """Ex.: 'Março de 2025', 'Janeiro a Dezembro de 2025', 'Novembro de 2024 a Janeiro de 2025'."""
+    if meses == 1:
+        return f"{MESES_PT[mes]} de {ano}"
+    ano_fim, mes_fim = deslocar_mes(ano, mes, meses - 1)
+    if ano_fim == ano:
+        return f"{MESES_PT[mes]} a {MESES_PT[mes_fim]} de {ano}"
+    return f"{MESES_PT[mes]} de {ano} a {MESES_PT[mes_fim]} de {ano_fim}"
+
+
+def nome_arquivo(grupo, mes, ano, meses, extensao):
+    periodo = f"{MESES_PT[mes].lower()}_{ano}"
+    if meses > 1:
+        ano_fim, mes_fim = deslocar_mes(ano, mes, meses - 1)
+        periodo += f"_a_{MESES_PT[mes_fim].lower()}_{ano_fim}"
+    return f"resumo_{grupo.nome.lower().replace(' ', '_')}_{periodo}.{extensao}"
+
+
+def contas_do_periodo(grupo, mes, ano, meses=1):
+    """Contas do grupo com vencimento nos `meses` meses a partir de mes/ano."""
+    inicio, fim = periodo_mes(mes, ano, meses)
+    return grupo.contas.filter(
+        data_vencimento__gte=inicio,
+        data_vencimento__lt=fim
+    ).order_by('data_vencimento', 'pk')
+
+
+def linhas_do_periodo(grupo, mes, ano, meses=1, virtuais=None):
+    """
+    Tuplas (pago, vencimento, descrição, valor) do período, em ordem de vencimento.
+
+    As contas gravadas são lidas com `.iterator()` (cursor no servidor no
+    PostgreSQL) e intercaladas com as ocorrências ainda virtuais das contas
+    recorrentes.
+    """
+    if virtuais is None:
+        virtuais = contas_virtuais(grupo, *periodo_mes(mes, ano, meses))
+    gravadas = contas_do_periodo(grupo, mes, ano, meses).values_list(
+        'pago', 'data_vencimento', 'descricao', 'valor'
+    ).iterator(chunk_size=LOTE_CURSOR)
+    recorrentes = ((False, c.data_vencimento, c.descricao, c.valor) for c in virtuais)
+    return merge(gravadas, recorrentes, key=lambda linha: linha[1])
+
+
+def totais_do_periodo(grupo, mes, ano, meses=1, virtuais=None):
+    """Soma previsto/pago/pendente do período (ResumoMensal + ocorrências virtuais)."""
+    if virtuais is None:
+        virtuais = contas_virtuais(grupo, *periodo_mes(mes, ano, meses))
+    ano_fim, mes_fim = deslocar_mes(ano, mes, meses - 1)
+    historico = resumo_mensal(grupo, ano_fim, mes_fim, quantidade=meses)
+    previsto = sum(h['previsto'] for h in historico) + sum(c.valor for c in virtuais)
+    pago = sum(h['pago'] for h in historico)
+    return {'previsto': previsto, 'pago': pago, 'pendente': previsto - pago}
+
+
+# Troca separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
+
+def formatar_brl(valor):
+    """Formata um valor como moeda brasileira, ex.: 'R$ 1.234,56'."""
+    return f'R$ {valor:,.2f}'.translate(_SEPARADORES_BRL)
+
+
+# --- PDF ---
+
+@lru_cache(maxsize=None)
+def estilos_pdf():
+    """Estilos de parágrafo e de tabela do relatório (montados uma vez por processo)."""
+    styles = getSampleStyleSheet()
+    return {
+        'titulo': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#0d6efd'),
+            spaceAfter=6
+        ),
+        'subtitulo': ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.grey,
+            spaceAfter=20
+        ),
+        'secao': styles['Heading2'],
+        'normal': styles['Normal'],
+        'resumo': TableStyle([
+            ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#0d6efd')),
+            ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#198754')),
+            ('BACKGROUND', (2, 0), (2, 0), colors.HexColor('#ffc107')),
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.white),
+            ('TEXTCOLOR', (2, 0), (2, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, 1), 12),
+            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]),
+        'contas': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (0, 1), (1, -1), 'CENTER'),
+            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+            ('TOPPADDING', (0, 1), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ]),
+    }
+
+
+CABECALHO_CONTAS = ['Status', 'Vencimento', 'Descrição', 'Valor']
+LARGURAS_CONTAS = [2.5*cm, 3*cm, 8*cm, 3*cm]
+# Padding superior + inferior padrão de um Frame do ReportLab
+PADDING_FRAME = 12
+
+
+@lru_cache(maxsize=None)
+def _alturas_tabela_contas():
+    """Alturas (cabeçalho, linha) da tabela de contas, medidas uma vez por processo."""
+    amostra = LongTable([CABECALHO_CONTAS, ['○ Pendente', '01/01/2025', 'x', 'R$ 0,00']],
+                        colWidths=LARGURAS_CONTAS)
+    amostra.setStyle(estilos_pdf()['contas'])
+    amostra.wrap(A4[0], A4[1])
+    return amostra._rowHeights[0], amostra._rowHeights[1]
+
+
+def _altura_ocupada(flowables, largura, altura):
+    """Altura (com folga) ocupada pelos flowables no topo da primeira página."""
+    total = 0
+    for flowable in flowables:
+        total += flowable.wrap(largura, altura)[1]
+        total += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    return total
+
+
+def _linhas_por_tabela(linhas, primeira, demais):
+    """Agrupa as linhas em blocos: o primeiro com `primeira` linhas e os seguintes com `demais`."""
+    bloco = []
+    limite = primeira
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) == limite:
+            yield bloco
+            bloco = []
+            limite = demais
+    if bloco:
+        yield bloco
+
+
+def montar_pdf(titulo, subtitulo, totais, linhas, arquivo,
+               sem_contas="Nenhuma conta cadastrada para este mês."):
+    """
+    Gera o PDF do resumo em `arquivo`.
+
+    `linhas` é um iterável de tuplas (pago, data_vencimento, descricao, valor);
+    sem nenhuma, o PDF traz a mensagem `sem_contas`.
+    Uma única tabela grande seria re-fatiada a cada quebra de página (custo
+    quadrático), então as contas são divididas em uma LongTable por página,
+    cada uma com o cabeçalho repetido.
+    """
+    estilos = estilos_pdf()
+    doc = SimpleDocTemplate(arquivo, pagesize=A4,
+                            leftMargin=2*cm, rightMargin=2*cm,
+                            topMargin=2*cm, bottomMargin=2*cm)
+
+    elements = [
+        Paragraph(titulo, estilos['titulo']),
+        Paragraph(subtitulo, estilos['subtitulo']),
+    ]
+
+    # Resumo financeiro
+    resumo_table = Table([
+        ['Total Previsto', 'Total Pago', 'Pendente'],
+        [formatar_brl(totais['previsto']), formatar_brl(totais['pago']), formatar_brl(totais['pendente'])],
+    ], colWidths=[5.5*cm, 5.5*cm, 5.5*cm])
+    resumo_table.setStyle(estilos['resumo'])
+    elements.append(resumo_table)
+    elements.append(Spacer(1, 20))
+
+    # Tabela de contas
+    secao = [Paragraph("Detalhamento das Contas", estilos['secao']), Spacer(1, 10)]
+    altura_pagina = doc.height - PADDING_FRAME
+    altura_cabecalho, altura_linha = _alturas_tabela_contas()
+    ocupada = _altura_ocupada(elements + secao, doc.width, altura_pagina)
+    primeira = max(int((altura_pagina - ocupada - altura_cabecalho) // altura_linha) - 1, 1)
+    demais = int((altura_pagina - altura_cabecalho) // altura_linha) - 1
+
+    tabelas = []
+    for bloco in _linhas_por_tabela(linhas, primeira, demais):
+        table_data = [CABECALHO_CONTAS]
+        table_data.extend(
+            ['✓ Pago' if pago else '○ Pendente', vencimento.strftime('%d/%m/%Y'), descricao, formatar_brl(valor)]
+            for pago, vencimento, descricao, valor in bloco
+        )
+        contas_table = LongTable(table_data, colWidths=LARGURAS_CONTAS, repeatRows=1)
+        contas_table.setStyle(estilos['contas'])
+        tabelas.append(contas_table)
+
+    if tabelas:
+        elements.extend(secao)
+        elements.extend(tabelas)
+    else:
+        elements.append(Paragraph(sem_contas, estilos['normal']))
+
+    doc.build(elements)
+
+
+def escrever_pdf(grupo, mes, ano, meses, arquivo):
+    """Grava em `arquivo` o PDF do resumo do grupo no período."""
+    virtuais = contas_virtuais(grupo, *periodo_mes(mes, ano, meses))
+    montar_pdf(
+        grupo.nome,
+        f"Resumo de {titulo_periodo(mes, ano, meses)}",
+        totais_do_periodo(grupo, mes, ano, meses, virtuais),
+        linhas_do_periodo(grupo, mes, ano, meses, virtuais),
+        arquivo,
+        sem_contas="Nenhuma conta cadastrada para este mês." if meses == 1
+        else f"Nenhuma conta cadastrada no período ({titulo_periodo(mes, ano, meses)}).",
+    )
+
+
+# --- EXCEL ---
+
+# Estilos compartilhados por todas as células (criados uma vez por processo)
+FORMATO_BRL = 'R$ #,##0.00'
+BORDA_FINA = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+ALINHA_CENTRO = Alignment(horizontal='center')
+ALINHA_ESQUERDA = Alignment(horizontal='left')
+ALINHA_DIREITA = Alignment(horizontal='right')
+FONTE_TITULO = Font(bold=True, size=16, color="0d6efd")
+FONTE_CABECALHO = Font(bold=True, color="FFFFFF", size=12)
+FONTE_RESUMO = Font(bold=True, size=12)
+FONTE_RESUMO_ROTULO = Font(bold=True, color="FFFFFF")
+FONTE_RESUMO_ROTULO_ESCURO = Font(bold=True, color="000000")
+FUNDO_PRIMARIO = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
+FUNDO_SUCESSO = PatternFill(start_color="198754", end_color="198754", fill_type="solid")
+FUNDO_ALERTA = PatternFill(start_color="ffc107", end_color="ffc107", fill_type="solid")
+FUNDO_TABELA = PatternFill(start_color="343a40", end_color="343a40", fill_type="solid")
+
+
+def _celula(ws, valor, font=None, fill=None, alignment=None, border=None, number_format=None):
+    celula = WriteOnlyCell(ws, value=valor)
+    if font is not None:
+        celula.font = font
+    if fill is not None:
+        celula.fill = fill
+    if alignment is not None:
+        celula.alignment = alignment
+    if border is not None:
+        celula.border = border
+    if number_format is not None:
+        celula.number_format = number_format
+    return celula
+
+
+def escrever_excel(grupo, mes, ano, meses, arquivo):
+    """
+    Grava o resumo do período em `arquivo` (caminho ou arquivo binário).
+
+    Usa o modo write-only do openpyxl e percorre as contas com `.iterator()`,
+    então o consumo de memória não cresce com a quantidade de contas.
+    """
+    virtuais = contas_virtuais(grupo, *periodo_mes(mes, ano, meses))
+    totais = totais_do_periodo(grupo, mes, ano, meses, virtuais)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=f"{MESES_PT[mes]} {ano}" + (f" +{meses - 1}" if meses > 1 else ""))
+
+    # Ajustar largura das colunas (precisa vir antes das linhas no modo write-only)
+    ws.column_dimensions['A'].width = 15
+    ws.column_dimensions['B'].width = 15
+    ws.column_dimensions['C'].width = 40
+    ws.column_dimensions['D'].width = 18
+
+    # Título
+    ws.merged_cells.add('A1:D1')
+    ws.append([_celula(ws, f"{grupo.nome} - Resumo de {titulo_periodo(mes, ano, meses)}",
+                       font=FONTE_TITULO, alignment=ALINHA_CENTRO)])
+    ws.append([])
+
+    # Resumo
+    ws.append([
+        _celula(ws, rotulo, font=fonte, fill=fundo, alignment=ALINHA_CENTRO, border=BORDA_FINA)
+        for rotulo, fundo, fonte in [
+            ("Total Previsto", FUNDO_PRIMARIO, FONTE_RESUMO_ROTULO),
+            ("Total Pago", FUNDO_SUCESSO, FONTE_RESUMO_ROTULO),
+            ("Pendente", FUNDO_ALERTA, FONTE_RESUMO_ROTULO_ESCURO),
+        ]
+    ])
+    ws.append([
+        _celula(ws, totais[chave], font=FONTE_RESUMO, alignment=ALINHA_CENTRO,
+                border=BORDA_FINA, number_format=FORMATO_BRL)
+        for chave in ('previsto', 'pago', 'pendente')
+    ])
+    ws.append([])
+
+    # Tabela de contas
+    ws.append([
+        _celula(ws, titulo, font=FONTE_CABECALHO, fill=FUNDO_TABELA,
+                alignment=ALINHA_CENTRO, border=BORDA_FINA)
+        for titulo in ("Status", "Vencimento", "Descrição", "Valor")
+    ])
+
+    for pago, vencimento, descricao, valor in linhas_do_periodo(grupo, mes, ano, meses, virtuais):
+        ws.append([
+            _celula(ws, "✓ Pago" if pago else "○ Pendente", alignment=ALINHA_CENTRO, border=BORDA_FINA),
+            _celula(ws, vencimento.strftime('%d/%m/%Y'), alignment=ALINHA_CENTRO, border=BORDA_FINA),
+            _celula(ws, descricao, alignment=ALINHA_ESQUERDA, border=BORDA_FINA),
+            _celula(ws, valor, alignment=ALINHA_DIREITA, border=BORDA_FINA, number_format=FORMATO_BRL),
+        ])
+
+    wb.save(arquivo)
+
+
+# Formatos de exportação: extensão -> (função que grava o arquivo, content type)
+FORMATOS = {
+    'pdf': (escrever_pdf, 'application/pdf'),
+    'xlsx': (escrever_excel, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
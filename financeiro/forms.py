@@ -1,5 +1,7 @@
+import copy
 from django import forms
-from .models import Grupo, ContaPagar
+from django.urls import reverse
+from .models import Grupo, ContaPagar, ContaRecorrente
 
 class GrupoForm(forms.ModelForm):
     class Meta:
@@ -10,12 +12,44 @@ class GrupoForm(forms.ModelForm):
             'descricao': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Opcional'}),
         }
 
+class SelectGrupo(forms.Select):
+    """
+    Select dos grupos do usuário, com uma única consulta ao renderizar.
+
+    Acima de `limite` grupos, lista só o grupo selecionado e marca o campo com
+    `data-autocompletar` (URL da busca por nome); o template troca as opções
+    conforme o usuário digita.
+    """
+    limite = 50
+
+    def get_context(self, name, value, attrs):
+        consulta = self.choices.queryset
+        grupos = list(consulta[:self.limite + 1])
+        if len(grupos) > self.limite:
+            selecionados = [valor for valor in self.format_value(value) if valor.isdigit()]
+            grupos = list(consulta.filter(pk__in=selecionados))
+            attrs = {**(attrs or {}), 'data-autocompletar': reverse('api-grupos-autocompletar')}
+        vazio = self.choices.field.empty_label
+        widget = copy.copy(self)
+        widget.choices = ([('', vazio)] if vazio is not None else []) + [(grupo.pk, grupo.nome) for grupo in grupos]
+        return super(SelectGrupo, widget).get_context(name, value, attrs)
+
+
 class ContaPagarForm(forms.ModelForm):
+    """Conta a pagar; `usuario` limita o campo grupo aos grupos dele (sem usuário, nenhum é válido)."""
+
+    def __init__(self, *args, usuario=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        grupos = Grupo.objects.none()
+        if usuario is not None:
+            grupos = Grupo.objects.filter(usuario=usuario).only('id', 'nome').order_by('nome')
+        self.fields['grupo'].queryset = grupos
+
     class Meta:
         model = ContaPagar
         fields = ['grupo', 'descricao', 'valor', 'data_vencimento', 'pago', 'data_pagamento']
         widgets = {
-            'grupo': forms.Select(attrs={'class': 'form-select'}),
+            'grupo': SelectGrupo(attrs={'class': 'form-select'}),
             'descricao': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: Aluguel'}),
             'valor': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'data_vencimento': forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'}),
@@ -24,6 +58,81 @@ class ContaPagarForm(forms.ModelForm):
         }
 
 
+class ContaRecorrenteForm(forms.ModelForm):
+    class Meta:
+        model = ContaRecorrente
+        fields = ['descricao', 'valor', 'frequencia', 'dia', 'data_inicio', 'data_fim']
+        widgets = {
+            'descricao': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: Aluguel'}),
+            'valor': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'frequencia': forms.Select(attrs={'class': 'form-select'}),
+            'dia': forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'max': 31}),
+            'data_inicio': forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'}),
+            'data_fim': forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'}),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        inicio = cleaned_data.get('data_inicio')
+        fim = cleaned_data.get('data_fim')
+        if inicio and fim and fim < inicio:
+            self.add_error('data_fim', 'A data final deve ser posterior à data de início.')
+        return cleaned_data
+
+
+class BuscaContasForm(forms.Form):
+    """Termo e filtros da busca de contas (página e API)."""
+    q = forms.CharField(
+        required=False, max_length=200, label='Descrição',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: aluguel', 'autocomplete': 'off'}),
+    )
+    valor_min = forms.DecimalField(
+        required=False, min_value=0, decimal_places=2, label='Valor mínimo',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+    )
+    valor_max = forms.DecimalField(
+        required=False, min_value=0, decimal_places=2, label='Valor máximo',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+    )
+    pago = forms.TypedChoiceField(
+        required=False, label='Situação', choices=[('', 'Todas'), ('1', 'Pagas'), ('0', 'Pendentes')],
+        coerce=lambda valor: valor == '1', empty_value=None,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    de = forms.DateField(
+        required=False, label='Vencimento a partir de',
+        widget=forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    ate = forms.DateField(
+        required=False, label='Vencimento antes de',
+        widget=forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        valor_min, valor_max = cleaned_data.get('valor_min'), cleaned_data.get('valor_max')
+        if valor_min is not None and valor_max is not None and valor_max < valor_min:
+            self.add_error('valor_max', 'O valor máximo deve ser maior que o mínimo.')
+        de, ate = cleaned_data.get('de'), cleaned_data.get('ate')
+        if de and ate and ate <= de:
+            self.add_error('ate', 'A data final deve ser posterior à inicial.')
+        return cleaned_data
+
+
+class ImportarContasForm(forms.Form):
+    arquivo = forms.FileField(
+        label='Arquivo',
+        help_text='CSV com as colunas descricao, valor, data_vencimento, pago e data_pagamento, ou extrato OFX.',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.ofx'}),
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.ofx')):
+            raise forms.ValidationError('Envie um arquivo .csv ou .ofx.')
+        return arquivo
+
+
 # --- AUTENTICAÇÃO ---
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth.models import User
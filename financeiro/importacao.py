@@ -0,0 +1,168 @@
+import csv
+import re
+from dataclasses import dataclass, field
+from time import perf_counter
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .forms import ContaPagarForm
+from .models import ContaPagar
+from .services import recalcular_resumos
+from .signals import grupo_alterado
+
+# Campos validados com as mesmas regras do ContaPagarForm (o grupo é fixo na importação)
+CAMPOS_IMPORTACAO = ['descricao', 'valor', 'data_vencimento', 'pago', 'data_pagamento']
+VALORES_VERDADEIROS = {'1', 's', 'sim', 'true', 'verdadeiro', 'x', 'pago', 'yes'}
+
+
+@dataclass
+class ResultadoImportacao:
+    inseridas: int = 0
+    ignoradas: int = 0
+    erros: list = field(default_factory=list)  # [(número da linha, mensagem)]
+    segundos: float = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.inseridas / self.segundos if self.segundos else 0.0
+
+
+# --- LEITORES ---
+
+def _texto(arquivo_binario):
+    """Decodifica linha a linha em UTF-8, caindo para cp1252 (comum em arquivos de bancos)."""
+    for linha in arquivo_binario:
+        try:
+            yield linha.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            yield linha.decode('cp1252')
+
+
+def ler_csv(arquivo_binario):
+    """
+    Lê um CSV com cabeçalho (separador ';' ou ',') linha a linha.
+
+    Gera tuplas (número da linha, dict) com as colunas de CAMPOS_IMPORTACAO.
+    """
+    linhas = _texto(arquivo_binario)
+    cabecalho = next(linhas, '')
+    delimitador = ';' if cabecalho.count(';') >= cabecalho.count(',') else ','
+    colunas = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=delimitador), [])]
+    for numero, valores in enumerate(csv.reader(linhas, delimiter=delimitador), start=2):
+        if not any(v.strip() for v in valores):
+            continue
+        yield numero, dict(zip(colunas, (v.strip() for v in valores)))
+
+
+_TAG_OFX = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def ler_ofx(arquivo_binario):
+    """
+    Lê as transações (<STMTTRN>) de um extrato OFX (SGML 1.x ou XML 2.x) linha a linha.
+
+    Só débitos viram contas: são importados como pagos na data do lançamento.
+    Créditos geram None (ignorados).
+    """
+    transacao = None
+    for numero, linha in enumerate(_texto(arquivo_binario), start=1):
+        for fechamento, tag, valor in _TAG_OFX.findall(linha):
+            if tag == 'STMTTRN':
+                if not fechamento:
+                    transacao = {'linha': numero}
+                elif transacao is not None:
+                    yield transacao.pop('linha'), _transacao_para_conta(transacao)
+                    transacao = None
+            elif transacao is not None and not fechamento:
+                transacao[tag] = valor.strip()
+
+
+def _transacao_para_conta(transacao):
+    valor = transacao.get('TRNAMT', '').replace(',', '.')
+    if not valor.startswith('-'):
+        return None
+    data = transacao.get('DTPOSTED', '')[:8]
+    if len(data) == 8:
+        data = f"{data[:4]}-{data[4:6]}-{data[6:]}"
+    return {
+        'descricao': transacao.get('MEMO') or transacao.get('NAME', ''),
+        'valor': valor[1:],
+        'data_vencimento': data,
+        'pago': 'sim',
+        'data_pagamento': data,
+    }
+
+
+LEITORES = {'csv': ler_csv, 'ofx': ler_ofx}
+
+
+# --- VALIDAÇÃO E GRAVAÇÃO ---
+
+def _normalizar(dados):
+    dados = dict(dados)
+    valor = dados.get('valor', '').replace('R$', '').strip()
+    if ',' in valor:
+        # Formato brasileiro: 1.234,56
+        valor = valor.replace('.', '').replace(',', '.')
+    dados['valor'] = valor
+    dados['pago'] = dados.get('pago', '').strip().lower() in VALORES_VERDADEIROS
+    return dados
+
+
+def validar_linha(grupo, dados):
+    """
+    Valida uma linha com os campos do ContaPagarForm, sem consultar o banco.
+
+    Retorna uma ContaPagar (não salva) ou levanta ValidationError.
+    """
+    dados = _normalizar(dados)
+    valores = {}
+    erros = []
+    for nome in CAMPOS_IMPORTACAO:
+        campo = ContaPagarForm.base_fields[nome]
+        try:
+            valores[nome] = campo.clean(dados.get(nome, ''))
+        except ValidationError as exc:
+            erros.append(f"{nome}: {' '.join(exc.messages)}")
+    if erros:
+        raise ValidationError(erros)
+    if not valores['pago']:
+        valores['data_pagamento'] = None
+    return ContaPagar(grupo=grupo, **valores)
+
+
+def importar_contas(grupo, linhas, tamanho_lote=1000):
+    """
+    Insere as contas de `linhas` (tuplas (número, dict) de um leitor) no grupo.
+
+    Linhas válidas são gravadas com bulk_create em lotes de `tamanho_lote`
+    dentro de uma transação; linhas inválidas são relatadas em `erros`. Os
+    resumos mensais afetados são recalculados uma vez ao final.
+    """
+    resultado = ResultadoImportacao()
+    inicio = perf_counter()
+    meses = set()
+    lote = []
+    with transaction.atomic():
+        for numero, dados in linhas:
+            if dados is None:
+                resultado.ignoradas += 1
+                continue
+            try:
+                conta = validar_linha(grupo, dados)
+            except ValidationError as exc:
+                resultado.erros.append((numero, '; '.join(exc.messages)))
+                continue
+            meses.add((conta.data_vencimento.year, conta.data_vencimento.month))
+            lote.append(conta)
+            if len(lote) >= tamanho_lote:
+                ContaPagar.objects.bulk_create(lote)
+                resultado.inseridas += len(lote)
+                lote = []
+        if lote:
+            ContaPagar.objects.bulk_create(lote)
+            resultado.inseridas += len(lote)
+        if meses:
+            recalcular_resumos(grupo_ids=[grupo.pk], meses=meses)
+            grupo_alterado(grupo.pk)
+    resultado.segundos = perf_counter() - inicio
+    return resultado
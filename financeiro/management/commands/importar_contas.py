@@ -0,0 +1,41 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from financeiro.importacao import LEITORES, importar_contas
+from financeiro.models import Grupo
+
+
+class Command(BaseCommand):
+    help = 'Importa contas a pagar de um arquivo CSV ou OFX para um grupo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo .csv ou .ofx')
+        parser.add_argument('--grupo', type=int, required=True, help='ID do grupo de destino')
+        parser.add_argument('--formato', choices=sorted(LEITORES),
+                            help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Tamanho do lote do bulk_create (padrão: 1000)')
+        parser.add_argument('--max-erros', type=int, default=20,
+                            help='Quantidade máxima de erros listados (padrão: 20)')
+
+    def handle(self, *args, **options):
+        caminho = Path(options['arquivo'])
+        formato = options['formato'] or caminho.suffix.lstrip('.').lower()
+        if formato not in LEITORES:
+            raise CommandError(f'Formato não suportado: {formato!r}. Use --formato csv ou ofx.')
+        try:
+            grupo = Grupo.objects.get(pk=options['grupo'])
+        except Grupo.DoesNotExist:
+            raise CommandError(f"Grupo {options['grupo']} não encontrado.")
+
+        with open(caminho, 'rb') as arquivo:
+            resultado = importar_contas(grupo, LEITORES[formato](arquivo), tamanho_lote=options['lote'])
+
+        for numero, mensagem in resultado.erros[:options['max_erros']]:
+            self.stderr.write(f'Linha {numero}: {mensagem}')
+        if len(resultado.erros) > options['max_erros']:
+            self.stderr.write(f"... e mais {len(resultado.erros) - options['max_erros']} erros.")
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.inseridas} contas importadas em {resultado.segundos:.2f}s '
+            f'({resultado.linhas_por_segundo:,.0f} linhas/s), {len(resultado.erros)} com erro, '
+            f'{resultado.ignoradas} ignoradas.'
+        ))
@@ -0,0 +1,24 @@
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.db import connection
+from financeiro.busca import indexar_busca
+
+
+class Command(BaseCommand):
+    help = 'Preenche o índice de busca (ContaPagar.busca) das contas, em lotes. Só PostgreSQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Contas por UPDATE, por faixa de id (padrão: 5000).')
+        parser.add_argument('--todas', action='store_true',
+                            help='Recalcula todas as contas, não só as ainda sem índice.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(f'Banco {connection.vendor}: a busca usa icontains, nada a indexar.')
+            return
+        inicio = perf_counter()
+        total = indexar_busca(tamanho_lote=options['lote'], todas=options['todas'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} contas indexadas em {perf_counter() - inicio:.2f}s.'
+        ))
@@ -0,0 +1,32 @@
+from datetime import date
+from time import perf_counter
+from django.core.management.base import BaseCommand, CommandError
+from financeiro.models import ContaRecorrente
+from financeiro.recorrencias import materializar_ate
+
+
+class Command(BaseCommand):
+    help = 'Grava como contas a pagar as ocorrências das contas recorrentes até uma data (idempotente).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ate', default=None,
+                            help='Última data a materializar (AAAA-MM-DD). Padrão: hoje.')
+        parser.add_argument('--grupo', type=int, action='append', dest='grupos',
+                            help='ID do grupo (pode repetir). Padrão: todos.')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Tamanho do lote do bulk_create (padrão: 1000).')
+
+    def handle(self, *args, **options):
+        try:
+            ate = date.fromisoformat(options['ate']) if options['ate'] else date.today()
+        except ValueError:
+            raise CommandError('Use --ate no formato AAAA-MM-DD.')
+        recorrentes = ContaRecorrente.objects.all()
+        if options['grupos']:
+            recorrentes = recorrentes.filter(grupo_id__in=options['grupos'])
+
+        inicio = perf_counter()
+        criadas = materializar_ate(recorrentes, ate, tamanho_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{criadas} contas criadas até {ate:%d/%m/%Y} em {perf_counter() - inicio:.2f}s.'
+        ))
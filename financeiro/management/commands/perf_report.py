@@ -0,0 +1,64 @@
+import json
+import shutil
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from financeiro.caching import estatisticas_cache, zerar_estatisticas_cache
+from financeiro.desempenho import FAIXAS_MS, ler_instantaneos, resumir
+
+ORDENACOES = ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'requisicoes', 'media_consultas', 'media_db_ms')
+
+
+class Command(BaseCommand):
+    help = ('Mostra o tempo por rota (p50/p95/p99, consultas, banco, templates e tamanho) medido pelos workers '
+            'e os acertos/falhas do cache do dashboard.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ordenar', choices=ORDENACOES, default='p99_ms',
+                            help='Coluna usada para ordenar as rotas (padrão: p99_ms).')
+        parser.add_argument('--histograma', action='store_true',
+                            help='Mostra também a distribuição do tempo total por faixa.')
+        parser.add_argument('--json', action='store_true', help='Saída em JSON.')
+        parser.add_argument('--limpar', action='store_true',
+                            help='Remove as medições gravadas em PERF_DIR e zera os contadores do cache '
+                                 'depois do relatório.')
+
+    def handle(self, *args, **options):
+        resumos = {rota: resumir(amostras) for rota, amostras in ler_instantaneos().items()}
+        ordenadas = sorted(resumos.items(), key=lambda item: item[1][options['ordenar']], reverse=True)
+        estatisticas = estatisticas_cache()
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'faixas_ms': FAIXAS_MS, 'rotas': dict(ordenadas), 'cache_dashboard': estatisticas},
+                indent=2, ensure_ascii=False,
+            ))
+        elif not ordenadas:
+            self.stdout.write(f'Nenhuma medição em {settings.PERF_DIR}.')
+        else:
+            self.stdout.write(
+                f"{'rota':<32} {'req':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'consultas':>9} "
+                f"{'banco':>8} {'template':>8} {'KB':>8}"
+            )
+            for rota, r in ordenadas:
+                self.stdout.write(
+                    f"{rota[:32]:<32} {r['requisicoes']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                    f"{r['p99_ms']:>8.1f} {r['media_consultas']:>9.1f} {r['media_db_ms']:>8.1f} "
+                    f"{r['media_template_ms']:>8.1f} {r['media_bytes'] / 1024:>8.1f}"
+                )
+                if options['histograma']:
+                    faixas = [f'≤{limite}' for limite in FAIXAS_MS] + [f'>{FAIXAS_MS[-1]}']
+                    self.stdout.write('    ' + '  '.join(
+                        f'{faixa}ms:{quantidade}'
+                        for faixa, quantidade in zip(faixas, r['histograma']) if quantidade
+                    ))
+            self.stdout.write('Tempos em ms (média para consultas, banco, template e KB).')
+        if not options['json']:
+            self.stdout.write(
+                f"Cache do dashboard: {estatisticas['hits']} acertos, {estatisticas['misses']} falhas "
+                f"({estatisticas['taxa_acerto']:.0%})"
+                + ('' if estatisticas['compartilhado'] else ' (cache em memória: só deste processo)')
+            )
+
+        if options['limpar']:
+            shutil.rmtree(settings.PERF_DIR, ignore_errors=True)
+            zerar_estatisticas_cache()
@@ -0,0 +1,20 @@
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from financeiro.services import recalcular_resumos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a tabela ResumoMensal a partir das contas a pagar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grupo', type=int, action='append', dest='grupos',
+                            help='ID do grupo a recalcular (pode repetir). Padrão: todos.')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Tamanho do lote do bulk_create (padrão: 1000).')
+
+    def handle(self, *args, **options):
+        inicio = perf_counter()
+        total = recalcular_resumos(grupo_ids=options['grupos'], batch_size=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} resumos mensais gravados em {perf_counter() - inicio:.2f}s.'
+        ))
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from financeiro.tarefas import executar_worker, liberar_tarefas_travadas, remover_tarefas_antigas
+
+
+def _processo_worker(parar, intervalo, uma_vez):
+    """Ponto de entrada de cada processo do pool."""
+    import django
+    django.setup()
+    signal.signal(signal.SIGINT, lambda *args: parar.set())
+    signal.signal(signal.SIGTERM, lambda *args: parar.set())
+    executar_worker(intervalo=intervalo, uma_vez=uma_vez, deve_parar=parar.is_set)
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de exportações PDF/Excel assíncronas (TarefaExportacao).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=2,
+                            help='Quantidade de processos worker (padrão: 2; 1 roda no próprio processo).')
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos entre consultas quando a fila está vazia (padrão: 1).')
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Processa as tarefas pendentes e encerra.')
+        parser.add_argument('--tempo-limite', type=int, default=600,
+                            help='Devolve à fila tarefas em processamento há mais que estes segundos (padrão: 600).')
+        parser.add_argument('--expirar-horas', type=int, default=24,
+                            help='Remove tarefas finalizadas (e seus arquivos) após estas horas (padrão: 24).')
+
+    def handle(self, *args, **options):
+        liberadas = liberar_tarefas_travadas(options['tempo_limite'])
+        removidas = remover_tarefas_antigas(options['expirar_horas'])
+        if liberadas or removidas:
+            self.stdout.write(f'{liberadas} tarefas devolvidas à fila, {removidas} tarefas antigas removidas.')
+
+        processos = options['processos']
+        if processos <= 1:
+            processadas = executar_worker(intervalo=options['intervalo'], uma_vez=options['uma_vez'])
+            self.stdout.write(self.style.SUCCESS(f'{processadas} exportações processadas.'))
+            return
+
+        # Conexões abertas não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+        parar = multiprocessing.Event()
+        pool = [
+            multiprocessing.Process(target=_processo_worker,
+                                    args=(parar, options['intervalo'], options['uma_vez']))
+            for _ in range(processos)
+        ]
+        for processo in pool:
+            processo.start()
+        signal.signal(signal.SIGTERM, lambda *args: parar.set())
+        self.stdout.write(f'{processos} workers de exportação iniciados.')
+        try:
+            for processo in pool:
+                processo.join()
+        except KeyboardInterrupt:
+            parar.set()
+            for processo in pool:
+                processo.join()
+        self.stdout.write(self.style.SUCCESS('Workers de exportação encerrados.'))
@@ -0,0 +1,116 @@
+import re
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DESTINO = Path(settings.BASE_DIR) / 'static' / 'vendor' / 'fontawesome'
+FONTES = ('fa-solid-900', 'fa-regular-400')
+
+# .fa-check::before, .fa-check-circle::before { content: "\f058"; }
+_REGRA_ICONE = re.compile(r'^\.fa-([a-z0-9-]+)::before$')
+_CONTEUDO = re.compile(r'content:\s*"\\([0-9a-f]+)"')
+_USO = re.compile(r'\bfa-[a-z0-9-]+')
+
+
+def _blocos(css):
+    """Regras de primeiro nível do CSS: lista de (seletor, corpo), com @-regras aninhadas inteiras."""
+    blocos, profundidade, inicio, abertura = [], 0, 0, 0
+    for i, caractere in enumerate(css):
+        if caractere == '{':
+            if profundidade == 0:
+                abertura = i
+            profundidade += 1
+        elif caractere == '}':
+            profundidade -= 1
+            if profundidade == 0:
+                blocos.append((css[inicio:abertura].strip(), css[abertura:i + 1]))
+                inicio = i + 1
+    return blocos
+
+
+def _minificar(css):
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def icones_usados(pastas):
+    """Nomes `fa-*` citados nos templates e arquivos estáticos do projeto (fora de vendor/)."""
+    usados = set()
+    for pasta in pastas:
+        for caminho in Path(pasta).rglob('*'):
+            if caminho.suffix in ('.html', '.js', '.css') and 'vendor' not in caminho.parts:
+                usados.update(nome[3:] for nome in _USO.findall(caminho.read_text(encoding='utf-8')))
+    return usados
+
+
+def css_do_subconjunto(fontawesome_css, estilos_css, usados):
+    """
+    (css minificado, códigos) com as regras base do Font Awesome e só os ícones usados.
+
+    `estilos_css` são solid.css e regular.css (font-face e .fas/.far), com a
+    fonte só em woff2.
+    """
+    licenca = re.match(r'\s*(/\*!.*?\*/)', fontawesome_css, re.S).group(1)
+    regras, codigos = [], set()
+    for seletor, corpo in _blocos(re.sub(r'/\*.*?\*/', '', fontawesome_css, flags=re.S)):
+        seletores = [s.strip() for s in seletor.split(',')]
+        nomes = [_REGRA_ICONE.match(s) for s in seletores]
+        if all(nomes) and 'content' in corpo:
+            seletores = [s for s, nome in zip(seletores, nomes) if nome.group(1) in usados]
+            if not seletores:
+                continue
+            codigos.add(int(_CONTEUDO.search(corpo).group(1), 16))
+        regras.append(f"{','.join(seletores)}{corpo}")
+    for css in estilos_css:
+        css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+        regras.append(re.sub(r',\s*url\("[^"]+\.ttf"\) format\("truetype"\)', '', css))
+    return f"{licenca}\n{_minificar(''.join(regras))}\n", codigos
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera em static/vendor/fontawesome/ o subconjunto do Font Awesome Free com só os ícones '
+        'usados nos templates (CSS e fontes woff2). Requer fonttools e brotli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('origem', help='Pasta do Font Awesome Free para web (com css/ e webfonts/)')
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError('Instale as dependências da ferramenta: pip install fonttools brotli')
+        origem = Path(options['origem'])
+        if not (origem / 'css' / 'fontawesome.css').is_file():
+            raise CommandError(f'{origem} não tem css/fontawesome.css (use a distribuição "web" do Font Awesome).')
+
+        pastas = [pasta for opcoes in settings.TEMPLATES for pasta in opcoes['DIRS']]
+        pastas += list(settings.STATICFILES_DIRS) + [Path(settings.BASE_DIR) / 'financeiro' / 'templates']
+        usados = icones_usados(pasta for pasta in pastas if Path(pasta).is_dir())
+        css, codigos = css_do_subconjunto(
+            (origem / 'css' / 'fontawesome.css').read_text(encoding='utf-8'),
+            [(origem / 'css' / f'{estilo}.css').read_text(encoding='utf-8') for estilo in ('solid', 'regular')],
+            usados,
+        )
+
+        (DESTINO / 'css').mkdir(parents=True, exist_ok=True)
+        (DESTINO / 'webfonts').mkdir(parents=True, exist_ok=True)
+        (DESTINO / 'css' / 'fontawesome.min.css').write_text(css, encoding='utf-8')
+        (DESTINO / 'LICENSE.txt').write_bytes((origem / 'LICENSE.txt').read_bytes())
+        opcoes = subset.Options()
+        opcoes.flavor = 'woff2'
+        opcoes.layout_features = []
+        opcoes.name_IDs = ['*']
+        for fonte in FONTES:
+            # Parte do .ttf: o fontTools nem sempre lê os woff2 publicados
+            font = subset.load_font(str(origem / 'webfonts' / f'{fonte}.ttf'), opcoes)
+            subsetter = subset.Subsetter(opcoes)
+            subsetter.populate(unicodes=codigos)
+            subsetter.subset(font)
+            subset.save_font(font, str(DESTINO / 'webfonts' / f'{fonte}.woff2'), opcoes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(codigos)} ícones ({len(usados)} classes fa-* encontradas) gravados em {DESTINO}.'
+        ))
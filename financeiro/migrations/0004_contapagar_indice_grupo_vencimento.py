@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-16 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0003_grupo_usuario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contapagar',
+            index=models.Index(fields=['grupo', 'data_vencimento', 'pago'], include=('valor',), name='conta_grupo_venc_pago_idx'),
+        ),
+    ]
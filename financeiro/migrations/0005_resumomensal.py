@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-16 20:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def popular_resumos(apps, schema_editor):
+    ContaPagar = apps.get_model('financeiro', 'ContaPagar')
+    ResumoMensal = apps.get_model('financeiro', 'ResumoMensal')
+    linhas = (
+        ContaPagar.objects.annotate(a=ExtractYear('data_vencimento'), m=ExtractMonth('data_vencimento'))
+        .order_by()
+        .values('grupo_id', 'a', 'm')
+        .annotate(previsto=Sum('valor'), pago=Sum('valor', filter=Q(pago=True)), qtd=Count('id'))
+    )
+    ResumoMensal.objects.bulk_create(
+        [ResumoMensal(grupo_id=linha['grupo_id'], ano=linha['a'], mes=linha['m'],
+                      total_previsto=linha['previsto'], total_pago=linha['pago'] or 0,
+                      quantidade=linha['qtd'])
+         for linha in linhas],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0004_contapagar_indice_grupo_vencimento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('total_previsto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_pago', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='financeiro.grupo')),
+            ],
+            options={
+                'ordering': ['ano', 'mes'],
+                'constraints': [models.UniqueConstraint(fields=('grupo', 'ano', 'mes'), name='resumo_grupo_ano_mes_unico')],
+            },
+        ),
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0005_resumomensal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
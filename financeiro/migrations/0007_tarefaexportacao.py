@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-16 20:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0006_contapagar_atualizado_em'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaExportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formato', models.CharField(choices=[('pdf', 'PDF'), ('xlsx', 'Excel')], max_length=4)),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('meses', models.PositiveSmallIntegerField(default=1)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=12)),
+                ('arquivo', models.CharField(blank=True, max_length=500)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas_exportacao', to='financeiro.grupo')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas_exportacao', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['criado_em'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='tarefa_status_criado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-16 20:39
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0007_tarefaexportacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='ocorrencia',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ContaRecorrente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(max_length=200)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('frequencia', models.CharField(choices=[('mensal', 'Mensal'), ('semanal', 'Semanal'), ('anual', 'Anual')], default='mensal', max_length=7)),
+                ('dia', models.PositiveSmallIntegerField(help_text='Dia do vencimento (mensal/anual; meses mais curtos usam o último dia). Semanal: repete no dia da semana da data de início.', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(31)])),
+                ('data_inicio', models.DateField(help_text='Primeira data possível (anual: define o mês).')),
+                ('data_fim', models.DateField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recorrentes', to='financeiro.grupo')),
+            ],
+            options={
+                'ordering': ['descricao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='contapagar',
+            name='recorrencia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contas', to='financeiro.contarecorrente'),
+        ),
+        migrations.AddConstraint(
+            model_name='contapagar',
+            constraint=models.UniqueConstraint(fields=('recorrencia', 'ocorrencia'), name='conta_recorrencia_ocorrencia_unica'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Configuração de texto do PostgreSQL usada na busca (financeiro/busca.py)
+CONFIGURACAO = 'portuguese'
+LOTE = 10000
+
+CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # CREATE OR REPLACE TRIGGER só existe a partir do PostgreSQL 14
+    "DROP TRIGGER IF EXISTS conta_busca_atualizar ON financeiro_contapagar",
+    f"""
+    CREATE TRIGGER conta_busca_atualizar
+    BEFORE INSERT OR UPDATE OF descricao ON financeiro_contapagar
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(busca, 'pg_catalog.{CONFIGURACAO}', descricao)
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS conta_busca_gin ON financeiro_contapagar USING gin (busca)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS conta_descricao_trgm "
+    "ON financeiro_contapagar USING gin (descricao gin_trgm_ops)",
+]
+
+REMOVER = [
+    "DROP INDEX CONCURRENTLY IF EXISTS conta_descricao_trgm",
+    "DROP INDEX CONCURRENTLY IF EXISTS conta_busca_gin",
+    "DROP TRIGGER IF EXISTS conta_busca_atualizar ON financeiro_contapagar",
+]
+
+
+def criar_busca(apps, schema_editor):
+    """Trigger, índices GIN e preenchimento em lotes (só PostgreSQL; no SQLite a busca usa icontains)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CRIAR:
+            cursor.execute(sql)
+        cursor.execute("SELECT MIN(id), MAX(id) FROM financeiro_contapagar")
+        menor, maior = cursor.fetchone()
+        # Fora de transação (atomic = False): cada lote é gravado separadamente
+        for inicio in range(menor or 0, (maior or -1) + 1, LOTE):
+            cursor.execute(
+                f"UPDATE financeiro_contapagar SET busca = to_tsvector('{CONFIGURACAO}', descricao) "
+                "WHERE id >= %s AND id < %s",
+                [inicio, inicio + LOTE],
+            )
+
+
+def remover_busca(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in REMOVER:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY e o preenchimento em lotes não podem rodar numa transação
+    atomic = False
+
+    dependencies = [
+        ('financeiro', '0008_contarecorrente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contapagar',
+            name='busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(criar_busca, remover_busca),
+    ]
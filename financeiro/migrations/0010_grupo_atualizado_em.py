@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0009_contapagar_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grupo',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
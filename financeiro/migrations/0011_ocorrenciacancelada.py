@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-16 21:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0010_grupo_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcorrenciaCancelada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ocorrencia', models.DateField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('recorrencia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='canceladas', to='financeiro.contarecorrente')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('recorrencia', 'ocorrencia'), name='ocorrencia_cancelada_unica')],
+            },
+        ),
+    ]
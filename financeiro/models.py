@@ -1,16 +1,82 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.validators import MinValueValidator, MaxValueValidator
 
 class Grupo(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='grupos')
     nome = models.CharField(max_length=100)
     descricao = models.TextField(blank=True, null=True)
     criado_em = models.DateTimeField(auto_now_add=True)
+    # Última alteração do grupo ou das suas contas (ETag das páginas); as
+    # contas o atualizam pelo signals.grupo_alterado
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nome
 
+class ContaRecorrente(models.Model):
+    """
+    Modelo de conta fixa (aluguel, luz...) expandido sob demanda em cada mês.
+
+    As ocorrências só viram ContaPagar quando são pagas ou editadas (ou pelo
+    comando materializar_recorrentes).
+    """
+    MENSAL = 'mensal'
+    SEMANAL = 'semanal'
+    ANUAL = 'anual'
+    FREQUENCIA_CHOICES = [
+        (MENSAL, 'Mensal'),
+        (SEMANAL, 'Semanal'),
+        (ANUAL, 'Anual'),
+    ]
+
+    grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='recorrentes')
+    descricao = models.CharField(max_length=200)
+    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    frequencia = models.CharField(max_length=7, choices=FREQUENCIA_CHOICES, default=MENSAL)
+    dia = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(31)],
+        help_text='Dia do vencimento (mensal/anual; meses mais curtos usam o último dia). '
+                  'Semanal: repete no dia da semana da data de início.'
+    )
+    data_inicio = models.DateField(help_text='Primeira data possível (anual: define o mês).')
+    data_fim = models.DateField(blank=True, null=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.descricao} ({self.get_frequencia_display()}) - {self.grupo.nome}"
+
+    class Meta:
+        ordering = ['descricao']
+
+class OcorrenciaCancelada(models.Model):
+    """
+    Ocorrência de uma conta recorrente que foi excluída.
+
+    Sem ela, excluir a ContaPagar de uma ocorrência (ou pular uma ocorrência
+    ainda virtual) faria a ocorrência reaparecer como virtual.
+    """
+    recorrencia = models.ForeignKey(ContaRecorrente, on_delete=models.CASCADE, related_name='canceladas')
+    ocorrencia = models.DateField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.recorrencia_id} - {self.ocorrencia:%d/%m/%Y}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recorrencia', 'ocorrencia'], name='ocorrencia_cancelada_unica'),
+        ]
+
+class ContaPagarManager(models.Manager):
+    def get_queryset(self):
+        # `busca` é mantido pelo banco; adiado, não é lido à toa nem regravado pelo save()
+        return super().get_queryset().defer('busca')
+
+
 class ContaPagar(models.Model):
     grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='contas')
     descricao = models.CharField(max_length=200)
@@ -19,9 +85,82 @@ class ContaPagar(models.Model):
     pago = models.BooleanField(default=False)
     data_pagamento = models.DateField(blank=True, null=True)
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    # Ocorrência materializada de uma conta recorrente (data original da regra)
+    recorrencia = models.ForeignKey(ContaRecorrente, on_delete=models.SET_NULL, blank=True, null=True,
+                                    related_name='contas')
+    ocorrencia = models.DateField(blank=True, null=True)
+    # Texto da descrição para a busca (PostgreSQL): preenchido por trigger, com
+    # índice GIN; os índices e o trigger são criados na migração 0009
+    busca = SearchVectorField(null=True, editable=False)
+
+    objects = ContaPagarManager()
 
     def __str__(self):
         return f"{self.descricao} - {self.grupo.nome}"
     
     class Meta:
         ordering = ['data_vencimento']
+        constraints = [
+            models.UniqueConstraint(fields=['recorrencia', 'ocorrencia'], name='conta_recorrencia_ocorrencia_unica'),
+        ]
+        indexes = [
+            # Consultas por mês: grupo = X AND data_vencimento BETWEEN ... (com pago no índice
+            # e valor incluído para que os totais sejam respondidos só pelo índice no PostgreSQL)
+            models.Index(fields=['grupo', 'data_vencimento', 'pago'], include=['valor'],
+                         name='conta_grupo_venc_pago_idx'),
+        ]
+
+class ResumoMensal(models.Model):
+    """Totais materializados de ContaPagar por grupo e mês (mantidos por signals)."""
+    grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='resumos')
+    ano = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    total_previsto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_pago = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.grupo_id} - {self.mes:02d}/{self.ano}"
+
+    class Meta:
+        ordering = ['ano', 'mes']
+        constraints = [
+            models.UniqueConstraint(fields=['grupo', 'ano', 'mes'], name='resumo_grupo_ano_mes_unico'),
+        ]
+
+class TarefaExportacao(models.Model):
+    """Exportação PDF/Excel enfileirada para ser gerada pelo run_export_worker."""
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDA = 'concluida'
+    ERRO = 'erro'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDA, 'Concluída'),
+        (ERRO, 'Erro'),
+    ]
+    FORMATO_CHOICES = [('pdf', 'PDF'), ('xlsx', 'Excel')]
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tarefas_exportacao')
+    grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='tarefas_exportacao')
+    formato = models.CharField(max_length=4, choices=FORMATO_CHOICES)
+    mes = models.PositiveSmallIntegerField()
+    ano = models.PositiveSmallIntegerField()
+    meses = models.PositiveSmallIntegerField(default=1)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=PENDENTE)
+    arquivo = models.CharField(max_length=500, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(blank=True, null=True)
+    concluido_em = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.get_formato_display()} {self.mes:02d}/{self.ano} - {self.get_status_display()}"
+
+    class Meta:
+        ordering = ['criado_em']
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='tarefa_status_criado_idx'),
+        ]
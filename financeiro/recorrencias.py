@@ -0,0 +1,143 @@
+from calendar import monthrange
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from .models import ContaPagar, ContaRecorrente, OcorrenciaCancelada
+from .services import deslocar_mes, recalcular_resumos
+from .signals import grupo_alterado
+
+
+def ocorrencias(recorrente, inicio, fim):
+    """Datas de vencimento da regra `recorrente` no intervalo [inicio, fim)."""
+    inicio = max(inicio, recorrente.data_inicio)
+    if recorrente.data_fim is not None:
+        fim = min(fim, recorrente.data_fim + timedelta(days=1))
+
+    if recorrente.frequencia == ContaRecorrente.SEMANAL:
+        # Mesmo dia da semana da data de início
+        data = inicio + timedelta(days=-(inicio - recorrente.data_inicio).days % 7)
+        while data < fim:
+            yield data
+            data += timedelta(days=7)
+        return
+
+    ano, mes = inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        if recorrente.frequencia == ContaRecorrente.MENSAL or mes == recorrente.data_inicio.month:
+            data = inicio.replace(year=ano, month=mes, day=min(recorrente.dia, monthrange(ano, mes)[1]))
+            if inicio <= data < fim:
+                yield data
+        ano, mes = deslocar_mes(ano, mes, 1)
+
+
+def nova_conta(recorrente, ocorrencia):
+    """ContaPagar (não salva) correspondente a uma ocorrência da regra."""
+    return ContaPagar(
+        grupo_id=recorrente.grupo_id, recorrencia=recorrente, ocorrencia=ocorrencia,
+        descricao=recorrente.descricao, valor=recorrente.valor, data_vencimento=ocorrencia,
+    )
+
+
+def recorrentes_do_periodo(recorrentes, inicio, fim):
+    """Regras do queryset `recorrentes` que podem ter ocorrências em [inicio, fim)."""
+    return recorrentes.filter(
+        Q(data_fim__isnull=True) | Q(data_fim__gte=inicio),
+        data_inicio__lt=fim,
+    )
+
+
+def contas_virtuais(grupo, inicio, fim):
+    """
+    Ocorrências ainda não materializadas das contas recorrentes em [inicio, fim).
+
+    Retorna ContaPagar não salvas, ordenadas por vencimento. Custa uma consulta
+    pelas regras e, se houver alguma, outra pelas ocorrências já gravadas ou
+    canceladas.
+    """
+    return expandir(grupo.recorrentes.all(), inicio, fim)
+
+
+def ocorrencias_puladas(**filtros):
+    """
+    Pares (regra, ocorrência) já materializados ou cancelados que atendem a
+    `filtros`, numa consulta só (UNION).
+    """
+    materializadas = ContaPagar.objects.filter(**filtros).order_by().values_list('recorrencia_id', 'ocorrencia')
+    canceladas = OcorrenciaCancelada.objects.filter(**filtros).order_by().values_list('recorrencia_id', 'ocorrencia')
+    return set(materializadas.union(canceladas, all=True))
+
+
+def expandir(recorrentes, inicio, fim):
+    """Como contas_virtuais, para um queryset qualquer de regras (ex.: todos os grupos do usuário)."""
+    recorrentes = list(recorrentes_do_periodo(recorrentes, inicio, fim))
+    if not recorrentes:
+        return []
+    puladas = ocorrencias_puladas(recorrencia__in=recorrentes, ocorrencia__gte=inicio, ocorrencia__lt=fim)
+    virtuais = [
+        nova_conta(recorrente, data)
+        for recorrente in recorrentes
+        for data in ocorrencias(recorrente, inicio, fim)
+        if (recorrente.pk, data) not in puladas
+    ]
+    virtuais.sort(key=lambda conta: (conta.data_vencimento, conta.descricao))
+    return virtuais
+
+
+def previsto_virtual_por_mes(virtuais):
+    """Soma o valor das ocorrências virtuais por (ano, mes)."""
+    totais = {}
+    for conta in virtuais:
+        chave = (conta.data_vencimento.year, conta.data_vencimento.month)
+        totais[chave] = totais.get(chave, 0) + conta.valor
+    return totais
+
+
+def materializar(recorrente, ocorrencia):
+    """Grava (ou obtém, se já gravada) a ContaPagar de uma ocorrência da regra."""
+    conta = ContaPagar.objects.filter(recorrencia=recorrente, ocorrencia=ocorrencia).first()
+    if conta is None:
+        conta = nova_conta(recorrente, ocorrencia)
+        conta.save()
+    return conta
+
+
+def materializar_ate(recorrentes, ate, tamanho_lote=1000):
+    """
+    Grava todas as ocorrências de `recorrentes` até a data `ate` (inclusive).
+
+    Idempotente: ocorrências já gravadas ou canceladas são puladas. As regras
+    ficam travadas até o fim da transação, então uma execução simultânea espera
+    esta terminar e já encontra as contas gravadas aqui (a restrição única
+    recorrencia+ocorrencia ainda protege contra outras gravações). As puladas
+    vêm numa consulta só, as contas são inseridas com bulk_create em lotes e os resumos
+    dos meses afetados são recalculados uma vez ao final. Retorna a quantidade
+    de contas criadas, contadas antes do insert: o bulk_create com
+    ignore_conflicts devolve também as linhas que o banco pulou.
+    """
+    criadas = 0
+    meses = set()
+    grupos = set()
+    lote = []
+    fim = ate + timedelta(days=1)
+    recorrentes = recorrentes.filter(data_inicio__lt=fim)
+    with transaction.atomic():
+        list(recorrentes.select_for_update().order_by().values_list('pk', flat=True))
+        existentes = ocorrencias_puladas(recorrencia__in=recorrentes.values('pk'), ocorrencia__lt=fim)
+        for recorrente in recorrentes.iterator():
+            for data in ocorrencias(recorrente, recorrente.data_inicio, fim):
+                if (recorrente.pk, data) in existentes:
+                    continue
+                lote.append(nova_conta(recorrente, data))
+                criadas += 1
+                meses.add((data.year, data.month))
+                grupos.add(recorrente.grupo_id)
+                if len(lote) >= tamanho_lote:
+                    ContaPagar.objects.bulk_create(lote, ignore_conflicts=True)
+                    lote = []
+        if lote:
+            ContaPagar.objects.bulk_create(lote, ignore_conflicts=True)
+        if grupos:
+            recalcular_resumos(grupo_ids=grupos, meses=meses)
+            for grupo_id in grupos:
+                grupo_alterado(grupo_id)
+    return criadas
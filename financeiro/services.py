@@ -0,0 +1,223 @@
+from datetime import date
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, F, Q, Value, DecimalField
+from django.db.models.functions import Coalesce, ExtractYear, ExtractMonth
+from django.utils import timezone
+from .models import ContaPagar, OcorrenciaCancelada, ResumoMensal
+
+
+def deslocar_mes(ano, mes, delta):
+    """Retorna (ano, mes) deslocado `delta` meses (negativo volta no tempo)."""
+    indice = ano * 12 + (mes - 1) + delta
+    return indice // 12, indice % 12 + 1
+
+
+def periodo_mes(mes, ano, quantidade=1):
+    """
+    Retorna o intervalo semiaberto [inicio, fim) de `quantidade` meses a partir de mes/ano.
+
+    Filtrar com `data_vencimento__gte=inicio, data_vencimento__lt=fim` permite
+    que o banco use o índice de data_vencimento (ao contrário de __month/__year).
+    """
+    ano_fim, mes_fim = deslocar_mes(ano, mes, quantidade)
+    return date(ano, mes, 1), date(ano_fim, mes_fim, 1)
+
+
+def totais_por_mes(contas, *campos):
+    """
+    Previsto, pago e quantidade de `contas` por `campos` + ano/mês do vencimento.
+
+    Uma única consulta agrupada (agregação condicional para o pago), com as
+    chaves 'a' e 'm' para ano e mês. É o cálculo de referência do
+    ResumoMensal: `recalcular_resumos` grava estas linhas.
+    """
+    return (
+        contas.annotate(a=ExtractYear('data_vencimento'), m=ExtractMonth('data_vencimento'))
+        .order_by()
+        .values(*campos, 'a', 'm')
+        .annotate(previsto=Sum('valor'), pago=Sum('valor', filter=Q(pago=True)), qtd=Count('id'))
+    )
+
+
+# --- RESUMO MENSAL (totais materializados) ---
+
+def resumo_mensal(grupo, ano, mes, quantidade=1):
+    """
+    Previsto/pago de `quantidade` meses terminando em mes/ano, lidos do ResumoMensal.
+
+    Lê no máximo `quantidade` linhas já agregadas em vez de somar as contas e
+    preenche com zero os meses sem contas. Retorna uma lista do mês mais antigo
+    ao mais recente, com dicts {'ano', 'mes', 'previsto', 'pago'}.
+    """
+    ano_inicio, mes_inicio = deslocar_mes(ano, mes, -(quantidade - 1))
+    resumos = _resumos_do_intervalo(grupo, ano_inicio, ano)
+    por_mes = {(a, m): (previsto, pago) for a, m, previsto, pago in resumos}
+    return _preencher_meses(por_mes, ano_inicio, mes_inicio, quantidade)
+
+
+async def aresumo_mensal(grupo, ano, mes, quantidade=1):
+    """Versão assíncrona de `resumo_mensal` (ORM assíncrono, `async for`)."""
+    ano_inicio, mes_inicio = deslocar_mes(ano, mes, -(quantidade - 1))
+    por_mes = {
+        (a, m): (previsto, pago)
+        async for a, m, previsto, pago in _resumos_do_intervalo(grupo, ano_inicio, ano)
+    }
+    return _preencher_meses(por_mes, ano_inicio, mes_inicio, quantidade)
+
+
+def _resumos_do_intervalo(grupo, ano_inicio, ano_fim):
+    return ResumoMensal.objects.filter(
+        grupo=grupo, ano__gte=ano_inicio, ano__lte=ano_fim
+    ).values_list('ano', 'mes', 'total_previsto', 'total_pago')
+
+
+def _preencher_meses(por_mes, ano_inicio, mes_inicio, quantidade):
+    resultado = []
+    for i in range(quantidade):
+        a, m = deslocar_mes(ano_inicio, mes_inicio, i)
+        previsto, pago = por_mes.get((a, m), (Decimal('0'), Decimal('0')))
+        resultado.append({'ano': a, 'mes': m, 'previsto': previsto, 'pago': pago})
+    return resultado
+
+
+MESES_PT = ['', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+def series_historico(historico):
+    """Rótulos ("Jan/2025") e séries de previsto/pago (float) do histórico, para os gráficos."""
+    return {
+        'rotulos': [f"{MESES_PT[h['mes']]}/{h['ano']}" for h in historico],
+        'previsto': [float(h['previsto']) for h in historico],
+        'pago': [float(h['pago']) for h in historico],
+    }
+
+
+def aplicar_delta_resumo(grupo_id, data, previsto, pago, quantidade):
+    """Soma os deltas ao resumo do mês de `data` com F(), criando a linha se preciso."""
+    filtro = ResumoMensal.objects.filter(grupo_id=grupo_id, ano=data.year, mes=data.month)
+    atualizacao = {
+        'total_previsto': F('total_previsto') + previsto,
+        'total_pago': F('total_pago') + pago,
+        'quantidade': F('quantidade') + quantidade,
+    }
+    if filtro.update(**atualizacao) or quantidade <= 0:
+        return
+    try:
+        with transaction.atomic():
+            ResumoMensal.objects.create(grupo_id=grupo_id, ano=data.year, mes=data.month,
+                                        total_previsto=previsto, total_pago=pago,
+                                        quantidade=quantidade)
+    except IntegrityError:
+        # Outra requisição criou a linha ao mesmo tempo
+        filtro.update(**atualizacao)
+
+
+def recalcular_resumos(grupo_ids=None, meses=None, batch_size=1000):
+    """
+    Recalcula ResumoMensal a partir das contas com uma consulta agrupada.
+
+    `grupo_ids` limita os grupos (todos se None) e `meses` limita a um conjunto
+    de (ano, mes). Retorna o número de resumos gravados.
+    """
+    contas = ContaPagar.objects.all()
+    resumos = ResumoMensal.objects.all()
+    if grupo_ids is not None:
+        contas = contas.filter(grupo_id__in=grupo_ids)
+        resumos = resumos.filter(grupo_id__in=grupo_ids)
+    if meses is not None:
+        meses = set(meses)
+        if not meses:
+            return 0
+        filtro_contas = Q()
+        filtro_resumos = Q()
+        for ano, mes in meses:
+            inicio, fim = periodo_mes(mes, ano)
+            filtro_contas |= Q(data_vencimento__gte=inicio, data_vencimento__lt=fim)
+            filtro_resumos |= Q(ano=ano, mes=mes)
+        contas = contas.filter(filtro_contas)
+        resumos = resumos.filter(filtro_resumos)
+
+    linhas = totais_por_mes(contas, 'grupo_id')
+    with transaction.atomic():
+        resumos.delete()
+        novos = [
+            ResumoMensal(grupo_id=linha['grupo_id'], ano=linha['a'], mes=linha['m'],
+                         total_previsto=linha['previsto'], total_pago=linha['pago'] or 0,
+                         quantidade=linha['qtd'])
+            for linha in linhas.iterator()
+        ]
+        ResumoMensal.objects.bulk_create(novos, batch_size=batch_size)
+    return len(novos)
+
+
+# --- PAINEL CONSOLIDADO ---
+
+def grupos_com_totais(grupos, inicio, fim, hoje):
+    """
+    Anota `grupos` com previsto/pago/pendente e contas atrasadas em [inicio, fim).
+
+    É uma única consulta (LEFT JOIN com as contas agrupado por grupo), seja
+    qual for a quantidade de grupos.
+    """
+    no_periodo = Q(contas__data_vencimento__gte=inicio, contas__data_vencimento__lt=fim)
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    return grupos.annotate(
+        total_previsto=Coalesce(Sum('contas__valor', filter=no_periodo), zero),
+        total_pago=Coalesce(Sum('contas__valor', filter=no_periodo & Q(contas__pago=True)), zero),
+        atrasadas=Count('contas', filter=no_periodo & Q(contas__pago=False, contas__data_vencimento__lt=hoje)),
+    ).annotate(
+        total_pendente=F('total_previsto') - F('total_pago'),
+    )
+
+
+# --- AÇÕES EM LOTE ---
+
+ACOES_LOTE = ('pagar', 'desfazer_pagamento', 'excluir', 'mover')
+
+
+def aplicar_acao_em_lote(grupo, ids, acao, data_pagamento=None, destino=None):
+    """
+    Aplica `acao` às contas `ids` do `grupo` com um único UPDATE/DELETE.
+
+    O filtro por grupo garante que só contas do grupo (já verificado como do
+    usuário) sejam afetadas; 'pagar' ignora as já pagas. Os resumos dos meses
+    tocados são recalculados uma vez, e não por conta, e o chamador invalida
+    cada grupo alterado uma vez. Retorna `(quantidade afetada, ids dos grupos
+    alterados)`.
+    """
+    if acao not in ACOES_LOTE:
+        raise ValueError(f'Ação inválida: {acao}')
+    contas = ContaPagar.objects.filter(grupo=grupo, pk__in=ids)
+    grupos_alterados = [grupo.pk]
+
+    with transaction.atomic():
+        if acao == 'pagar':
+            # Contas já pagas mantêm a data de pagamento registrada
+            contas = contas.filter(pago=False)
+        meses = set(
+            contas.annotate(a=ExtractYear('data_vencimento'), m=ExtractMonth('data_vencimento'))
+            .order_by().values_list('a', 'm').distinct()
+        )
+        agora = timezone.now()
+        if acao == 'pagar':
+            afetadas = contas.update(pago=True, data_pagamento=data_pagamento or date.today(),
+                                     atualizado_em=agora)
+        elif acao == 'desfazer_pagamento':
+            afetadas = contas.update(pago=False, data_pagamento=None, atualizado_em=agora)
+        elif acao == 'mover':
+            afetadas = contas.update(grupo=destino, atualizado_em=agora)
+            grupos_alterados.append(destino.pk)
+        else:
+            # Ocorrências de contas recorrentes não voltam como virtuais
+            OcorrenciaCancelada.objects.bulk_create([
+                OcorrenciaCancelada(recorrencia_id=recorrencia_id, ocorrencia=ocorrencia)
+                for recorrencia_id, ocorrencia in contas.filter(recorrencia__isnull=False, ocorrencia__isnull=False)
+                .order_by().values_list('recorrencia_id', 'ocorrencia')
+            ], ignore_conflicts=True)
+            # DELETE direto, sem os signals por conta (nenhum modelo referencia
+            # ContaPagar): os resumos são recalculados abaixo, na mesma transação
+            afetadas = contas._raw_delete(contas.db)
+        if afetadas:
+            recalcular_resumos(grupo_ids=grupos_alterados, meses=meses)
+    return afetadas, grupos_alterados
@@ -0,0 +1,108 @@
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Grupo, ContaPagar, ContaRecorrente, OcorrenciaCancelada
+from .services import aplicar_delta_resumo
+from .caching import invalidar_exportacoes
+
+# Campos da conta que afetam o ResumoMensal
+CAMPOS_RESUMO = ('grupo_id', 'data_vencimento', 'valor', 'pago')
+_CAMPOS = [ContaPagar._meta.get_field(campo) for campo in CAMPOS_RESUMO]
+
+
+def _estado_resumo(conta, base=None):
+    """
+    Tupla com os CAMPOS_RESUMO da instância.
+
+    Campos adiados (only/defer) vêm de `base`; sem `base`, retorna None.
+    """
+    valores = conta.__dict__
+    estado = []
+    for i, (campo, field) in enumerate(zip(CAMPOS_RESUMO, _CAMPOS)):
+        if campo in valores:
+            # Aceita o que o ORM aceita ao gravar (ex.: data em texto, '2025-01-05')
+            estado.append(field.to_python(valores[campo]))
+        elif base is not None:
+            estado.append(base[i])
+        else:
+            return None
+    return tuple(estado)
+
+
+def _invalidar(grupo_id):
+    invalidar_exportacoes(grupo_id)
+    # O carimbo é a versão das chaves do cache (caching.versao_grupo)
+    Grupo.objects.filter(pk=grupo_id).update(atualizado_em=timezone.now())
+
+
+def grupo_alterado(grupo_id):
+    """Invalida os dados derivados do grupo e o carimbo de alteração após o commit da transação atual."""
+    transaction.on_commit(lambda: _invalidar(grupo_id))
+
+
+def _aplicar(estado, sinal):
+    grupo_id, data_vencimento, valor, pago = estado
+    valor = Decimal(valor) * sinal
+    aplicar_delta_resumo(grupo_id, data_vencimento, valor, valor if pago else 0, sinal)
+
+
+@receiver(post_init, sender=ContaPagar)
+def guardar_estado_original(sender, instance, **kwargs):
+    instance._estado_resumo = _estado_resumo(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=ContaPagar)
+@receiver(pre_delete, sender=ContaPagar)
+def carregar_estado_original(sender, instance, raw=False, **kwargs):
+    # Instância carregada com campos adiados: busca o estado gravado antes de alterá-lo
+    if not raw and instance.pk and instance._estado_resumo is None:
+        instance._estado_resumo = (
+            ContaPagar.objects.filter(pk=instance.pk).values_list(*CAMPOS_RESUMO).first()
+        )
+
+
+@receiver(post_save, sender=ContaPagar)
+def atualizar_resumo_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = None if created else instance._estado_resumo
+    novo = _estado_resumo(instance, base=anterior)
+    if anterior != novo:
+        if anterior is not None:
+            _aplicar(anterior, -1)
+        _aplicar(novo, 1)
+    instance._estado_resumo = novo
+    grupo_alterado(instance.grupo_id)
+    if anterior is not None and anterior[0] != instance.grupo_id:
+        grupo_alterado(anterior[0])
+
+
+@receiver(post_delete, sender=ContaPagar)
+def atualizar_resumo_ao_excluir(sender, instance, origin=None, **kwargs):
+    # Ao excluir o grupo inteiro os resumos são removidos em cascata
+    if isinstance(origin, Grupo):
+        return
+    if instance._estado_resumo is not None:
+        _aplicar(instance._estado_resumo, -1)
+    grupo_alterado(instance.grupo_id)
+
+
+@receiver(post_delete, sender=ContaPagar)
+def cancelar_ocorrencia_ao_excluir(sender, instance, origin=None, **kwargs):
+    # A ocorrência excluída não deve reaparecer como virtual
+    if isinstance(origin, Grupo) or instance.recorrencia_id is None or instance.ocorrencia is None:
+        return
+    OcorrenciaCancelada.objects.bulk_create(
+        [OcorrenciaCancelada(recorrencia_id=instance.recorrencia_id, ocorrencia=instance.ocorrencia)],
+        ignore_conflicts=True,
+    )
+
+
+@receiver(post_save, sender=ContaRecorrente)
+@receiver(post_delete, sender=ContaRecorrente)
+def recorrente_alterada(sender, instance, raw=False, **kwargs):
+    # Ocorrências virtuais entram no dashboard e nas exportações do grupo
+    if not raw:
+        grupo_alterado(instance.grupo_id)
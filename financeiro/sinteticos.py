@@ -0,0 +1,145 @@
+"""
+Dados sintéticos em escala de produção para benchmarks e testes de carga.
+
+Cada usuário recebe `grupos` espaços e cada espaço `contas` contas a pagar
+distribuídas por `meses` meses (terminando dois meses à frente de `hoje`),
+com uma mistura parecida com a de uma casa real:
+
+- contas fixas (aluguel, internet, escola...) com valor estável e vencimento
+  num dia típico do mês;
+- contas de consumo (energia, água, cartão) com valor variável (log-normal)
+  e vencimento também num dia típico;
+- gastos avulsos (mercado, farmácia...) em qualquer dia do mês.
+
+Cada espaço tem uma escala de valores própria e usa só parte das categorias.
+Contas vencidas estão quase todas pagas (com alguns dias de antecedência ou
+atraso) e as futuras quase todas pendentes. A geração é determinística para
+uma mesma `semente`.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from time import perf_counter
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from .models import Grupo, ContaPagar
+from .services import deslocar_mes, recalcular_resumos
+
+# (descrição, valor base, dispersão do valor, dia típico ou None, peso)
+CATEGORIAS = (
+    ('Aluguel', 1800, 0.0, 10, 6),
+    ('Condomínio', 650, 0.03, 10, 5),
+    ('Internet', 120, 0.0, 5, 6),
+    ('Celular', 60, 0.0, 8, 5),
+    ('Plano de saúde', 480, 0.0, 5, 4),
+    ('Escola', 1200, 0.0, 5, 3),
+    ('Academia', 110, 0.0, 5, 3),
+    ('Streaming', 45, 0.0, 12, 5),
+    ('Energia', 220, 0.25, 15, 6),
+    ('Água', 90, 0.2, 20, 6),
+    ('Gás', 70, 0.3, 18, 3),
+    ('Cartão de crédito', 1500, 0.45, 25, 6),
+    ('Mercado', 350, 0.5, None, 10),
+    ('Farmácia', 80, 0.6, None, 5),
+    ('Combustível', 250, 0.4, None, 6),
+    ('Restaurante', 120, 0.6, None, 6),
+    ('Manutenção', 200, 0.8, None, 2),
+)
+
+NOMES_GRUPOS = ('Casa', 'Apartamento', 'Empresa', 'Pessoal', 'Família', 'Viagens', 'Sítio', 'Carro')
+
+
+@dataclass
+class ResultadoGeracao:
+    usuarios: int = 0
+    grupos: int = 0
+    contas: int = 0
+    segundos: float = 0.0
+
+    @property
+    def contas_por_segundo(self):
+        return self.contas / self.segundos if self.segundos else 0.0
+
+
+def _valor(rng, base, dispersao, escala):
+    valor = base * escala
+    if dispersao:
+        valor *= rng.lognormvariate(0, dispersao)
+    return Decimal(f'{max(valor, 1):.2f}')
+
+
+def _pagamento(rng, vencimento, hoje):
+    """(pago, data_pagamento) de uma conta com o vencimento dado."""
+    if vencimento < hoje:
+        if rng.random() >= 0.93:
+            return False, None
+        # A maioria paga perto do vencimento; alguns pagam com atraso
+        dias = rng.randint(-5, 1) if rng.random() < 0.85 else rng.randint(2, 20)
+    else:
+        if rng.random() >= 0.08:
+            return False, None
+        dias = -rng.randint(1, 10)
+    return True, min(vencimento + timedelta(days=dias), hoje)
+
+
+def contas_do_grupo(rng, grupo_id, quantidade, primeiro_mes, meses, hoje):
+    """Gera `quantidade` ContaPagar (não salvas) para o grupo."""
+    categorias = rng.sample(CATEGORIAS, k=rng.randint(8, len(CATEGORIAS)))
+    pesos = [categoria[4] for categoria in categorias]
+    escala = rng.lognormvariate(0, 0.4)
+    ano_inicio, mes_inicio = primeiro_mes
+    for _ in range(quantidade):
+        descricao, base, dispersao, dia, _ = rng.choices(categorias, weights=pesos)[0]
+        ano, mes = deslocar_mes(ano_inicio, mes_inicio, rng.randrange(meses))
+        vencimento = date(ano, mes, dia if dia else rng.randint(1, 28))
+        pago, data_pagamento = _pagamento(rng, vencimento, hoje)
+        yield ContaPagar(
+            grupo_id=grupo_id, descricao=descricao, valor=_valor(rng, base, dispersao, escala),
+            data_vencimento=vencimento, pago=pago, data_pagamento=data_pagamento,
+        )
+
+
+def gerar_dados(usuarios, grupos, contas, meses=24, semente=42, prefixo='sintetico',
+                senha='senha-sintetica', tamanho_lote=5000, hoje=None):
+    """
+    Cria `usuarios` × `grupos` × `contas` com bulk_create em lotes.
+
+    Os usuários se chamam `<prefixo><n>` e compartilham a mesma `senha` (o hash
+    é calculado uma vez só). Os resumos mensais dos grupos criados são
+    recalculados ao final.
+    """
+    rng = random.Random(semente)
+    hoje = hoje or date.today()
+    primeiro_mes = deslocar_mes(hoje.year, hoje.month, 3 - meses)
+    resultado = ResultadoGeracao()
+    inicio = perf_counter()
+    with transaction.atomic():
+        hash_senha = make_password(senha)
+        nomes = [f'{prefixo}{n}' for n in range(usuarios)]
+        User.objects.bulk_create(User(username=nome, password=hash_senha) for nome in nomes)
+        ids_usuarios = list(User.objects.filter(username__in=nomes).order_by('pk').values_list('pk', flat=True))
+        Grupo.objects.bulk_create(
+            Grupo(usuario_id=usuario_id, nome=NOMES_GRUPOS[n % len(NOMES_GRUPOS)])
+            for usuario_id in ids_usuarios for n in range(grupos)
+        )
+        ids_grupos = list(Grupo.objects.filter(usuario_id__in=ids_usuarios).order_by('pk').values_list('pk', flat=True))
+
+        lote = []
+        for grupo_id in ids_grupos:
+            for conta in contas_do_grupo(rng, grupo_id, contas, primeiro_mes, meses, hoje):
+                lote.append(conta)
+                if len(lote) >= tamanho_lote:
+                    ContaPagar.objects.bulk_create(lote)
+                    resultado.contas += len(lote)
+                    lote = []
+        if lote:
+            ContaPagar.objects.bulk_create(lote)
+            resultado.contas += len(lote)
+        recalcular_resumos(grupo_ids=ids_grupos)
+
+    resultado.usuarios = len(ids_usuarios)
+    resultado.grupos = len(ids_grupos)
+    resultado.segundos = perf_counter() - inicio
+    return resultado
@@ -0,0 +1,96 @@
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from .exportacao import FORMATOS
+from .models import TarefaExportacao
+
+logger = logging.getLogger(__name__)
+
+
+def reservar_proxima_tarefa():
+    """
+    Marca a tarefa pendente mais antiga como 'processando' e a retorna.
+
+    A reserva é um UPDATE condicional (status ainda pendente), então vários
+    workers podem disputar a fila sem locks específicos do banco.
+    """
+    pendentes = TarefaExportacao.objects.filter(
+        status=TarefaExportacao.PENDENTE
+    ).order_by('criado_em').values_list('pk', flat=True)[:10]
+    for tarefa_id in pendentes:
+        reservada = TarefaExportacao.objects.filter(
+            pk=tarefa_id, status=TarefaExportacao.PENDENTE
+        ).update(status=TarefaExportacao.PROCESSANDO, iniciado_em=timezone.now())
+        if reservada:
+            return TarefaExportacao.objects.select_related('grupo').get(pk=tarefa_id)
+    return None
+
+
+def processar_tarefa(tarefa):
+    """Gera o arquivo da tarefa em EXPORT_JOBS_DIR e registra o resultado."""
+    escrever, _ = FORMATOS[tarefa.formato]
+    diretorio = Path(settings.EXPORT_JOBS_DIR)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    destino = diretorio / f"{tarefa.pk}.{tarefa.formato}"
+    try:
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                escrever(tarefa.grupo, tarefa.mes, tarefa.ano, tarefa.meses, arquivo)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+    except Exception as exc:
+        logger.exception('Falha ao gerar a exportação %s', tarefa.pk)
+        tarefa.status = TarefaExportacao.ERRO
+        tarefa.erro = str(exc)
+    else:
+        tarefa.status = TarefaExportacao.CONCLUIDA
+        tarefa.arquivo = str(destino)
+    tarefa.concluido_em = timezone.now()
+    tarefa.save(update_fields=['status', 'arquivo', 'erro', 'concluido_em'])
+    return tarefa
+
+
+def liberar_tarefas_travadas(tempo_limite):
+    """Devolve à fila tarefas 'processando' há mais de `tempo_limite` segundos (worker morto)."""
+    limite = timezone.now() - timedelta(seconds=tempo_limite)
+    return TarefaExportacao.objects.filter(
+        status=TarefaExportacao.PROCESSANDO, iniciado_em__lt=limite
+    ).update(status=TarefaExportacao.PENDENTE, iniciado_em=None)
+
+
+def remover_tarefas_antigas(horas):
+    """Exclui tarefas finalizadas há mais de `horas` horas, com seus arquivos."""
+    limite = timezone.now() - timedelta(hours=horas)
+    antigas = TarefaExportacao.objects.filter(
+        status__in=[TarefaExportacao.CONCLUIDA, TarefaExportacao.ERRO], concluido_em__lt=limite
+    )
+    for caminho in antigas.exclude(arquivo='').values_list('arquivo', flat=True):
+        Path(caminho).unlink(missing_ok=True)
+    return antigas.delete()[0]
+
+
+def executar_worker(intervalo=1.0, uma_vez=False, deve_parar=lambda: False):
+    """
+    Laço de um worker: processa tarefas até a fila esvaziar (`uma_vez`) ou `deve_parar()`.
+
+    Retorna a quantidade de tarefas processadas.
+    """
+    processadas = 0
+    while not deve_parar():
+        tarefa = reservar_proxima_tarefa()
+        if tarefa is None:
+            if uma_vez:
+                break
+            time.sleep(intervalo)
+            continue
+        processar_tarefa(tarefa)
+        processadas += 1
+    return processadas
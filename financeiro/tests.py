@@ -1,3 +1,1184 @@
-from django.test import TestCase
+from datetime import date
+from io import BytesIO, StringIO
+from pathlib import Path
+import base64
+import json
+import re
+import tempfile
+import time
+import zlib
+from openpyxl import load_workbook
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from config.asgi import EstaticosAsgi
+from .busca import indexar_busca
+from .models import Grupo, ContaPagar, ContaRecorrente, ResumoMensal, TarefaExportacao
+from .services import totais_por_mes, deslocar_mes, periodo_mes, resumo_mensal
+from .caching import estatisticas_cache
+from .recorrencias import ocorrencias
+from .sinteticos import gerar_dados
+from . import api, desempenho, views, views_async
+from .management.commands import subconjunto_fontawesome
+from .views import GrupoDetailView
+from .views_async import amontar_dashboard
+from .urls import urlpatterns
 
-# Create your tests here.
+
+class BaseFinanceiroTestCase(TestCase):
+    """Cria um usuário logado com um grupo e algumas contas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', password='senha-forte-123')
+        cls.grupo = Grupo.objects.create(usuario=cls.usuario, nome='Casa')
+        for mes in range(1, 7):
+            ContaPagar.objects.create(grupo=cls.grupo, descricao=f'Aluguel {mes}',
+                                      valor=Decimal('1000.00'), data_vencimento=date(2025, mes, 10),
+                                      pago=mes % 2 == 0)
+            ContaPagar.objects.create(grupo=cls.grupo, descricao=f'Luz {mes}',
+                                      valor=Decimal('150.50'), data_vencimento=date(2025, mes, 20))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def assertResumoConsistente(self, grupo=None):
+        """O ResumoMensal mantido incrementalmente bate com o recálculo a partir das contas."""
+        grupo = grupo or self.grupo
+        esperado = {(linha['a'], linha['m'], linha['previsto'], linha['pago'] or 0, linha['qtd'])
+                    for linha in totais_por_mes(grupo.contas.all())}
+        gravado = set(grupo.resumos.filter(quantidade__gt=0)
+                      .values_list('ano', 'mes', 'total_previsto', 'total_pago', 'quantidade'))
+        self.assertEqual(gravado, esperado)
+
+
+class TotaisMensaisTests(BaseFinanceiroTestCase):
+
+    def test_deslocar_mes_atravessa_anos(self):
+        self.assertEqual(deslocar_mes(2025, 1, -1), (2024, 12))
+        self.assertEqual(deslocar_mes(2025, 12, 1), (2026, 1))
+        self.assertEqual(deslocar_mes(2025, 3, -14), (2024, 1))
+
+    def test_periodo_mes_semiaberto(self):
+        self.assertEqual(periodo_mes(12, 2024), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(periodo_mes(11, 2024, quantidade=3), (date(2024, 11, 1), date(2025, 2, 1)))
+
+    def test_filtro_do_mes_usa_indice_composto(self):
+        inicio, fim = periodo_mes(3, 2025)
+        contas = ContaPagar.objects.filter(grupo=self.grupo, data_vencimento__gte=inicio,
+                                           data_vencimento__lt=fim)
+        if connection.vendor == 'postgresql':
+            # Com poucas linhas o planejador preferiria um seq scan; sem estatísticas
+            # o custo empata com o do índice de grupo_id e a escolha varia
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE financeiro_contapagar')
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plano = contas.explain()
+        self.assertIn('conta_grupo_venc_pago_idx', plano)
+        self.assertNotIn('EXTRACT', str(contas.query).upper())
+
+    def test_resumo_em_uma_consulta_com_meses_vazios(self):
+        with self.assertNumQueries(1):
+            historico = resumo_mensal(self.grupo, 2025, 7, quantidade=8)
+        self.assertEqual([(h['ano'], h['mes']) for h in historico][:2], [(2024, 12), (2025, 1)])
+        self.assertEqual(historico[0]['previsto'], 0)
+        self.assertEqual(historico[-1]['previsto'], 0)
+        self.assertEqual(historico[1]['previsto'], Decimal('1150.50'))
+        self.assertEqual(historico[1]['pago'], 0)
+        self.assertEqual(historico[2]['pago'], Decimal('1000.00'))
+
+
+class ResumoMensalTests(BaseFinanceiroTestCase):
+
+    def test_resumo_mantido_ao_criar(self):
+        resumo = ResumoMensal.objects.get(grupo=self.grupo, ano=2025, mes=2)
+        self.assertEqual(resumo.total_previsto, Decimal('1150.50'))
+        self.assertEqual(resumo.total_pago, Decimal('1000.00'))
+        self.assertEqual(resumo.quantidade, 2)
+
+    def test_resumo_mantido_ao_criar_com_valores_em_texto(self):
+        conta = ContaPagar.objects.create(grupo=self.grupo, descricao='Água', valor='80.00',
+                                          data_vencimento='2025-01-05', pago=True)
+        resumo = ResumoMensal.objects.get(grupo=self.grupo, ano=2025, mes=1)
+        self.assertEqual((resumo.total_previsto, resumo.total_pago, resumo.quantidade),
+                         (Decimal('1230.50'), Decimal('80.00'), 3))
+        conta.data_vencimento = '2025-02-05'
+        conta.save()
+        self.assertResumoConsistente()
+
+    def test_resumo_mantido_ao_alterar_valor_data_e_pago(self):
+        conta = self.grupo.contas.get(descricao='Luz 3')
+        conta.valor = Decimal('99.90')
+        conta.pago = True
+        conta.data_vencimento = date(2025, 8, 5)
+        conta.save()
+        self.assertResumoConsistente()
+        self.assertEqual(ResumoMensal.objects.get(grupo=self.grupo, ano=2025, mes=8).quantidade, 1)
+
+    def test_resumo_mantido_com_campos_adiados(self):
+        conta = self.grupo.contas.only('id', 'pago').get(descricao='Aluguel 1')
+        conta.pago = True
+        conta.save()
+        self.assertResumoConsistente()
+
+    def test_resumo_mantido_ao_excluir(self):
+        self.grupo.contas.filter(descricao__startswith='Luz').delete()
+        self.assertResumoConsistente()
+
+    def test_excluir_grupo_remove_resumos(self):
+        self.grupo.delete()
+        self.assertFalse(ResumoMensal.objects.exists())
+
+    def test_rebuild_resumos(self):
+        ContaPagar.objects.filter(descricao='Luz 4').update(valor=Decimal('10.00'))
+        ResumoMensal.objects.filter(mes=1).delete()
+        call_command('rebuild_resumos', stdout=StringIO())
+        self.assertResumoConsistente()
+
+
+class GrupoListViewTests(BaseFinanceiroTestCase):
+
+    def test_painel_consolidado_com_consultas_constantes(self):
+        url = reverse('grupo-list')
+        # sessão + usuário + carimbo (ETag) + grupos anotados com os totais + recorrentes do usuário
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'mes': 2, 'ano': 2025})
+        self.assertEqual(response.context['total_previsto'], Decimal('1150.50'))
+
+        for i in range(10):
+            outro = Grupo.objects.create(usuario=self.usuario, nome=f'Espaço {i}')
+            ContaPagar.objects.create(grupo=outro, descricao='Água', valor=Decimal('50.00'),
+                                      data_vencimento=date(2025, 2, 5), pago=i % 2 == 0)
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'mes': 2, 'ano': 2025})
+
+        grupos = {g.nome: g for g in response.context['grupos']}
+        self.assertEqual(len(grupos), 11)
+        casa = grupos['Casa']
+        self.assertEqual((casa.total_previsto, casa.total_pago, casa.total_pendente, casa.atrasadas),
+                         (Decimal('1150.50'), Decimal('1000.00'), Decimal('150.50'), 1))
+        self.assertEqual(grupos['Espaço 1'].atrasadas, 1)
+        self.assertEqual(grupos['Espaço 0'].atrasadas, 0)
+        self.assertEqual(response.context['total_previsto'], Decimal('1650.50'))
+        self.assertEqual(response.context['total_pago'], Decimal('1250.00'))
+        self.assertEqual(response.context['total_atrasadas'], 6)
+
+    def test_painel_ignora_grupos_de_outros_usuarios(self):
+        outro_usuario = User.objects.create_user('bruno', password='senha-forte-123')
+        Grupo.objects.create(usuario=outro_usuario, nome='Alheio')
+        response = self.client.get(reverse('grupo-list'), {'mes': 2, 'ano': 2025})
+        self.assertEqual([g.nome for g in response.context['grupos']], ['Casa'])
+
+class GrupoDetailViewTests(BaseFinanceiroTestCase):
+
+    def test_numero_de_consultas_constante(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        # sessão + usuário + grupo + totais/histórico + recorrentes + lista de contas
+        with self.assertNumQueries(6):
+            response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertEqual(response.context['total_previsto'], Decimal('1150.50'))
+        self.assertEqual(response.context['total_pago'], Decimal('1000.00'))
+        self.assertEqual(response.context['total_pendente'], Decimal('150.50'))
+
+    def test_dashboard_em_cache_ate_conta_mudar(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        self.assertEqual(self.client.get(url, {'mes': 6, 'ano': 2025})['X-Cache'], 'MISS')
+        # sessão + usuário + grupo; totais, histórico e contas vêm do cache
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(estatisticas_cache()['hits'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('contapagar-create', kwargs={'grupo_id': self.grupo.pk}), {
+                'grupo': self.grupo.pk, 'descricao': 'Internet', 'valor': '100.00',
+                'data_vencimento': '2025-06-15',
+            })
+        response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.context['total_previsto'], Decimal('1250.50'))
+        self.assertEqual(len(response.context['contas']), 3)
+        # Fragmentos do template (resumo e linhas) também mudam com a versão do grupo
+        self.assertContains(response, 'R$ 1250,50')
+        self.assertContains(response, 'Internet')
+        self.assertEqual(self.client.get(url, {'mes': 6, 'ano': 2025})['X-Cache'], 'HIT')
+
+        # Alteração feita por outro processo (outro worker, comando): nada passa
+        # pelo cache deste processo, só o carimbo do grupo muda no banco
+        ContaPagar.objects.filter(grupo=self.grupo, descricao='Internet').update(valor=Decimal('200.00'))
+        call_command('rebuild_resumos', stdout=StringIO())
+        Grupo.objects.filter(pk=self.grupo.pk).update(atualizado_em=timezone.now())
+        response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.context['total_previsto'], Decimal('1350.50'))
+        self.assertContains(response, 'R$ 1350,50')
+
+    def test_pagina_inalterada_responde_304(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        # sessão + usuário + grupo (carimbo); sem totais, contas nem renderização
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'mes': 6, 'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get(url, {'mes': 7, 'ano': 2025}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Comprimida, o ETag fica fraco e continua valendo
+        response = self.client.get(url, {'mes': 6, 'ano': 2025}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], f'W/{etag}')
+        response = self.client.get(url, {'mes': 6, 'ano': 2025}, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+        lista = self.client.get(reverse('grupo-list'))
+        conta = ContaPagar.objects.filter(grupo=self.grupo).first()
+        conta.pago = not conta.pago
+        with self.captureOnCommitCallbacks(execute=True):
+            conta.save()
+        response = self.client.get(url, {'mes': 6, 'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        response = self.client.get(reverse('grupo-list'), HTTP_IF_NONE_MATCH=lista['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_fragmentos_em_cache_e_css_estatico(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.client.post(reverse('grupo-update', kwargs={'pk': self.grupo.pk}), {'nome': 'Casa de Praia'})
+        response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertContains(response, 'Casa de Praia')
+        self.assertContains(response, '/static/css/base.css')
+        self.assertContains(response, '/static/vendor/chartjs/chart.umd.min.js')
+        self.assertNotContains(response, '<style>')
+        self.assertNotContains(response, 'cdn')
+
+    def test_subconjunto_fontawesome_so_com_icones_usados(self):
+        fontawesome_css = (
+            '/*! Font Awesome Free */\n.fa{font-family:var(--fa-style-family)}\n'
+            '.fa-check::before, .fa-check-circle::before { content: "\\f058"; }\n'
+            '.fa-user::before { content: "\\f007"; }\n'
+            '@keyframes fa-spin { 0% { transform: rotate(0deg); } }\n'
+        )
+        solid_css = '@font-face{src:url("../webfonts/fa-solid-900.woff2") format("woff2"), ' \
+            'url("../webfonts/fa-solid-900.ttf") format("truetype")}'
+        css, codigos = subconjunto_fontawesome.css_do_subconjunto(fontawesome_css, [solid_css], {'check', 'spin'})
+        self.assertEqual(codigos, {0xf058})
+        self.assertTrue(css.startswith('/*! Font Awesome Free */'))
+        self.assertIn('.fa-check::before{', css)
+        self.assertIn('@keyframes fa-spin', css)
+        self.assertNotIn('fa-check-circle', css)
+        self.assertNotIn('fa-user', css)
+        self.assertNotIn('.ttf', css)
+
+    def test_contas_paginadas_com_recorrentes_no_trecho_certo(self):
+        ContaPagar.objects.bulk_create(
+            ContaPagar(grupo=self.grupo, descricao=f'Mercado {n:03d}', valor=Decimal('10.00'),
+                       data_vencimento=date(2025, 7, 1 + n // 4))
+            for n in range(110)
+        )
+        ContaRecorrente.objects.create(grupo=self.grupo, descricao='Internet', valor=Decimal('99.90'),
+                                       dia=15, data_inicio=date(2025, 1, 1))
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 7, 'ano': 2025})
+        contas = list(response.context['contas'])
+        self.assertEqual(len(contas), views.CONTAS_POR_PAGINA)
+        self.assertContains(response, 'Carregar mais contas')
+
+        # Segue as páginas pelo endereço da última linha, como a página faz ao rolar
+        proximo = response.context['proximo']
+        while proximo:
+            response = self.client.get(reverse('grupo-contas', kwargs={'pk': self.grupo.pk}),
+                                       {'mes': 7, 'ano': 2025, 'apos': proximo})
+            self.assertNotContains(response, '<html')
+            contas += response.context['contas']
+            proximo = response.context['proximo']
+        self.assertEqual(len(contas), 111)
+        self.assertEqual([c['data_vencimento'] for c in contas], sorted(c['data_vencimento'] for c in contas))
+        self.assertEqual([c['descricao'] for c in contas if c['pk'] is None], ['Internet'])
+        self.assertTrue(all(c['atrasada'] != c['pago'] for c in contas if c['pk']))
+
+        response = self.client.get(reverse('grupo-contas', kwargs={'pk': self.grupo.pk}), {'apos': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+        # Sem cursor vem a primeira página (troca de mês sem recarregar a página)
+        response = self.client.get(reverse('grupo-contas', kwargs={'pk': self.grupo.pk}), {'mes': 7, 'ano': 2025})
+        self.assertEqual([c['descricao'] for c in response.context['contas']],
+                         [c['descricao'] for c in contas[:views.CONTAS_POR_PAGINA]])
+
+
+class ExportacaoTests(BaseFinanceiroTestCase):
+
+    def setUp(self):
+        super().setUp()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio_cache = Path(diretorio.name)
+        configuracao = override_settings(EXPORT_CACHE_DIR=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_exportar_pdf(self):
+        url = reverse('exportar-pdf', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 2, 'ano': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_exportar_pdf_vazio_descreve_o_periodo(self):
+        url = reverse('exportar-pdf', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 1, 'ano': 2030, 'meses': 3})
+        # Streams do ReportLab: ASCII85 + Flate, texto em WinAnsi
+        pdf = b''.join(response.streaming_content)
+        texto = b''.join(
+            zlib.decompress(base64.a85decode(stream))
+            for stream in re.findall(rb'stream\r?\n(.*?)~>', pdf, re.S)
+        ).decode('latin-1')
+        self.assertIn('Nenhuma conta cadastrada no per', texto)
+        self.assertIn('Janeiro a Mar', texto)
+        self.assertNotIn('para este m', texto)
+
+    def test_periodo_invalido_responde_400(self):
+        urls = [
+            reverse('grupo-list'),
+            reverse('grupo-detail', kwargs={'pk': self.grupo.pk}),
+            reverse('exportar-pdf', kwargs={'pk': self.grupo.pk}),
+        ]
+        for url in urls:
+            for params in ({'mes': 'abc'}, {'mes': 13, 'ano': 2025}, {'mes': 1, 'ano': 2025, 'meses': 'x'}):
+                with self.subTest(url=url, params=params):
+                    self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    def test_exportar_excel(self):
+        url = reverse('exportar-excel', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 2, 'ano': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+
+    def test_exportar_excel_ano_inteiro(self):
+        url = reverse('exportar-excel', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 1, 'ano': 2025, 'meses': 12})
+        self.assertIn('janeiro_2025_a_dezembro_2025.xlsx', response['Content-Disposition'])
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws['A1'].value, 'Casa - Resumo de Janeiro a Dezembro de 2025')
+        self.assertEqual(ws['A4'].value, Decimal('6903.00'))
+        self.assertEqual(ws['B4'].value, Decimal('3000.00'))
+        self.assertEqual(ws.max_row, 6 + 12)
+        self.assertIn('A1:D1', [str(r) for r in ws.merged_cells.ranges])
+
+    def test_exportacao_em_cache_com_etag(self):
+        url = reverse('exportar-pdf', kwargs={'pk': self.grupo.pk})
+        primeira = self.client.get(url, {'mes': 2, 'ano': 2025})
+        conteudo = b''.join(primeira.streaming_content)
+        etag = primeira['ETag']
+        self.assertEqual(len(list(self.diretorio_cache.iterdir())), 1)
+
+        nao_modificado = self.client.get(url, {'mes': 2, 'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(nao_modificado.status_code, 304)
+        segunda = self.client.get(url, {'mes': 2, 'ano': 2025})
+        self.assertEqual(b''.join(segunda.streaming_content), conteudo)
+
+        # Alterar uma conta do mês muda o ETag e limpa o cache do grupo
+        conta = self.grupo.contas.get(descricao='Luz 2')
+        conta.valor = Decimal('175.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            conta.save()
+        self.assertEqual(list(self.diretorio_cache.iterdir()), [])
+        alterada = self.client.get(url, {'mes': 2, 'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(alterada.status_code, 200)
+        self.assertNotEqual(alterada['ETag'], etag)
+
+    def test_exportacao_assincrona(self):
+        url = reverse('exportar-excel', kwargs={'pk': self.grupo.pk})
+        with override_settings(EXPORT_JOBS_DIR=str(self.diretorio_cache / 'tarefas')):
+            tarefa = self.client.get(url, {'mes': 1, 'ano': 2025, 'meses': 12, 'assincrono': 1}).json()
+            self.assertEqual(tarefa['status'], TarefaExportacao.PENDENTE)
+            call_command('run_export_worker', processos=1, uma_vez=True, stdout=StringIO())
+            tarefa = self.client.get(tarefa['url_status']).json()
+            self.assertEqual(tarefa['status'], TarefaExportacao.CONCLUIDA)
+            response = self.client.get(tarefa['url_download'])
+            ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws.max_row, 6 + 12)
+
+        outro = User.objects.create_user('bia', password='senha-forte-123')
+        self.client.force_login(outro)
+        self.assertEqual(self.client.get(tarefa['url_download']).status_code, 404)
+
+    def test_cache_de_exportacoes_despeja_menos_usadas(self):
+        url = reverse('exportar-excel', kwargs={'pk': self.grupo.pk})
+        with override_settings(EXPORT_CACHE_MAX_BYTES=1):
+            for mes in (1, 2, 3):
+                b''.join(self.client.get(url, {'mes': mes, 'ano': 2025}).streaming_content)
+        self.assertEqual(len(list(self.diretorio_cache.iterdir())), 1)
+
+
+class ImportacaoTests(BaseFinanceiroTestCase):
+
+    CSV = (
+        'descricao;valor;data_vencimento;pago;data_pagamento\n'
+        'Condomínio;1.234,56;05/07/2025;sim;04/07/2025\n'
+        'Água;89.90;2025-07-15;não;\n'
+        ';10,00;01/07/2025;;\n'
+        'Gás;abc;32/07/2025;;\n'
+    ).encode()
+
+    OFX = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250710120000<TRNAMT>-150.00<MEMO>Internet</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250711<TRNAMT>3000.00<MEMO>Salario</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+    def test_importar_csv_pelo_comando(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as arquivo:
+            arquivo.write(self.CSV)
+            arquivo.flush()
+            saida, erros = StringIO(), StringIO()
+            call_command('importar_contas', arquivo.name, grupo=self.grupo.pk, lote=1,
+                         stdout=saida, stderr=erros)
+        self.assertIn('2 contas importadas', saida.getvalue())
+        self.assertIn('Linha 4: descricao', erros.getvalue())
+        self.assertIn('Linha 5: valor', erros.getvalue())
+        condominio = self.grupo.contas.get(descricao='Condomínio')
+        self.assertEqual(condominio.valor, Decimal('1234.56'))
+        self.assertTrue(condominio.pago)
+        self.assertEqual(condominio.data_pagamento, date(2025, 7, 4))
+        self.assertEqual(resumo_mensal(self.grupo, 2025, 7)[0],
+                         {'ano': 2025, 'mes': 7, 'previsto': Decimal('1324.46'), 'pago': Decimal('1234.56')})
+
+    def test_importar_ofx_pela_view(self):
+        arquivo = SimpleUploadedFile('extrato.ofx', self.OFX)
+        response = self.client.post(reverse('contapagar-importar', kwargs={'pk': self.grupo.pk}),
+                                    {'arquivo': arquivo})
+        self.assertRedirects(response, reverse('grupo-detail', kwargs={'pk': self.grupo.pk}),
+                             fetch_redirect_response=False)
+        internet = self.grupo.contas.get(descricao='Internet')
+        self.assertEqual(internet.valor, Decimal('150.00'))
+        self.assertEqual(internet.data_vencimento, date(2025, 7, 10))
+        self.assertTrue(internet.pago)
+        self.assertFalse(self.grupo.contas.filter(descricao='Salario').exists())
+
+
+class AcoesEmLoteTests(BaseFinanceiroTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('contapagar-lote', kwargs={'pk': self.grupo.pk})
+
+    def post_json(self, dados, **params):
+        url = self.url + ('?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else '')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, dados, content_type='application/json')
+
+    def test_pagar_em_lote_com_um_update(self):
+        ids = list(self.grupo.contas.filter(pago=False).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.post_json({'ids': ids, 'acao': 'pagar', 'data_pagamento': '2025-06-30'},
+                                      mes=6, ano=2025)
+        self.assertEqual(response.status_code, 200)
+        updates = [q['sql'] for q in consultas if q['sql'].startswith('UPDATE "financeiro_contapagar"')]
+        self.assertEqual(len(updates), 1)
+        dados = response.json()
+        self.assertEqual(dados['afetadas'], len(ids))
+        self.assertEqual(Decimal(dados['totais']['pago']), Decimal('1150.50'))
+        self.assertEqual(Decimal(dados['totais']['pendente']), Decimal('0'))
+        self.assertFalse(self.grupo.contas.filter(pago=False).exists())
+        self.assertEqual(set(self.grupo.contas.filter(pk__in=ids).values_list('data_pagamento', flat=True)),
+                         {date(2025, 6, 30)})
+        self.assertResumoConsistente(self.grupo)
+
+    def test_pagar_em_lote_mantem_data_das_ja_pagas(self):
+        paga = self.grupo.contas.filter(pago=True).first()
+        paga.data_pagamento = date(2025, 2, 8)
+        paga.save()
+        pendente = self.grupo.contas.filter(pago=False).first()
+        response = self.post_json({'ids': [paga.pk, pendente.pk], 'acao': 'pagar',
+                                   'data_pagamento': '2025-06-30'})
+        self.assertEqual(response.json()['afetadas'], 1)
+        paga.refresh_from_db()
+        pendente.refresh_from_db()
+        self.assertEqual(paga.data_pagamento, date(2025, 2, 8))
+        self.assertEqual(pendente.data_pagamento, date(2025, 6, 30))
+        self.assertResumoConsistente(self.grupo)
+
+    def test_excluir_e_mover_em_lote(self):
+        outro = Grupo.objects.create(usuario=self.usuario, nome='Trabalho')
+        luz = list(self.grupo.contas.filter(descricao__startswith='Luz').values_list('pk', flat=True))
+        self.post_json({'ids': luz[:3], 'acao': 'excluir'})
+        response = self.post_json({'ids': luz[3:], 'acao': 'mover', 'destino': outro.pk})
+        self.assertEqual(response.json()['afetadas'], 3)
+        self.assertEqual(self.grupo.contas.count(), 6)
+        self.assertEqual(outro.contas.count(), 3)
+        self.assertResumoConsistente(self.grupo)
+        self.assertResumoConsistente(outro)
+
+    def test_contas_de_outro_usuario_nao_sao_afetadas(self):
+        intruso = User.objects.create_user('bruno', password='senha-forte-123')
+        alheio = Grupo.objects.create(usuario=intruso, nome='Alheio')
+        conta = ContaPagar.objects.create(grupo=alheio, descricao='Água', valor=Decimal('80.00'),
+                                          data_vencimento=date(2025, 6, 5))
+        response = self.post_json({'ids': [conta.pk], 'acao': 'excluir'})
+        self.assertEqual(response.json()['afetadas'], 0)
+        self.assertTrue(ContaPagar.objects.filter(pk=conta.pk).exists())
+
+        response = self.post_json({'ids': [conta.pk], 'acao': 'mover', 'destino': alheio.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_formulario_da_pagina_do_grupo(self):
+        ids = self.grupo.contas.filter(descricao__startswith='Aluguel').values_list('pk', flat=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'ids': list(ids), 'acao': 'desfazer_pagamento'})
+        self.assertRedirects(response, reverse('grupo-detail', kwargs={'pk': self.grupo.pk}),
+                             fetch_redirect_response=False)
+        self.assertFalse(self.grupo.contas.filter(pago=True).exists())
+        self.assertResumoConsistente(self.grupo)
+
+
+class ContaRecorrenteTests(BaseFinanceiroTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.internet = ContaRecorrente.objects.create(
+            grupo=cls.grupo, descricao='Internet', valor=Decimal('99.90'),
+            dia=31, data_inicio=date(2025, 1, 15), data_fim=date(2025, 12, 31),
+        )
+
+    def test_ocorrencias_por_frequencia(self):
+        self.assertEqual(list(ocorrencias(self.internet, date(2025, 1, 1), date(2025, 4, 1))),
+                         [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)])
+        semanal = ContaRecorrente(frequencia=ContaRecorrente.SEMANAL, dia=1, data_inicio=date(2025, 6, 4))
+        self.assertEqual(list(ocorrencias(semanal, date(2025, 6, 10), date(2025, 6, 26))),
+                         [date(2025, 6, 11), date(2025, 6, 18), date(2025, 6, 25)])
+        anual = ContaRecorrente(frequencia=ContaRecorrente.ANUAL, dia=10, data_inicio=date(2024, 3, 1))
+        self.assertEqual(list(ocorrencias(anual, date(2024, 1, 1), date(2026, 1, 1))),
+                         [date(2024, 3, 10), date(2025, 3, 10)])
+
+    def test_ocorrencia_virtual_no_dashboard_sem_gravar(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 6, 'ano': 2025})
+        self.assertEqual(response.context['total_previsto'], Decimal('1250.40'))
+        self.assertEqual(json.loads(response.context['chart_historico_previsto'])[0], 1250.40)
+        virtual = [c for c in response.context['contas'] if c['pk'] is None]
+        self.assertEqual([(c['descricao'], c['data_vencimento']) for c in virtual],
+                         [('Internet', date(2025, 6, 30))])
+        self.assertFalse(self.grupo.contas.filter(recorrencia=self.internet).exists())
+
+    def test_pagar_ocorrencia_materializa_uma_vez(self):
+        url = reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-06-30'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'acao': 'pagar'})
+            self.client.post(url, {'acao': 'pagar'})
+        conta = self.grupo.contas.get(recorrencia=self.internet)
+        self.assertTrue(conta.pago)
+        self.assertEqual(conta.ocorrencia, date(2025, 6, 30))
+
+        response = self.client.get(reverse('grupo-detail', kwargs={'pk': self.grupo.pk}), {'mes': 6, 'ano': 2025})
+        self.assertEqual(response.context['total_previsto'], Decimal('1250.40'))
+        self.assertEqual(response.context['total_pago'], Decimal('1099.90'))
+        self.assertEqual(len(response.context['contas']), 3)
+
+        invalida = reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-06-15'])
+        self.assertEqual(self.client.post(invalida).status_code, 404)
+
+    def test_exportacao_inclui_ocorrencias_virtuais(self):
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(EXPORT_CACHE_DIR=diretorio):
+            response = self.client.get(reverse('exportar-excel', kwargs={'pk': self.grupo.pk}),
+                                       {'mes': 6, 'ano': 2025})
+            ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        descricoes = [linha[2] for linha in ws.iter_rows(min_row=7, values_only=True)]
+        self.assertEqual(descricoes, ['Aluguel 6', 'Luz 6', 'Internet'])
+        self.assertEqual(ws['A4'].value, 1250.4)
+
+    def test_ocorrencia_excluida_nao_volta_como_virtual(self):
+        def virtuais(mes):
+            response = self.client.get(reverse('grupo-detail', kwargs={'pk': self.grupo.pk}),
+                                       {'mes': mes, 'ano': 2025})
+            return [c['data_vencimento'] for c in response.context['contas'] if c['pk'] is None]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Ocorrência gravada e depois excluída
+            self.client.post(reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-06-30']),
+                             {'acao': 'pagar'})
+            conta = self.grupo.contas.get(recorrencia=self.internet)
+            self.client.post(reverse('contapagar-delete', kwargs={'pk': conta.pk}))
+            # Ocorrência virtual excluída sem ser gravada
+            response = self.client.post(
+                reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-05-31']),
+                {'acao': 'excluir'},
+            )
+            # Ocorrência gravada e excluída em lote
+            self.client.post(reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-04-30']),
+                             {'acao': 'pagar'})
+            conta = self.grupo.contas.get(recorrencia=self.internet)
+            self.client.post(reverse('contapagar-lote', kwargs={'pk': self.grupo.pk}),
+                             {'ids': [conta.pk], 'acao': 'excluir'}, content_type='application/json')
+        self.assertRedirects(response, reverse('grupo-detail', kwargs={'pk': self.grupo.pk}) + '?mes=5&ano=2025',
+                             fetch_redirect_response=False)
+        self.assertFalse(self.grupo.contas.filter(recorrencia=self.internet).exists())
+        self.assertEqual(set(self.internet.canceladas.values_list('ocorrencia', flat=True)),
+                         {date(2025, 4, 30), date(2025, 5, 31), date(2025, 6, 30)})
+        self.assertEqual(virtuais(4) + virtuais(5) + virtuais(6), [])
+        self.assertEqual(virtuais(7), [date(2025, 7, 31)])
+
+        saida = StringIO()
+        call_command('materializar_recorrentes', '--ate', '2025-06-30', stdout=saida)
+        self.assertIn('3 contas criadas', saida.getvalue())
+        self.assertFalse(self.grupo.contas.filter(ocorrencia__gte=date(2025, 4, 1)).exists())
+
+    def test_materializar_recorrentes_idempotente(self):
+        self.client.post(reverse('contarecorrente-materializar', args=[self.internet.pk, '2025-02-28']),
+                         {'acao': 'pagar'})
+        saida = StringIO()
+        call_command('materializar_recorrentes', '--ate', '2025-06-30', stdout=saida)
+        self.assertIn('5 contas criadas', saida.getvalue())
+        ContaRecorrente.objects.create(grupo=self.grupo, descricao='Academia', valor=Decimal('90.00'), dia=1,
+                                       data_inicio=date(2025, 5, 1))
+        saida = StringIO()
+        call_command('materializar_recorrentes', '--ate', '2025-06-30', stdout=saida)
+        self.assertIn('2 contas criadas', saida.getvalue())
+        # Savepoint + regras travadas + ocorrências gravadas ou canceladas (uma
+        # consulta, e não uma por regra) + regras + release
+        saida = StringIO()
+        with self.assertNumQueries(5):
+            call_command('materializar_recorrentes', '--ate', '2025-06-30', stdout=saida)
+        self.assertIn('0 contas criadas', saida.getvalue())
+        self.assertEqual(self.grupo.contas.filter(recorrencia=self.internet).count(), 6)
+        self.assertResumoConsistente()
+
+
+class ApiTests(BaseFinanceiroTestCase):
+
+    def test_lista_de_contas_paginada_por_cursor(self):
+        url = reverse('api-grupo-contas', kwargs={'pk': self.grupo.pk})
+        vistas = []
+        proximo = f'{url}?limite=5&campos=valor'
+        while proximo:
+            # sessão + usuário + grupo + página
+            with self.assertNumQueries(4):
+                dados = self.client.get(proximo).json()
+            vistas += dados['resultados']
+            proximo = dados['proximo']
+        self.assertEqual(len(vistas), 12)
+        self.assertEqual(set(vistas[0]), {'id', 'data_vencimento', 'valor'})
+        esperado = list(self.grupo.contas.order_by('data_vencimento', 'id').values_list('id', flat=True))
+        self.assertEqual([conta['id'] for conta in vistas], esperado)
+
+        dados = self.client.get(url, {'de': '2025-03-01', 'ate': '2025-05-01', 'pago': '0'}).json()
+        self.assertEqual([c['descricao'] for c in dados['resultados']], ['Aluguel 3', 'Luz 3', 'Luz 4'])
+        self.assertEqual(self.client.get(url, {'campos': 'senha'}).status_code, 400)
+
+    def test_criar_alterar_e_excluir_conta(self):
+        url = reverse('api-grupo-contas', kwargs={'pk': self.grupo.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'descricao': 'Internet', 'valor': '99.90',
+                                              'data_vencimento': '2025-06-15'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        detalhe = reverse('api-conta-detalhe', kwargs={'pk': response.json()['id']})
+
+        response = self.client.patch(detalhe, {'pago': True, 'data_pagamento': '2025-06-14'},
+                                     content_type='application/json')
+        self.assertEqual(response.json()['pago'], True)
+        self.assertEqual(response.json()['descricao'], 'Internet')
+        resumo = self.client.get(reverse('api-grupo-resumo', kwargs={'pk': self.grupo.pk}),
+                                 {'mes': 6, 'ano': 2025}).json()['meses'][0]
+        self.assertEqual((Decimal(resumo['previsto']), Decimal(resumo['pago']), Decimal(resumo['pendente'])),
+                         (Decimal('1250.40'), Decimal('1099.90'), Decimal('150.50')))
+
+        self.assertEqual(self.client.delete(detalhe).status_code, 204)
+        self.assertEqual(self.client.get(detalhe).status_code, 404)
+
+    def test_grafico_com_janela_em_cache(self):
+        url = reverse('api-grupo-grafico', kwargs={'pk': self.grupo.pk})
+        response = self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12})
+        dados = response.json()
+        self.assertEqual(dados['titulo'], 'Junho 2025')
+        self.assertEqual(dados['totais'], {'previsto': 1150.5, 'pago': 1000.0, 'pendente': 150.5})
+        self.assertEqual(len(dados['historico']['rotulos']), 12)
+        self.assertEqual(dados['historico']['rotulos'][-1], 'Jun/2025')
+        self.assertEqual(dados['historico']['previsto'][-1], 1150.5)
+        self.assertEqual(len(self.client.get(url, {'mes': 6, 'ano': 2025}).json()['historico']['pago']), 6)
+
+        # sessão + usuário + grupo; o resto vem do cache
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12}).json(), dados)
+        response = self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContaPagar.objects.create(grupo=self.grupo, descricao='Internet', valor=Decimal('100.00'),
+                                      data_vencimento=date(2025, 6, 20))
+        dados = self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12}).json()
+        self.assertEqual(dados['totais']['previsto'], 1250.5)
+
+        # Alteração feita por outro processo: só o carimbo do grupo muda no banco
+        response = self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12})
+        ContaPagar.objects.filter(descricao='Internet').update(valor=Decimal('200.00'))
+        call_command('rebuild_resumos', stdout=StringIO())
+        Grupo.objects.filter(pk=self.grupo.pk).update(atualizado_em=timezone.now())
+        novo = self.client.get(url, {'mes': 6, 'ano': 2025, 'meses': 12}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(novo.status_code, 200)
+        self.assertNotEqual(novo['ETag'], response['ETag'])
+        self.assertEqual(novo.json()['totais']['previsto'], 1350.5)
+        self.assertEqual(self.client.get(url, {'mes': 13}).status_code, 400)
+
+    def test_isolamento_entre_usuarios(self):
+        intruso = User.objects.create_user('bruno', password='senha-forte-123')
+        alheio = Grupo.objects.create(usuario=intruso, nome='Alheio')
+        conta = self.grupo.contas.first()
+        self.client.force_login(intruso)
+        self.assertEqual(self.client.get(reverse('api-conta-detalhe', kwargs={'pk': conta.pk})).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api-grupo-contas', kwargs={'pk': self.grupo.pk})).status_code, 404)
+        # Mover uma conta própria para o grupo de outro usuário não é permitido
+        self.client.force_login(self.usuario)
+        response = self.client.patch(reverse('api-conta-detalhe', kwargs={'pk': conta.pk}),
+                                     {'grupo': alheio.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([g['nome'] for g in self.client.get(reverse('api-grupos')).json()['resultados']],
+                         ['Casa'])
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-grupos')).status_code, 401)
+
+
+class ViewsAssincronasTests(BaseFinanceiroTestCase):
+
+    def requisicao(self, url, **params):
+        request = AsyncRequestFactory().get(url, params)
+        usuario = self.usuario
+
+        async def auser():
+            return usuario
+        request.user, request.auser = usuario, auser
+        return request
+
+    async def test_dashboard_assincrono_igual_ao_sincrono(self):
+        esperado = await sync_to_async(
+            lambda: GrupoDetailView(object=self.grupo).montar_dashboard(6, 2025)
+        )()
+        self.assertEqual(await amontar_dashboard(self.grupo, 6, 2025), esperado)
+
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        response = await views_async.grupo_detalhe(self.requisicao(url, mes=6, ano=2025), pk=self.grupo.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Aluguel 6')
+
+    async def test_api_assincrona(self):
+        url = reverse('api-grupo-contas', kwargs={'pk': self.grupo.pk})
+        response = await api.agrupo_contas(self.requisicao(url, limite=5), pk=self.grupo.pk)
+        dados = json.loads(response.content)
+        self.assertEqual(len(dados['resultados']), 5)
+        self.assertIsNotNone(dados['proximo'])
+
+        url = reverse('api-grupo-resumo', kwargs={'pk': self.grupo.pk})
+        response = await api.agrupo_resumo(self.requisicao(url, mes=1, ano=2025, meses=6), pk=self.grupo.pk)
+        self.assertEqual(len(json.loads(response.content)['meses']), 6)
+
+    def test_perfil_asgi_sem_middleware_sincrono(self):
+        # Só o WhiteNoise, que sai da lista com ASYNC_VIEWS, obrigaria o modo síncrono
+        sincronos = [
+            caminho for caminho in settings.MIDDLEWARE
+            if not getattr(import_string(caminho), 'async_capable', False)
+        ]
+        self.assertEqual(sincronos, ['whitenoise.middleware.WhiteNoiseMiddleware'])
+
+    async def test_estaticos_servidos_antes_do_django(self):
+        async def django(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def chamar(app, caminho):
+            comunicador = ApplicationCommunicator(app, {
+                'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': caminho, 'query_string': b'',
+                'headers': [], 'root_path': '', 'scheme': 'http', 'server': ('testserver', 80),
+            })
+            await comunicador.send_input({'type': 'http.request', 'body': b''})
+            inicio = await comunicador.receive_output()
+            corpo = b''
+            while True:
+                mensagem = await comunicador.receive_output()
+                corpo += mensagem.get('body', b'')
+                if not mensagem.get('more_body'):
+                    return inicio['status'], corpo
+
+        with tempfile.TemporaryDirectory() as pasta:
+            (Path(pasta) / 'app.css').write_text('body{}')
+            with override_settings(STATIC_ROOT=pasta):
+                app = await sync_to_async(lambda: EstaticosAsgi(django))()
+            self.assertEqual(await chamar(app, '/static/app.css'), (200, b'body{}'))
+            self.assertEqual(await chamar(app, '/grupos/'), (204, b''))
+
+
+class DesempenhoTests(BaseFinanceiroTestCase):
+
+    def test_server_timing_e_amostra_da_rota(self):
+        response = self.client.get(reverse('grupo-detail', kwargs={'pk': self.grupo.pk}), {'mes': 6, 'ano': 2025})
+        tempos = response['Server-Timing']
+        self.assertIn('total;dur=', tempos)
+        self.assertIn('db;dur=', tempos)
+        self.assertIn('desc="6 consultas"', tempos)
+        self.assertIn('tpl;dur=', tempos)
+
+        total_ms, consultas, db_ms, template_ms, tamanho = desempenho._amostras['grupo-detail'][-1]
+        self.assertEqual(consultas, 6)
+        self.assertGreater(template_ms, 0)
+        self.assertGreaterEqual(total_ms, db_ms + template_ms)
+        self.assertEqual(tamanho, len(response.content))
+
+    async def test_middleware_assincrono_mede_consultas(self):
+        async def view(request):
+            return HttpResponse(str(await Grupo.objects.acount()))
+
+        middleware = desempenho.MedicaoDesempenhoMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.content, b'1')
+        self.assertIn('desc="1 consultas"', response['Server-Timing'])
+
+    @override_settings(PERF_LENTO_MS=0, PERF_TOP_CONSULTAS=2)
+    def test_requisicao_lenta_no_log_com_consultas_mais_lentas(self):
+        with self.assertLogs('financeiro.desempenho', 'WARNING') as log:
+            self.client.get(reverse('grupo-list'))
+        self.assertIn('(grupo-list)', log.output[0])
+        self.assertEqual(log.output[0].count('SELECT'), 2)
+
+    def test_perf_report_junta_medicoes_gravadas(self):
+        with tempfile.TemporaryDirectory() as diretorio, \
+                override_settings(PERF_DIR=diretorio, PERF_INTERVALO_GRAVACAO=0):
+            self.client.get(reverse('api-grupos'))
+            self.assertTrue(list(Path(diretorio).glob('*.json')))
+
+            saida = StringIO()
+            call_command('perf_report', '--json', stdout=saida)
+            rota = json.loads(saida.getvalue())['rotas']['api-grupos']
+            self.assertGreaterEqual(rota['requisicoes'], 1)
+            self.assertEqual(sum(rota['histograma']), rota['requisicoes'])
+
+            saida = StringIO()
+            call_command('perf_report', '--histograma', '--limpar', stdout=saida)
+            self.assertIn('api-grupos', saida.getvalue())
+            self.assertFalse(Path(diretorio).exists())
+
+    def test_perf_report_mostra_acertos_do_cache(self):
+        url = reverse('grupo-detail', kwargs={'pk': self.grupo.pk})
+        for _ in range(3):
+            self.client.get(url, {'mes': 6, 'ano': 2025})
+        saida = StringIO()
+        call_command('perf_report', '--json', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue())['cache_dashboard'],
+                         {'hits': 2, 'misses': 1, 'taxa_acerto': 2 / 3, 'compartilhado': False})
+
+        saida = StringIO()
+        call_command('perf_report', '--limpar', stdout=saida)
+        self.assertIn('Cache do dashboard: 2 acertos, 1 falhas (67%)', saida.getvalue())
+        self.assertEqual(estatisticas_cache()['hits'], 0)
+
+    def test_perf_report_ignora_processos_encerrados(self):
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(PERF_DIR=diretorio, PERF_VALIDADE=60):
+            antigo = Path(diretorio) / '1.json'
+            antigo.write_text(json.dumps({
+                'pid': 1, 'gravado_em': time.time() - 61, 'amostras': {'api-grupos': [[1, 1, 1, 0, 10]]},
+            }))
+            recente = Path(diretorio) / '2.json'
+            recente.write_text(json.dumps({
+                'pid': 2, 'gravado_em': time.time(), 'amostras': {'grupo-list': [[2, 3, 1, 1, 20]]},
+            }))
+            self.assertEqual(dict(desempenho.ler_instantaneos()), {'grupo-list': [(2, 3, 1, 1, 20)]})
+            self.assertFalse(antigo.exists())
+            self.assertTrue(recente.exists())
+
+
+class DadosSinteticosTests(TestCase):
+
+    def test_gera_usuarios_grupos_e_contas_com_resumos(self):
+        saida = StringIO()
+        call_command('gerar_dados_sinteticos', usuarios=2, grupos=3, contas=40, meses=6, semente=7, stdout=saida)
+        self.assertIn('2 usuários, 6 espaços e 240 contas', saida.getvalue())
+        self.assertTrue(self.client.login(username='sintetico1', password='senha-sintetica'))
+
+        contas = ContaPagar.objects.filter(grupo__usuario__username__startswith='sintetico')
+        self.assertEqual(contas.count(), 240)
+        hoje = date.today()
+        self.assertFalse(contas.filter(pago=True, data_pagamento__gt=hoje).exists())
+        self.assertFalse(contas.filter(pago=False, data_pagamento__isnull=False).exists())
+        # Resumos recalculados, já que bulk_create não dispara os sinais
+        total = sum(ResumoMensal.objects.values_list('total_previsto', flat=True))
+        self.assertEqual(total, sum(contas.values_list('valor', flat=True)))
+
+        with self.assertRaises(CommandError):
+            call_command('gerar_dados_sinteticos', usuarios=1, stdout=StringIO())
+
+    def test_mesma_semente_gera_mesmos_dados(self):
+        gerar_dados(1, 1, 30, meses=3, semente=5, prefixo='a', hoje=date(2025, 6, 1))
+        gerar_dados(1, 1, 30, meses=3, semente=5, prefixo='b', hoje=date(2025, 6, 1))
+        campos = ('descricao', 'valor', 'data_vencimento', 'pago', 'data_pagamento')
+        primeiro, segundo = (
+            list(ContaPagar.objects.filter(grupo__usuario__username=nome).order_by('pk').values_list(*campos))
+            for nome in ('a0', 'b0')
+        )
+        self.assertEqual(primeiro, segundo)
+        self.assertTrue(all(date(2025, 6, 1) <= linha[2] < date(2025, 9, 1) for linha in primeiro))
+
+
+class OrcamentoConsultasTests(BaseFinanceiroTestCase):
+    """
+    Máximo de consultas por rota de financeiro/urls.py, com o detector de N+1
+    em modo 'erro'. Uma rota nova precisa entrar em ORCAMENTOS.
+    """
+
+    # nome da rota: (método, consultas no máximo)
+    ORCAMENTOS = {
+        'login': ('get', 2),
+        'logout': ('post', 4),
+        'register': ('get', 2),
+        'grupo-list': ('get', 6),
+        'grupo-create': ('get', 2),
+        'grupo-detail': ('get', 7),
+        'grupo-contas': ('get', 6),
+        'grupo-update': ('get', 3),
+        'grupo-delete': ('get', 3),
+        'contapagar-create': ('get', 3),
+        'contapagar-update': ('get', 4),
+        'contapagar-delete': ('get', 3),
+        'contapagar-importar': ('get', 3),
+        'contapagar-lote': ('post', 14),
+        'contapagar-busca': ('get', 3),
+        'contarecorrente-list': ('get', 4),
+        'contarecorrente-create': ('get', 3),
+        'contarecorrente-update': ('get', 3),
+        'contarecorrente-delete': ('get', 3),
+        'contarecorrente-materializar': ('post', 14),
+        'exportar-pdf': ('get', 9),
+        'exportar-excel': ('get', 9),
+        'exportacao-status': ('get', 3),
+        'exportacao-download': ('get', 3),
+        'api-grupos': ('get', 4),
+        'api-grupos-autocompletar': ('get', 3),
+        'api-grupo-detalhe': ('get', 3),
+        'api-grupo-resumo': ('get', 6),
+        'api-grupo-grafico': ('get', 6),
+        'api-grupo-contas': ('get', 4),
+        'api-contas-busca': ('get', 3),
+        'api-conta-detalhe': ('get', 3),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Várias contas no mesmo mês, para um N+1 aparecer como consultas repetidas
+        for dia in range(1, 8):
+            ContaPagar.objects.create(grupo=cls.grupo, descricao=f'Mercado {dia}', valor=Decimal('80.00'),
+                                      data_vencimento=date(2025, 6, dia))
+        cls.conta = cls.grupo.contas.first()
+        cls.recorrente = ContaRecorrente.objects.create(
+            grupo=cls.grupo, descricao='Internet', valor=Decimal('99.90'), dia=5, data_inicio=date(2025, 1, 1),
+        )
+        cls.tarefa = TarefaExportacao.objects.create(
+            usuario=cls.usuario, grupo=cls.grupo, formato='pdf', mes=6, ano=2025,
+        )
+
+    def requisicao(self, nome):
+        """(url, dados) de uma requisição típica à rota."""
+        grupo, mes = {'pk': self.grupo.pk}, {'mes': 6, 'ano': 2025}
+        ids = list(self.grupo.contas.filter(data_vencimento__month=6).values_list('pk', flat=True))
+        return {
+            'grupo-detail': (grupo, mes),
+            'grupo-contas': (grupo, {**mes, 'apos': api.codificar_cursor(date(2025, 6, 1), 0)}),
+            'grupo-list': ({}, mes),
+            'grupo-update': (grupo, {}),
+            'grupo-delete': (grupo, {}),
+            'contapagar-create': ({'grupo_id': self.grupo.pk}, {}),
+            'contapagar-update': ({'pk': self.conta.pk}, {}),
+            'contapagar-delete': ({'pk': self.conta.pk}, {}),
+            'contapagar-importar': (grupo, {}),
+            'contapagar-lote': (grupo, {'ids': ids, 'acao': 'pagar'}),
+            'contarecorrente-list': (grupo, {}),
+            'contarecorrente-create': (grupo, {}),
+            'contarecorrente-update': ({'pk': self.recorrente.pk}, {}),
+            'contarecorrente-delete': ({'pk': self.recorrente.pk}, {}),
+            'contarecorrente-materializar': ({'pk': self.recorrente.pk, 'ocorrencia': '2025-06-05'},
+                                             {'acao': 'pagar'}),
+            'exportar-pdf': (grupo, {**mes, 'meses': 3}),
+            'exportar-excel': (grupo, {**mes, 'meses': 3}),
+            'exportacao-status': ({'pk': self.tarefa.pk}, {}),
+            'exportacao-download': ({'pk': self.tarefa.pk}, {}),
+            'api-grupo-detalhe': (grupo, {}),
+            'api-grupo-resumo': (grupo, {**mes, 'meses': 6}),
+            'api-grupo-grafico': (grupo, {**mes, 'meses': 12}),
+            'api-grupo-contas': (grupo, {'limite': 50}),
+            'api-conta-detalhe': ({'pk': self.conta.pk}, {}),
+            'contapagar-busca': ({}, {'q': 'mercado'}),
+            'api-contas-busca': ({}, {'q': 'mercado', 'pago': '0'}),
+        }.get(nome, ({}, {}))
+
+    # Ações de 'contapagar-lote' além da requisição típica ('pagar')
+    ORCAMENTOS_LOTE = {
+        'desfazer_pagamento': 14,
+        'excluir': 14,
+    }
+
+    def test_toda_rota_tem_orcamento(self):
+        self.assertEqual({rota.name for rota in urlpatterns}, set(self.ORCAMENTOS))
+
+    def test_consultas_dentro_do_orcamento(self):
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(
+            EXPORT_CACHE_DIR=diretorio, CONSULTAS_REPETIDAS_ACAO='erro', CONSULTAS_REPETIDAS_LIMITE=3,
+        ):
+            for nome, (metodo, maximo) in self.ORCAMENTOS.items():
+                with self.subTest(rota=nome):
+                    cache.clear()
+                    self.client.force_login(self.usuario)
+                    kwargs, dados = self.requisicao(nome)
+                    with CaptureQueriesContext(connection) as consultas:
+                        response = getattr(self.client, metodo)(reverse(nome, kwargs=kwargs), dados)
+                    self.assertLess(response.status_code, 500)
+                    self.assertLessEqual(len(consultas), maximo, '\n'.join(q['sql'] for q in consultas))
+
+    def test_acoes_em_lote_dentro_do_orcamento(self):
+        kwargs, dados = self.requisicao('contapagar-lote')
+        self.assertGreater(len(dados['ids']), 3)
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(
+            EXPORT_CACHE_DIR=diretorio, CONSULTAS_REPETIDAS_ACAO='erro', CONSULTAS_REPETIDAS_LIMITE=3,
+        ):
+            for acao, maximo in self.ORCAMENTOS_LOTE.items():
+                with self.subTest(acao=acao):
+                    with CaptureQueriesContext(connection) as consultas, \
+                            self.captureOnCommitCallbacks(execute=True) as callbacks:
+                        response = self.client.post(reverse('contapagar-lote', kwargs=kwargs),
+                                                    {**dados, 'acao': acao})
+                    self.assertEqual(response.status_code, 302)
+                    self.assertLessEqual(len(consultas), maximo, '\n'.join(q['sql'] for q in consultas))
+                    # Uma invalidação por grupo, e não por conta
+                    self.assertEqual(len(callbacks), 1)
+        self.assertFalse(ContaPagar.objects.filter(pk__in=dados['ids']).exists())
+
+    def test_detector_de_consultas_repetidas(self):
+        def executar(sql, params, many, context):
+            return None
+
+        sql = 'SELECT "x"."id" FROM "x" WHERE "x"."grupo_id" IN (%s, %s)'
+        medicao = desempenho.Medicao(0, 3, 'erro')
+        medicao(executar, sql, (1, 2), False, {})
+        medicao(executar, sql.replace('%s, %s', '%s, %s, %s'), (1, 2, 3), False, {})
+        medicao(executar, 'UPDATE "x" SET "pago" = %s', (True,), False, {})
+        with self.assertRaisesMessage(desempenho.ConsultasRepetidas, 'provável N+1'):
+            medicao(executar, sql, (3, 4), False, {})
+
+        medicao = desempenho.Medicao(0, 2, 'log')
+        with self.assertLogs('financeiro.desempenho', 'WARNING') as log:
+            for _ in range(3):
+                medicao(executar, sql, (1, 2), False, {})
+        self.assertEqual(len(log.output), 1)
+        self.assertIn('financeiro/tests.py', log.output[0])
+
+
+class ContaPagarFormTests(BaseFinanceiroTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.outro = Grupo.objects.create(usuario=cls.usuario, nome='Apartamento')
+        intruso = User.objects.create_user('bruno', password='senha-forte-123')
+        cls.alheio = Grupo.objects.create(usuario=intruso, nome='Alheio')
+
+    def test_grupos_limitados_ao_usuario(self):
+        conta = self.grupo.contas.first()
+        response = self.client.get(reverse('contapagar-update', kwargs={'pk': conta.pk}))
+        self.assertEqual([nome for _, nome in response.context['form'].fields['grupo'].choices][1:],
+                         ['Apartamento', 'Casa'])
+        self.assertNotContains(response, 'Alheio')
+
+        response = self.client.post(reverse('contapagar-update', kwargs={'pk': conta.pk}), {
+            'grupo': self.alheio.pk, 'descricao': 'Luz', 'valor': '10.00', 'data_vencimento': '2025-06-10',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('grupo', response.context['form'].errors)
+        self.assertFalse(self.alheio.contas.exists())
+
+    def test_nova_conta_busca_o_grupo_uma_vez_e_nao_lista_grupos(self):
+        url = reverse('contapagar-create', kwargs={'grupo_id': self.grupo.pk})
+        # sessão + usuário + grupo da URL
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, f'type="hidden" name="grupo" value="{self.grupo.pk}"')
+        self.assertEqual(response.context['grupo'], self.grupo)
+        url_alheio = reverse('contapagar-create', kwargs={'grupo_id': self.alheio.pk})
+        self.assertEqual(self.client.get(url_alheio).status_code, 404)
+
+    def test_muitos_grupos_usam_autocompletar(self):
+        Grupo.objects.bulk_create(Grupo(usuario=self.usuario, nome=f'Filial {n:02d}') for n in range(60))
+        conta = self.grupo.contas.first()
+        response = self.client.get(reverse('contapagar-update', kwargs={'pk': conta.pk}))
+        self.assertContains(response, f'data-autocompletar="{reverse("api-grupos-autocompletar")}"')
+        self.assertContains(response, '<option value="', count=2)  # vazio + grupo atual
+
+        dados = self.client.get(reverse('api-grupos-autocompletar'), {'q': 'filial 0'}).json()
+        self.assertEqual([g['nome'] for g in dados['resultados']], [f'Filial 0{n}' for n in range(10)])
+        self.assertEqual(len(self.client.get(reverse('api-grupos-autocompletar')).json()['resultados']), 20)
+
+
+class BuscaContasTests(BaseFinanceiroTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.apartamento = Grupo.objects.create(usuario=cls.usuario, nome='Apartamento')
+        ContaPagar.objects.create(grupo=cls.apartamento, descricao='Conta de luz', valor=Decimal('89.90'),
+                                  data_vencimento=date(2025, 7, 20))
+        intruso = User.objects.create_user('bruno', password='senha-forte-123')
+        alheio = Grupo.objects.create(usuario=intruso, nome='Alheio')
+        ContaPagar.objects.create(grupo=alheio, descricao='Luz do vizinho', valor=Decimal('50.00'),
+                                  data_vencimento=date(2025, 7, 20))
+
+    def test_busca_por_termo_em_todos_os_grupos_do_usuario(self):
+        response = self.client.get(reverse('contapagar-busca'), {'q': 'luz'})
+        descricoes = [conta.descricao for conta in response.context['contas']]
+        # Vencimento mais recente primeiro; contas de outro usuário ficam de fora
+        self.assertEqual(descricoes, ['Conta de luz'] + [f'Luz {mes}' for mes in range(6, 0, -1)])
+        self.assertContains(response, 'Apartamento')
+        self.assertNotContains(response, 'vizinho')
+
+        response = self.client.get(reverse('contapagar-busca'), {'q': 'conta luz'})
+        self.assertEqual([conta.descricao for conta in response.context['contas']], ['Conta de luz'])
+
+    def test_filtros_e_resposta_parcial(self):
+        response = self.client.get(reverse('contapagar-busca'), {
+            'valor_min': '100', 'pago': '1', 'de': '2025-03-01', 'ate': '2025-07-01', 'parcial': '1',
+        })
+        self.assertEqual([conta.descricao for conta in response.context['contas']], ['Aluguel 6', 'Aluguel 4'])
+        self.assertTemplateNotUsed(response, 'base.html')
+
+    def test_api_de_busca(self):
+        url = reverse('api-contas-busca')
+        dados = self.client.get(url, {'q': 'luz', 'pago': '0', 'limite': 3}).json()
+        self.assertEqual([conta['descricao'] for conta in dados['resultados']], ['Conta de luz', 'Luz 6', 'Luz 5'])
+        self.assertEqual(dados['resultados'][0]['grupo__nome'], 'Apartamento')
+        self.assertTrue(dados['mais'])
+
+        response = self.client.get(url, {'valor_min': '200', 'valor_max': '100'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('valor_max', response.json()['erros'])
+
+    def test_salvar_conta_com_indice_adiado(self):
+        conta = ContaPagar.objects.get(descricao='Conta de luz')
+        self.assertIn('busca', conta.get_deferred_fields())
+        conta.pago = True
+        conta.save()
+        self.assertTrue(ContaPagar.objects.get(pk=conta.pk).pago)
+        # Fora do PostgreSQL não há índice a preencher
+        self.assertEqual(indexar_busca(), 0)
@@ -1,10 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
-    GrupoListView, GrupoCreateView, GrupoUpdateView, GrupoDeleteView, GrupoDetailView,
-    ContaPagarCreateView, ContaPagarUpdateView, ContaPagarDeleteView,
-    exportar_pdf, exportar_excel
+    GrupoListView, GrupoCreateView, GrupoUpdateView, GrupoDeleteView, GrupoDetailView, contas_do_grupo,
+    ContaPagarCreateView, ContaPagarUpdateView, ContaPagarDeleteView, ImportarContasView,
+    contas_em_lote, ContaRecorrenteListView, ContaRecorrenteCreateView, ContaRecorrenteUpdateView,
+    ContaRecorrenteDeleteView, materializar_ocorrencia,
+    exportar_pdf, exportar_excel, exportacao_status, exportacao_download, buscar_contas
 )
 from .views_auth import CustomLoginView, RegisterView, logout_view
+from . import api, views_async
+
+# Perfil ASGI: dashboard do grupo e leituras da API nas versões assíncronas
+if settings.ASYNC_VIEWS:
+    grupo_detail = views_async.grupo_detalhe
+    api_grupo_resumo, api_grupo_contas = api.agrupo_resumo, api.agrupo_contas
+else:
+    grupo_detail = GrupoDetailView.as_view()
+    api_grupo_resumo, api_grupo_contas = api.grupo_resumo, api.grupo_contas
 
 urlpatterns = [
     # Autenticação
@@ -15,7 +27,8 @@ urlpatterns = [
     # Grupos (Espaços)
     path('', GrupoListView.as_view(), name='grupo-list'),
     path('grupo/novo/', GrupoCreateView.as_view(), name='grupo-create'),
-    path('grupo/<int:pk>/', GrupoDetailView.as_view(), name='grupo-detail'),
+    path('grupo/<int:pk>/', grupo_detail, name='grupo-detail'),
+    path('grupo/<int:pk>/contas/', contas_do_grupo, name='grupo-contas'),
     path('grupo/<int:pk>/editar/', GrupoUpdateView.as_view(), name='grupo-update'),
     path('grupo/<int:pk>/excluir/', GrupoDeleteView.as_view(), name='grupo-delete'),
 
@@ -26,8 +39,32 @@ urlpatterns = [
     # Editar/Excluir conta (já tem o ID da conta, não precisa do grupo na URL, mas a view redireciona pro grupo)
     path('conta/<int:pk>/editar/', ContaPagarUpdateView.as_view(), name='contapagar-update'),
     path('conta/<int:pk>/excluir/', ContaPagarDeleteView.as_view(), name='contapagar-delete'),
+    path('grupo/<int:pk>/importar/', ImportarContasView.as_view(), name='contapagar-importar'),
+    path('grupo/<int:pk>/contas/lote/', contas_em_lote, name='contapagar-lote'),
+    path('contas/buscar/', buscar_contas, name='contapagar-busca'),
+
+    # Contas recorrentes (ocorrências são gravadas ao pagar/editar: materializar)
+    path('grupo/<int:pk>/recorrentes/', ContaRecorrenteListView.as_view(), name='contarecorrente-list'),
+    path('grupo/<int:pk>/recorrentes/nova/', ContaRecorrenteCreateView.as_view(), name='contarecorrente-create'),
+    path('recorrente/<int:pk>/editar/', ContaRecorrenteUpdateView.as_view(), name='contarecorrente-update'),
+    path('recorrente/<int:pk>/excluir/', ContaRecorrenteDeleteView.as_view(), name='contarecorrente-delete'),
+    path('recorrente/<int:pk>/<str:ocorrencia>/materializar/', materializar_ocorrencia,
+         name='contarecorrente-materializar'),
     
     # Exportação PDF / Excel
     path('grupo/<int:pk>/exportar/pdf/', exportar_pdf, name='exportar-pdf'),
     path('grupo/<int:pk>/exportar/excel/', exportar_excel, name='exportar-excel'),
+    # Exportação assíncrona (?assincrono=1): situação e download da tarefa
+    path('exportacao/<int:pk>/', exportacao_status, name='exportacao-status'),
+    path('exportacao/<int:pk>/download/', exportacao_download, name='exportacao-download'),
+
+    # API JSON (sessão do Django; listas paginadas por cursor)
+    path('api/grupos/', api.grupos, name='api-grupos'),
+    path('api/grupos/autocompletar/', api.grupos_autocompletar, name='api-grupos-autocompletar'),
+    path('api/grupos/<int:pk>/', api.grupo_detalhe, name='api-grupo-detalhe'),
+    path('api/grupos/<int:pk>/resumo/', api_grupo_resumo, name='api-grupo-resumo'),
+    path('api/grupos/<int:pk>/grafico/', api.grupo_grafico, name='api-grupo-grafico'),
+    path('api/grupos/<int:pk>/contas/', api_grupo_contas, name='api-grupo-contas'),
+    path('api/contas/busca/', api.contas_busca, name='api-contas-busca'),
+    path('api/contas/<int:pk>/', api.conta_detalhe, name='api-conta-detalhe'),
 ]
@@ -1,23 +1,110 @@
+from django import forms
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy, reverse
-from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, DetailView
+from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, DetailView, FormView
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Sum
 from datetime import date, timedelta
 import json
-from .models import Grupo, ContaPagar
-from .forms import GrupoForm, ContaPagarForm
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Q
+from django.forms import DateField
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_POST
+from .api import ErroApi, codificar_cursor, decodificar_cursor, filtrar_apos_cursor
+from .busca import buscar_contas as _buscar_contas
+from .models import Grupo, ContaPagar, ContaRecorrente, OcorrenciaCancelada, TarefaExportacao
+from .forms import GrupoForm, ContaPagarForm, ContaRecorrenteForm, ImportarContasForm, BuscaContasForm
+from .services import (
+    ACOES_LOTE, aplicar_acao_em_lote, deslocar_mes, periodo_mes, resumo_mensal, grupos_com_totais,
+    series_historico,
+)
+from .recorrencias import contas_virtuais, expandir, previsto_virtual_por_mes, ocorrencias, materializar
+from .caching import (
+    assinatura_exportacao, dashboard_em_cache, etag_pagina, exportacao_em_cache, versao_grupo,
+)
+from .exportacao import MAX_MESES, FORMATOS, nome_arquivo, contas_do_periodo
+from .importacao import LEITORES, importar_contas
+from .signals import grupo_alterado
 
 # --- GRUPOS ---
 
+def pagina_nao_modificada(request, etag):
+    """
+    Resposta 304 se o navegador já tem a página com esse ETag, senão None.
+
+    Com mensagens pendentes (ex.: depois de salvar uma conta) a página é
+    sempre renderizada, para as mensagens aparecerem.
+    """
+    if messages.get_messages(request):
+        return None
+    return get_conditional_response(request, etag=quote_etag(etag))
+
+
+def com_etag(response, etag):
+    """Marca a página com o ETag; o navegador guarda, mas revalida a cada acesso."""
+    response['ETag'] = quote_etag(etag)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 class GrupoListView(LoginRequiredMixin, ListView):
     model = Grupo
     template_name = 'financeiro/grupo_list.html'
     context_object_name = 'grupos'
 
+    def get(self, request, *args, **kwargs):
+        # Muda quando qualquer espaço do usuário muda, é criado ou excluído
+        carimbo = Grupo.objects.filter(usuario=request.user).aggregate(
+            ultima=Max('atualizado_em'), quantidade=Count('id')
+        )
+        etag = etag_pagina(request, request.get_full_path(), carimbo['ultima'], carimbo['quantidade'])
+        return pagina_nao_modificada(request, etag) or com_etag(super().get(request, *args, **kwargs), etag)
+
     def get_queryset(self):
-        """Retorna apenas grupos do usuário logado."""
-        return Grupo.objects.filter(usuario=self.request.user)
+        """Retorna apenas grupos do usuário logado, com os totais do mês selecionado."""
+        self.mes, self.ano = periodo_da_pagina(self.request)
+        self.inicio, self.fim = periodo_mes(self.mes, self.ano)
+        return grupos_com_totais(
+            Grupo.objects.filter(usuario=self.request.user), self.inicio, self.fim, date.today()
+        ).order_by('nome')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        grupos = list(context['grupos'])
+
+        # Ocorrências virtuais das contas recorrentes de todos os grupos (no máximo 2 consultas)
+        hoje = date.today()
+        virtuais = expandir(
+            ContaRecorrente.objects.filter(grupo__usuario=self.request.user), self.inicio, self.fim
+        )
+        por_grupo = {grupo.pk: grupo for grupo in grupos}
+        for conta in virtuais:
+            grupo = por_grupo[conta.grupo_id]
+            grupo.total_previsto += conta.valor
+            grupo.total_pendente += conta.valor
+            grupo.atrasadas += conta.data_vencimento < hoje
+
+        ano_anterior, mes_anterior = deslocar_mes(self.ano, self.mes, -1)
+        ano_proximo, mes_proximo = deslocar_mes(self.ano, self.mes, 1)
+        context.update({
+            'grupos': grupos,
+            'total_previsto': sum(g.total_previsto for g in grupos),
+            'total_pago': sum(g.total_pago for g in grupos),
+            'total_pendente': sum(g.total_pendente for g in grupos),
+            'total_atrasadas': sum(g.atrasadas for g in grupos),
+            'mes_atual': self.mes,
+            'ano_atual': self.ano,
+            'data_atual': self.inicio,
+            'mes_anterior': mes_anterior,
+            'ano_anterior': ano_anterior,
+            'mes_proximo': mes_proximo,
+            'ano_proximo': ano_proximo,
+        })
+        return context
 
 class GrupoCreateView(LoginRequiredMixin, CreateView):
     model = Grupo
@@ -49,6 +136,132 @@ class GrupoDeleteView(LoginRequiredMixin, DeleteView):
         """Limita exclusão apenas aos grupos do usuário logado."""
         return Grupo.objects.filter(usuario=self.request.user)
 
+def _periodo_da_requisicao(request):
+    """
+    Lê mes/ano (padrão: mês atual) e meses (1 a MAX_MESES) da query string.
+
+    Valores inválidos respondem 400, como na API (api._periodo_resumo).
+    """
+    hoje = date.today()
+    try:
+        mes = int(request.GET.get('mes', hoje.month))
+        ano = int(request.GET.get('ano', hoje.year))
+        meses = min(max(int(request.GET.get('meses', 1)), 1), MAX_MESES)
+        periodo_mes(mes, ano, meses)
+    except ValueError:
+        raise BadRequest('mes, ano e meses devem ser números válidos.')
+    return mes, ano, meses
+
+
+def periodo_da_pagina(request):
+    """Mês/ano selecionados (?mes=&ano=, padrão: mês atual)."""
+    mes, ano, _ = _periodo_da_requisicao(request)
+    return mes, ano
+
+
+def contexto_navegacao(mes, ano):
+    """Variáveis de navegação entre meses usadas pelo template do grupo."""
+    ano_anterior, mes_anterior = deslocar_mes(ano, mes, -1)
+    ano_proximo, mes_proximo = deslocar_mes(ano, mes, 1)
+    return {
+        'mes_atual': mes,
+        'ano_atual': ano,
+        'data_atual': date(ano, mes, 1),
+        'mes_anterior': mes_anterior,
+        'ano_anterior': ano_anterior,
+        'mes_proximo': mes_proximo,
+        'ano_proximo': ano_proximo,
+        'today': date.today(),
+    }
+
+
+def janela_dashboard(mes, ano):
+    """(inicio do mês, fim do mês, inicio do histórico de 6 meses)."""
+    inicio, fim = periodo_mes(mes, ano)
+    ano_inicial, mes_inicial = deslocar_mes(ano, mes, -5)
+    return inicio, fim, date(ano_inicial, mes_inicial, 1)
+
+
+CONTAS_POR_PAGINA = 50
+
+
+def contas_do_mes(grupo, inicio, fim, hoje):
+    """
+    Contas gravadas do mês, em ordem de vencimento, só com os campos exibidos na tabela.
+
+    `atrasada` (pendente e vencida antes de `hoje`) vem calculada pelo banco.
+    """
+    return grupo.contas.filter(
+        data_vencimento__gte=inicio,
+        data_vencimento__lt=fim
+    ).order_by('data_vencimento', 'pk').values(
+        'pk', 'descricao', 'valor', 'data_vencimento', 'pago', 'data_pagamento',
+        atrasada=ExpressionWrapper(Q(pago=False, data_vencimento__lt=hoje), output_field=BooleanField()),
+    )
+
+
+def pagina_de_contas(linhas, virtuais, inferior, fim, hoje):
+    """
+    Junta uma página de contas gravadas com as ocorrências virtuais do mesmo trecho.
+
+    `linhas` vem de `contas_do_mes` com até CONTAS_POR_PAGINA + 1 itens (o
+    excedente indica que há próxima página). A página cobre os vencimentos de
+    `inferior` até o da primeira conta da próxima página (exclusive), ou até
+    `fim` na última; as ocorrências virtuais desse intervalo entram nela.
+    Retorna `(contas, proximo)`, com o cursor da próxima página ou None.
+    """
+    linhas = list(linhas)
+    mais = len(linhas) > CONTAS_POR_PAGINA
+    superior = linhas[CONTAS_POR_PAGINA]['data_vencimento'] if mais else fim
+    linhas = linhas[:CONTAS_POR_PAGINA]
+    contas = linhas + [
+        {
+            'pk': None, 'recorrencia_id': conta.recorrencia_id, 'ocorrencia': conta.ocorrencia,
+            'descricao': conta.descricao, 'valor': conta.valor,
+            'data_vencimento': conta.data_vencimento, 'pago': False, 'data_pagamento': None,
+            'atrasada': conta.data_vencimento < hoje,
+        }
+        for conta in virtuais if inferior <= conta.data_vencimento < superior
+    ]
+    # Estável: no mesmo dia, as gravadas vêm antes das virtuais em todas as páginas
+    contas.sort(key=lambda conta: conta['data_vencimento'])
+    proximo = codificar_cursor(linhas[-1]['data_vencimento'], linhas[-1]['pk']) if mais else None
+    return contas, proximo
+
+
+def compor_dashboard(linhas, historico, virtuais, inicio, fim, hoje):
+    """
+    Monta os dados cacheáveis do dashboard a partir das três consultas independentes.
+
+    `linhas`: primeira página de `contas_do_mes` (com uma conta a mais);
+    `historico`: resumo_mensal dos últimos 6 meses; `virtuais`: ocorrências
+    recorrentes não gravadas no mesmo intervalo.
+    """
+    # Ocorrências das contas recorrentes ainda não gravadas entram no previsto
+    previsto_virtual = previsto_virtual_por_mes(virtuais)
+    for h in historico:
+        h['previsto'] += previsto_virtual.get((h['ano'], h['mes']), 0)
+    total_previsto = historico[-1]['previsto']
+    total_pago = historico[-1]['pago']
+
+    contas, proximo = pagina_de_contas(linhas, virtuais, inicio, fim, hoje)
+
+    # Dados para gráfico de histórico (do mais antigo ao atual)
+    series = series_historico(historico)
+
+    return {
+        'contas': contas,
+        'proximo': proximo,
+        'total_previsto': total_previsto,
+        'total_pago': total_pago,
+        'total_pendente': total_previsto - total_pago,
+        # Dados para gráficos (JSON)
+        'chart_historico_labels': json.dumps(series['rotulos']),
+        'chart_historico_previsto': json.dumps(series['previsto']),
+        'chart_historico_pago': json.dumps(series['pago']),
+    }
+
+
 class GrupoDetailView(LoginRequiredMixin, DetailView):
     model = Grupo
     template_name = 'financeiro/grupo_detail.html'
@@ -58,92 +271,80 @@ class GrupoDetailView(LoginRequiredMixin, DetailView):
         """Limita visualização apenas aos grupos do usuário logado."""
         return Grupo.objects.filter(usuario=self.request.user)
 
+    def get(self, request, *args, **kwargs):
+        # Página inalterada (mesmo carimbo do grupo): 304 sem consultar as contas nem renderizar
+        self.object = self.get_object()
+        etag = etag_pagina(request, request.get_full_path(), self.object.pk, self.object.atualizado_em)
+        response = pagina_nao_modificada(request, etag)
+        if response is None:
+            response = com_etag(self.render_to_response(self.get_context_data(object=self.object)), etag)
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Filtro de Mês e Ano
+        mes, ano = periodo_da_pagina(self.request)
+
+        # Totais, histórico e primeira página de contas (em cache até o grupo mudar
+        # de versão; o dia entra na chave por causa do atraso das contas)
+        dashboard, cache_hit = dashboard_em_cache(
+            self.object, f'{ano}-{mes:02d}:{date.today()}', lambda: self.montar_dashboard(mes, ano),
+        )
+        self.cache_hit = cache_hit
+
+        context.update(dashboard)
+        # Chave dos fragmentos em cache do template
+        context['versao'] = versao_grupo(self.object)
+        context.update(contexto_navegacao(mes, ano))
+        return context
+
+    def montar_dashboard(self, mes, ano):
+        """Dados do dashboard que dependem só das contas do grupo (cacheáveis)."""
+        inicio, fim, inicio_historico = janela_dashboard(mes, ano)
         hoje = date.today()
-        mes = int(self.request.GET.get('mes', hoje.month))
-        ano = int(self.request.GET.get('ano', hoje.year))
-
-        # Data usada para navegação
-        data_atual = date(ano, mes, 1)
-        
-        # Calcular mês anterior
-        if mes == 1:
-            mes_anterior = 12
-            ano_anterior = ano - 1
-        else:
-            mes_anterior = mes - 1
-            ano_anterior = ano
-            
-        # Calcular próximo mês
-        if mes == 12:
-            mes_proximo = 1
-            ano_proximo = ano + 1
-        else:
-            mes_proximo = mes + 1
-            ano_proximo = ano
-
-        # Filtrar contas do grupo para o mês/ano selecionado
-        contas = self.object.contas.filter(
-            data_vencimento__month=mes,
-            data_vencimento__year=ano
-        ).order_by('data_vencimento')
-
-        # Totais
-        total_previsto = contas.aggregate(Sum('valor'))['valor__sum'] or 0
-        total_pago = contas.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
-        total_pendente = total_previsto - total_pago
-
-        # Dados para gráfico de histórico (últimos 6 meses)
-        historico_labels = []
-        historico_previsto = []
-        historico_pago = []
-        
-        MESES_PT = ['', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 
-                    'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-        
-        for i in range(5, -1, -1):  # 5 a 0 (6 meses, do mais antigo ao atual)
-            # Calcular mês/ano para cada iteração
-            m = mes - i
-            a = ano
-            while m <= 0:
-                m += 12
-                a -= 1
-            
-            historico_labels.append(f"{MESES_PT[m]}/{a}")
-            
-            # Buscar totais deste mês
-            contas_mes = self.object.contas.filter(
-                data_vencimento__month=m,
-                data_vencimento__year=a
-            )
-            prev = contas_mes.aggregate(Sum('valor'))['valor__sum'] or 0
-            pag = contas_mes.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
-            
-            historico_previsto.append(float(prev))
-            historico_pago.append(float(pag))
+        return compor_dashboard(
+            contas_do_mes(self.object, inicio, fim, hoje)[:CONTAS_POR_PAGINA + 1],
+            # Totais do mês e histórico dos últimos 6 meses (lidos do ResumoMensal)
+            resumo_mensal(self.object, ano, mes, quantidade=6),
+            contas_virtuais(self.object, inicio_historico, fim),
+            inicio, fim, hoje,
+        )
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response['X-Cache'] = 'HIT' if self.cache_hit else 'MISS'
+        return response
 
-        context.update({
-            'contas': contas,
-            'mes_atual': mes,
-            'ano_atual': ano,
-            'data_atual': data_atual,
-            'mes_anterior': mes_anterior,
-            'ano_anterior': ano_anterior,
-            'mes_proximo': mes_proximo,
-            'ano_proximo': ano_proximo,
-            'total_previsto': total_previsto,
-            'total_pago': total_pago,
-            'total_pendente': total_pendente,
-            'today': date.today(),
-            # Dados para gráficos (JSON)
-            'chart_historico_labels': json.dumps(historico_labels),
-            'chart_historico_previsto': json.dumps(historico_previsto),
-            'chart_historico_pago': json.dumps(historico_pago),
-        })
-        return context
+
+@login_required
+def contas_do_grupo(request, pk):
+    """
+    Página da tabela de contas do mês (?mes=&ano=&apos=<cursor>), em HTML.
+
+    Devolve só as linhas (`<tr>`), que a página do grupo acrescenta à tabela
+    ao rolar até o fim; a última linha traz o endereço da página seguinte.
+    Sem `apos`, a primeira página (usada ao trocar de mês sem recarregar).
+    """
+    grupo = get_object_or_404(Grupo.objects.only('id'), pk=pk, usuario=request.user)
+    mes, ano = periodo_da_pagina(request)
+    inicio, fim = periodo_mes(mes, ano)
+    hoje = date.today()
+    contas = contas_do_mes(grupo, inicio, fim, hoje)
+    primeira = 'apos' not in request.GET
+    if not primeira:
+        try:
+            vencimento, ultimo_id = decodificar_cursor(request.GET['apos'])
+            vencimento, ultimo_id = date.fromisoformat(vencimento), int(ultimo_id)
+        except (ErroApi, ValueError):
+            return HttpResponseBadRequest('Cursor inválido.')
+        contas = filtrar_apos_cursor(contas, vencimento, ultimo_id)
+
+    linhas = list(contas[:CONTAS_POR_PAGINA + 1])
+    # As demais páginas começam no vencimento da sua primeira conta, onde a anterior terminou
+    inferior = inicio if primeira else linhas[0]['data_vencimento'] if linhas else fim
+    contas, proximo = pagina_de_contas(linhas, contas_virtuais(grupo, inicio, fim), inferior, fim, hoje)
+    return render(request, 'financeiro/grupo_contas_linhas.html', {
+        'grupo': grupo, 'contas': contas, 'proximo': proximo, 'mes_atual': mes, 'ano_atual': ano,
+    })
 
 # --- CONTAS A PAGAR ---
 
@@ -152,19 +353,35 @@ class ContaPagarCreateView(LoginRequiredMixin, CreateView):
     form_class = ContaPagarForm
     template_name = 'financeiro/contapagar_form.html'
     
+    def dispatch(self, request, *args, **kwargs):
+        # Grupo da URL (verifica se pertence ao usuário), buscado uma vez só
+        self.grupo = None
+        if request.user.is_authenticated and kwargs.get('grupo_id'):
+            self.grupo = get_object_or_404(Grupo.objects.only('id', 'nome'), pk=kwargs['grupo_id'],
+                                           usuario=request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['usuario'] = self.request.user
+        return kwargs
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        if self.grupo:
+            # O grupo já vem da URL: campo oculto, sem listar os grupos
+            form.fields['grupo'].widget = forms.HiddenInput()
+        return form
+
     def get_initial(self):
         initial = super().get_initial()
-        # Preenche o grupo se passado na URL (verifica se pertence ao usuário)
-        grupo_id = self.kwargs.get('grupo_id')
-        if grupo_id:
-            initial['grupo'] = get_object_or_404(Grupo, pk=grupo_id, usuario=self.request.user)
+        if self.grupo:
+            initial['grupo'] = self.grupo.pk
         return initial
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        grupo_id = self.kwargs.get('grupo_id')
-        if grupo_id:
-            context['grupo'] = get_object_or_404(Grupo, pk=grupo_id, usuario=self.request.user)
+        context['grupo'] = self.grupo
         return context
 
     def get_success_url(self):
@@ -177,7 +394,13 @@ class ContaPagarUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_queryset(self):
         """Limita edição às contas de grupos do usuário logado."""
-        return ContaPagar.objects.filter(grupo__usuario=self.request.user)
+        # grupo é usado no __str__ e na URL de retorno
+        return ContaPagar.objects.filter(grupo__usuario=self.request.user).select_related('grupo')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['usuario'] = self.request.user
+        return kwargs
 
     def get_success_url(self):
         return reverse('grupo-detail', kwargs={'pk': self.object.grupo.pk})
@@ -188,261 +411,337 @@ class ContaPagarDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_queryset(self):
         """Limita exclusão às contas de grupos do usuário logado."""
-        return ContaPagar.objects.filter(grupo__usuario=self.request.user)
+        # grupo é usado no __str__ e na URL de retorno
+        return ContaPagar.objects.filter(grupo__usuario=self.request.user).select_related('grupo')
 
     def get_success_url(self):
         return reverse('grupo-detail', kwargs={'pk': self.object.grupo.pk})
 
 
-# --- EXPORTAÇÃO PDF / EXCEL ---
+# --- CONTAS RECORRENTES ---
 
-from django.http import HttpResponse
-from django.contrib.auth.decorators import login_required
-from io import BytesIO
+class ContaRecorrenteListView(LoginRequiredMixin, ListView):
+    template_name = 'financeiro/contarecorrente_list.html'
+    context_object_name = 'recorrentes'
+
+    def get_queryset(self):
+        self.grupo = get_object_or_404(Grupo, pk=self.kwargs['pk'], usuario=self.request.user)
+        return self.grupo.recorrentes.all()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['grupo'] = self.grupo
+        return context
 
-# PDF
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+class ContaRecorrenteCreateView(LoginRequiredMixin, CreateView):
+    model = ContaRecorrente
+    form_class = ContaRecorrenteForm
+    template_name = 'financeiro/contarecorrente_form.html'
 
-# Excel
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.grupo = get_object_or_404(Grupo, pk=kwargs['pk'], usuario=request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_initial(self):
+        return {'data_inicio': date.today(), 'dia': date.today().day}
 
-MESES_PT = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['grupo'] = self.grupo
+        return context
+
+    def form_valid(self, form):
+        form.instance.grupo = self.grupo
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse('contarecorrente-list', kwargs={'pk': self.object.grupo_id})
+
+class ContaRecorrenteUpdateView(LoginRequiredMixin, UpdateView):
+    model = ContaRecorrente
+    form_class = ContaRecorrenteForm
+    template_name = 'financeiro/contarecorrente_form.html'
+
+    def get_queryset(self):
+        """Limita edição às contas recorrentes de grupos do usuário logado."""
+        return ContaRecorrente.objects.filter(grupo__usuario=self.request.user).select_related('grupo')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['grupo'] = self.object.grupo
+        return context
+
+    def get_success_url(self):
+        return reverse('contarecorrente-list', kwargs={'pk': self.object.grupo_id})
+
+class ContaRecorrenteDeleteView(LoginRequiredMixin, DeleteView):
+    model = ContaRecorrente
+    template_name = 'financeiro/contapagar_confirm_delete.html'
+
+    def get_queryset(self):
+        """Limita exclusão às contas recorrentes de grupos do usuário logado."""
+        return ContaRecorrente.objects.filter(grupo__usuario=self.request.user).select_related('grupo')
+
+    def get_success_url(self):
+        return reverse('contarecorrente-list', kwargs={'pk': self.object.grupo_id})
 
 
 @login_required
-def exportar_pdf(request, pk):
-    """Exporta o resumo mensal de um grupo em formato PDF."""
+@require_POST
+def materializar_ocorrencia(request, pk, ocorrencia):
+    """
+    Grava a ocorrência virtual de uma conta recorrente como ContaPagar.
+
+    `acao=pagar` marca a conta como paga hoje e volta ao grupo; `acao=excluir`
+    cancela a ocorrência sem gravá-la; senão abre a edição da conta gravada.
+    """
+    recorrente = get_object_or_404(ContaRecorrente, pk=pk, grupo__usuario=request.user)
+    try:
+        data = date.fromisoformat(ocorrencia)
+    except ValueError:
+        raise Http404('Data inválida.')
+    if data not in ocorrencias(recorrente, data, data + timedelta(days=1)):
+        raise Http404('Esta data não é uma ocorrência da conta recorrente.')
+
+    voltar = f"{reverse('grupo-detail', kwargs={'pk': recorrente.grupo_id})}?mes={data.month}&ano={data.year}"
+    if request.POST.get('acao') == 'excluir':
+        OcorrenciaCancelada.objects.get_or_create(recorrencia=recorrente, ocorrencia=data)
+        grupo_alterado(recorrente.grupo_id)
+        messages.success(request, f'Ocorrência de {recorrente.descricao} em {data:%d/%m/%Y} excluída.')
+        return redirect(voltar)
+
+    conta = materializar(recorrente, data)
+    if request.POST.get('acao') != 'pagar':
+        return redirect('contapagar-update', pk=conta.pk)
+    if not conta.pago:
+        conta.pago = True
+        conta.data_pagamento = date.today()
+        conta.save()
+    messages.success(request, f'{conta.descricao} marcada como paga.')
+    return redirect(voltar)
+
+class ImportarContasView(LoginRequiredMixin, FormView):
+    """Importa contas de um CSV/OFX para o grupo em lotes (bulk_create)."""
+    form_class = ImportarContasForm
+    template_name = 'financeiro/contapagar_importar.html'
+    max_erros_exibidos = 10
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.grupo = get_object_or_404(Grupo, pk=kwargs['pk'], usuario=request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['grupo'] = self.grupo
+        return context
+
+    def form_valid(self, form):
+        arquivo = form.cleaned_data['arquivo']
+        formato = arquivo.name.rsplit('.', 1)[-1].lower()
+        resultado = importar_contas(self.grupo, LEITORES[formato](arquivo))
+
+        messages.success(self.request, f'{resultado.inseridas} contas importadas.')
+        for numero, mensagem in resultado.erros[:self.max_erros_exibidos]:
+            messages.warning(self.request, f'Linha {numero}: {mensagem}')
+        if len(resultado.erros) > self.max_erros_exibidos:
+            messages.warning(self.request, f'... e mais {len(resultado.erros) - self.max_erros_exibidos} linhas com erro.')
+        return redirect('grupo-detail', pk=self.grupo.pk)
+
+
+# --- EXPORTAÇÃO PDF / EXCEL ---
+
+def _exportar(request, pk, formato):
+    """
+    Responde com a exportação do grupo no `formato` ('pdf' ou 'xlsx').
+
+    O arquivo gerado fica no cache em disco; com ETag/Last-Modified o
+    navegador revalida e recebe 304 enquanto as contas não mudarem.
+    """
     grupo = get_object_or_404(Grupo, pk=pk, usuario=request.user)
-    
-    hoje = date.today()
-    mes = int(request.GET.get('mes', hoje.month))
-    ano = int(request.GET.get('ano', hoje.year))
-    
-    contas = ContaPagar.objects.filter(
-        grupo=grupo,
-        data_vencimento__month=mes,
-        data_vencimento__year=ano
-    ).order_by('data_vencimento')
-    
-    # Totais
-    total_previsto = contas.aggregate(Sum('valor'))['valor__sum'] or 0
-    total_pago = contas.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
-    total_pendente = total_previsto - total_pago
-    
-    # Criar PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                           leftMargin=2*cm, rightMargin=2*cm,
-                           topMargin=2*cm, bottomMargin=2*cm)
-    
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#0d6efd'),
-        spaceAfter=6
-    )
-    elements.append(Paragraph(f"{grupo.nome}", title_style))
-    
-    # Subtítulo (mês/ano)
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.grey,
-        spaceAfter=20
+    mes, ano, meses = _periodo_da_requisicao(request)
+    escrever, content_type = FORMATOS[formato]
+
+    if request.GET.get('assincrono'):
+        # Relatórios grandes: enfileira para o run_export_worker e devolve o id
+        tarefa = TarefaExportacao.objects.create(
+            usuario=request.user, grupo=grupo, formato=formato, mes=mes, ano=ano, meses=meses
+        )
+        return JsonResponse(_dados_tarefa(tarefa), status=202)
+
+    etag, ultima_alteracao = assinatura_exportacao(
+        grupo, formato, mes, ano, meses, contas_do_periodo(grupo, mes, ano, meses)
     )
-    elements.append(Paragraph(f"Resumo de {MESES_PT[mes]} de {ano}", subtitle_style))
-    
-    # Resumo financeiro
-    resumo_data = [
-        ['Total Previsto', 'Total Pago', 'Pendente'],
-        [f'R$ {total_previsto:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
-         f'R$ {total_pago:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
-         f'R$ {total_pendente:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')]
-    ]
-    
-    resumo_table = Table(resumo_data, colWidths=[5.5*cm, 5.5*cm, 5.5*cm])
-    resumo_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#0d6efd')),
-        ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#198754')),
-        ('BACKGROUND', (2, 0), (2, 0), colors.HexColor('#ffc107')),
-        ('TEXTCOLOR', (0, 0), (1, 0), colors.white),
-        ('TEXTCOLOR', (2, 0), (2, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('FONTSIZE', (0, 1), (-1, 1), 12),
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(resumo_table)
-    elements.append(Spacer(1, 20))
-    
-    # Tabela de contas
-    if contas.exists():
-        elements.append(Paragraph("Detalhamento das Contas", styles['Heading2']))
-        elements.append(Spacer(1, 10))
-        
-        table_data = [['Status', 'Vencimento', 'Descrição', 'Valor']]
-        
-        for conta in contas:
-            status = '✓ Pago' if conta.pago else '○ Pendente'
-            vencimento = conta.data_vencimento.strftime('%d/%m/%Y')
-            valor = f'R$ {conta.valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-            table_data.append([status, vencimento, conta.descricao, valor])
-        
-        contas_table = Table(table_data, colWidths=[2.5*cm, 3*cm, 8*cm, 3*cm])
-        contas_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('ALIGN', (0, 1), (1, -1), 'CENTER'),
-            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ]))
-        elements.append(contas_table)
-    else:
-        elements.append(Paragraph("Nenhuma conta cadastrada para este mês.", styles['Normal']))
-    
-    doc.build(elements)
-    
-    # Response
-    buffer.seek(0)
-    filename = f"resumo_{grupo.nome.lower().replace(' ', '_')}_{MESES_PT[mes].lower()}_{ano}.pdf"
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    ultima_alteracao = ultima_alteracao.timestamp()
+    response = get_conditional_response(request, etag=quote_etag(etag), last_modified=ultima_alteracao)
+    if response is None:
+        arquivo = exportacao_em_cache(
+            grupo.pk, etag, formato, lambda destino: escrever(grupo, mes, ano, meses, destino)
+        )
+        response = FileResponse(
+            arquivo,
+            as_attachment=True,
+            filename=nome_arquivo(grupo, mes, ano, meses, formato),
+            content_type=content_type
+        )
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(ultima_alteracao)
+    response['Cache-Control'] = 'private, no-cache'
     return response
 
 
+@login_required
+def exportar_pdf(request, pk):
+    """Exporta o resumo de um grupo (mês ou intervalo de meses) em formato PDF."""
+    return _exportar(request, pk, 'pdf')
+
+
 @login_required
 def exportar_excel(request, pk):
-    """Exporta o resumo mensal de um grupo em formato Excel."""
-    grupo = get_object_or_404(Grupo, pk=pk, usuario=request.user)
-    
-    hoje = date.today()
-    mes = int(request.GET.get('mes', hoje.month))
-    ano = int(request.GET.get('ano', hoje.year))
-    
-    contas = ContaPagar.objects.filter(
-        grupo=grupo,
-        data_vencimento__month=mes,
-        data_vencimento__year=ano
-    ).order_by('data_vencimento')
-    
-    # Totais
-    total_previsto = contas.aggregate(Sum('valor'))['valor__sum'] or 0
-    total_pago = contas.filter(pago=True).aggregate(Sum('valor'))['valor__sum'] or 0
-    total_pendente = total_previsto - total_pago
-    
-    # Criar Workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{MESES_PT[mes]} {ano}"
-    
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    header_fill = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
-    success_fill = PatternFill(start_color="198754", end_color="198754", fill_type="solid")
-    warning_fill = PatternFill(start_color="ffc107", end_color="ffc107", fill_type="solid")
-    table_header_fill = PatternFill(start_color="343a40", end_color="343a40", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+    """Exporta o resumo de um grupo (mês ou intervalo de meses) em formato Excel."""
+    return _exportar(request, pk, 'xlsx')
+
+
+# --- EXPORTAÇÃO ASSÍNCRONA ---
+
+def _dados_tarefa(tarefa):
+    dados = {
+        'id': tarefa.pk,
+        'status': tarefa.status,
+        'url_status': reverse('exportacao-status', kwargs={'pk': tarefa.pk}),
+    }
+    if tarefa.status == TarefaExportacao.CONCLUIDA:
+        dados['url_download'] = reverse('exportacao-download', kwargs={'pk': tarefa.pk})
+    elif tarefa.status == TarefaExportacao.ERRO:
+        dados['erro'] = tarefa.erro
+    return dados
+
+
+@login_required
+def exportacao_status(request, pk):
+    """Situação de uma exportação assíncrona (consultada periodicamente pelo cliente)."""
+    tarefa = get_object_or_404(TarefaExportacao, pk=pk, usuario=request.user)
+    return JsonResponse(_dados_tarefa(tarefa))
+
+
+@login_required
+def exportacao_download(request, pk):
+    """Baixa o arquivo de uma exportação assíncrona concluída."""
+    tarefa = get_object_or_404(
+        TarefaExportacao.objects.select_related('grupo'),
+        pk=pk, usuario=request.user, status=TarefaExportacao.CONCLUIDA
     )
-    
-    # Título
-    ws.merge_cells('A1:D1')
-    ws['A1'] = f"{grupo.nome} - Resumo de {MESES_PT[mes]} de {ano}"
-    ws['A1'].font = Font(bold=True, size=16, color="0d6efd")
-    ws['A1'].alignment = Alignment(horizontal='center')
-    
-    # Resumo 
-    ws['A3'] = "Total Previsto"
-    ws['B3'] = "Total Pago"
-    ws['C3'] = "Pendente"
-    
-    for col, fill in [('A', header_fill), ('B', success_fill), ('C', warning_fill)]:
-        ws[f'{col}3'].fill = fill
-        ws[f'{col}3'].font = Font(bold=True, color="FFFFFF" if col != 'C' else "000000")
-        ws[f'{col}3'].alignment = Alignment(horizontal='center')
-        ws[f'{col}3'].border = thin_border
-    
-    ws['A4'] = total_previsto
-    ws['B4'] = total_pago
-    ws['C4'] = total_pendente
-    
-    for col in ['A', 'B', 'C']:
-        ws[f'{col}4'].number_format = 'R$ #,##0.00'
-        ws[f'{col}4'].font = Font(bold=True, size=12)
-        ws[f'{col}4'].alignment = Alignment(horizontal='center')
-        ws[f'{col}4'].border = thin_border
-    
-    # Tabela de contas
-    ws['A6'] = "Status"
-    ws['B6'] = "Vencimento"
-    ws['C6'] = "Descrição"
-    ws['D6'] = "Valor"
-    
-    for col in ['A', 'B', 'C', 'D']:
-        ws[f'{col}6'].fill = table_header_fill
-        ws[f'{col}6'].font = header_font
-        ws[f'{col}6'].alignment = Alignment(horizontal='center')
-        ws[f'{col}6'].border = thin_border
-    
-    row = 7
-    for conta in contas:
-        ws[f'A{row}'] = "✓ Pago" if conta.pago else "○ Pendente"
-        ws[f'B{row}'] = conta.data_vencimento.strftime('%d/%m/%Y')
-        ws[f'C{row}'] = conta.descricao
-        ws[f'D{row}'] = conta.valor
-        ws[f'D{row}'].number_format = 'R$ #,##0.00'
-        
-        for col in ['A', 'B', 'C', 'D']:
-            ws[f'{col}{row}'].border = thin_border
-            ws[f'{col}{row}'].alignment = Alignment(horizontal='center' if col in ['A', 'B'] else 'left')
-        
-        ws[f'D{row}'].alignment = Alignment(horizontal='right')
-        row += 1
-    
-    # Ajustar largura das colunas
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 40
-    ws.column_dimensions['D'].width = 18
-    
-    # Response
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
-    filename = f"resumo_{grupo.nome.lower().replace(' ', '_')}_{MESES_PT[mes].lower()}_{ano}.xlsx"
-    
-    response = HttpResponse(
-        buffer, 
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    try:
+        arquivo = open(tarefa.arquivo, 'rb')
+    except FileNotFoundError:
+        raise Http404('Arquivo da exportação expirou.')
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=nome_arquivo(tarefa.grupo, tarefa.mes, tarefa.ano, tarefa.meses, tarefa.formato),
+        content_type=FORMATOS[tarefa.formato][1]
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+
+
+# --- AÇÕES EM LOTE ---
+
+def _dados_acao_lote(request):
+    """Lê ids/acao/data_pagamento/destino de um corpo JSON ou de um formulário."""
+    if request.content_type == 'application/json':
+        try:
+            dados = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ValidationError('JSON inválido.')
+        ids = dados.get('ids') or []
+    else:
+        dados = request.POST
+        ids = dados.getlist('ids')
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        raise ValidationError('Lista de ids inválida.')
+    acao = dados.get('acao')
+    if acao not in ACOES_LOTE:
+        raise ValidationError('Ação inválida.')
+    data_pagamento = DateField(required=False).clean(dados.get('data_pagamento') or None)
+    return ids, acao, data_pagamento, dados.get('destino')
+
+
+@login_required
+@require_POST
+def contas_em_lote(request, pk):
+    """
+    Paga, desfaz o pagamento, exclui ou move várias contas do grupo de uma vez.
+
+    Aceita JSON ({"ids": [...], "acao": ..., "data_pagamento": ..., "destino": ...})
+    e responde com os totais atualizados do mês, ou um formulário comum
+    (checkboxes `ids` na página do grupo), que redireciona de volta.
+    """
+    grupo = get_object_or_404(Grupo, pk=pk, usuario=request.user)
+    resposta_json = request.content_type == 'application/json'
+    try:
+        ids, acao, data_pagamento, destino = _dados_acao_lote(request)
+        if acao == 'mover':
+            try:
+                destino = Grupo.objects.exclude(pk=grupo.pk).get(pk=destino, usuario=request.user)
+            except (Grupo.DoesNotExist, TypeError, ValueError):
+                raise ValidationError('Grupo de destino inválido.')
+    except ValidationError as exc:
+        if resposta_json:
+            return JsonResponse({'erro': ' '.join(exc.messages)}, status=400)
+        messages.error(request, ' '.join(exc.messages))
+        return redirect('grupo-detail', pk=grupo.pk)
+
+    afetadas, grupos_alterados = aplicar_acao_em_lote(
+        grupo, ids, acao, data_pagamento=data_pagamento, destino=destino
+    )
+    if afetadas:
+        for grupo_id in grupos_alterados:
+            grupo_alterado(grupo_id)
+
+    if not resposta_json:
+        messages.success(request, f'{afetadas} contas atualizadas.')
+        return redirect('grupo-detail', pk=grupo.pk)
+
+    mes, ano, _ = _periodo_da_requisicao(request)
+    totais = resumo_mensal(grupo, ano, mes)[0]
+    return JsonResponse({
+        'acao': acao,
+        'afetadas': afetadas,
+        'totais': {
+            'previsto': totais['previsto'],
+            'pago': totais['pago'],
+            'pendente': totais['previsto'] - totais['pago'],
+        },
+    })
+
+
+# --- BUSCA ---
+
+LIMITE_BUSCA = 100
+
+
+@login_required
+def buscar_contas(request):
+    """
+    Busca nas contas de todos os espaços do usuário (descrição, valor, situação, vencimento).
+
+    Sem termo, lista as contas de vencimento mais recente. Com ?parcial=1
+    devolve só a tabela de resultados, usada pela busca incremental da página.
+    """
+    form = BuscaContasForm(request.GET)
+    contas, mais = [], False
+    if form.is_valid():
+        filtros = dict(form.cleaned_data)
+        consulta = _buscar_contas(
+            ContaPagar.objects.filter(grupo__usuario=request.user), filtros.pop('q'), **filtros
+        ).select_related('grupo').only(
+            'id', 'descricao', 'valor', 'data_vencimento', 'pago', 'grupo__id', 'grupo__nome'
+        )
+        contas = list(consulta[:LIMITE_BUSCA + 1])
+        contas, mais = contas[:LIMITE_BUSCA], len(contas) > LIMITE_BUSCA
+
+    template = 'financeiro/contapagar_busca_resultados.html' if request.GET.get('parcial') \
+        else 'financeiro/contapagar_busca.html'
+    return render(request, template, {'form': form, 'contas': contas, 'mais': mais, 'today': date.today()})
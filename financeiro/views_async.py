@@ -0,0 +1,64 @@
+"""
+Dashboard do grupo em versão assíncrona, para o perfil ASGI (uvicorn).
+
+Com settings.ASYNC_VIEWS ativo, financeiro/urls.py aponta `grupo-detail`
+para cá. Enquanto as consultas esperam o banco o worker continua atendendo
+outras requisições, em vez de ficar preso como um worker síncrono.
+"""
+import asyncio
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import aget_object_or_404, render
+from .caching import adashboard_em_cache, etag_pagina, versao_grupo
+from .models import Grupo
+from .recorrencias import contas_virtuais
+from .services import aresumo_mensal
+from .views import (
+    CONTAS_POR_PAGINA, periodo_da_pagina, contexto_navegacao, janela_dashboard, contas_do_mes, compor_dashboard,
+    pagina_nao_modificada, com_etag,
+)
+
+
+async def _listar(consulta):
+    return [linha async for linha in consulta]
+
+
+async def amontar_dashboard(grupo, mes, ano):
+    """
+    Mesmo resultado de GrupoDetailView.montar_dashboard.
+
+    As três consultas independentes (contas do mês, histórico de 6 meses e
+    ocorrências recorrentes) são disparadas juntas com asyncio.gather.
+    """
+    inicio, fim, inicio_historico = janela_dashboard(mes, ano)
+    hoje = date.today()
+    linhas, historico, virtuais = await asyncio.gather(
+        _listar(contas_do_mes(grupo, inicio, fim, hoje)[:CONTAS_POR_PAGINA + 1]),
+        aresumo_mensal(grupo, ano, mes, quantidade=6),
+        sync_to_async(contas_virtuais)(grupo, inicio_historico, fim),
+    )
+    return compor_dashboard(linhas, historico, virtuais, inicio, fim, hoje)
+
+
+@login_required
+async def grupo_detalhe(request, pk):
+    """Versão assíncrona de GrupoDetailView (mesmo template e contexto)."""
+    grupo = await aget_object_or_404(Grupo, pk=pk, usuario=await request.auser())
+    # Usuário, sessão e mensagens são lidos de forma síncrona
+    etag = await sync_to_async(etag_pagina)(request, request.get_full_path(), grupo.pk, grupo.atualizado_em)
+    response = await sync_to_async(pagina_nao_modificada)(request, etag)
+    if response is not None:
+        return response
+    mes, ano = periodo_da_pagina(request)
+    dashboard, cache_hit = await adashboard_em_cache(
+        grupo, f'{ano}-{mes:02d}:{date.today()}', lambda: amontar_dashboard(grupo, mes, ano)
+    )
+    context = {
+        'grupo': grupo, 'object': grupo, 'versao': versao_grupo(grupo), **dashboard,
+        **contexto_navegacao(mes, ano),
+    }
+    # A renderização lê a sessão (mensagens, CSRF), que é síncrona
+    response = await sync_to_async(render)(request, 'financeiro/grupo_detail.html', context)
+    response['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+    return com_etag(response, etag)